@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Compare the threadpool and AsyncSession models for the order history and
+cart views, in one worker process.
+
+"threadpool" serves each request from a sync def endpoint with a Session
+(how these routes ran before: FastAPI hands them to its threadpool, and
+relationships are lazy loaded per order/item); "async" serves the same data
+from an async def endpoint with an AsyncSession on the event loop, eager
+loading with selectinload. Both apps run in-process behind httpx's ASGI
+transport at the same concurrency, against DATABASE_URL (read-only: it
+needs users with orders or carts, e.g. from generate_sample_data.py).
+
+Both models share the DB_POOL_SIZE/DB_MAX_OVERFLOW pool limits, so set those
+as in production; --sleep-ms adds a pg_sleep to every request to stand in
+for slower queries or a remote database. Measure on Postgres: with SQLite
+the async side goes through aiosqlite's own thread and says little.
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import statistics
+
+# Add parent directory to path to import db and controllers
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import anyio
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import select, text, union
+from db.models import M_Cart, M_Order
+from db.session import SessionLocal, engine, pool_metrics
+from db.async_session import AsyncSessionLocal, async_engine, async_pool_metrics
+from controllers import C_AsyncCartController, C_AsyncOrderController, C_CartController, C_OrderController
+
+ORDERS_PAGE = 10
+
+
+def serialize_orders(orders) -> list:
+    return [
+        {
+            "order_id": order.orderId,
+            "status": order.status,
+            "total_price": float(order.totalAmount),
+            "items": [{"product_id": item.laptopId, "quantity": item.quantity} for item in order.items],
+            "refunds": len(order.refundTickets),
+        }
+        for order in orders
+    ]
+
+
+def serialize_cart(cart) -> dict:
+    if cart is None:
+        return {"items": []}
+    return {
+        "cart_id": cart.cartId,
+        "items": [
+            {"laptop_id": item.laptopId, "name": item.laptop.name, "quantity": item.quantity}
+            for item in cart.items
+        ],
+    }
+
+
+def build_app(sleepSeconds: float) -> FastAPI:
+    app = FastAPI()
+    sleep = text("SELECT pg_sleep(:seconds)")
+
+    @app.get("/threadpool/orders/{user_id}")
+    def threadpool_orders(user_id: int):
+        with SessionLocal() as db:
+            if sleepSeconds:
+                db.execute(sleep, {"seconds": sleepSeconds})
+            orders = C_OrderController(db).viewOrders(user_id)
+            return {"total": len(orders), "orders": serialize_orders(orders[:ORDERS_PAGE])}
+
+    @app.get("/async/orders/{user_id}")
+    async def async_orders(user_id: int):
+        async with AsyncSessionLocal() as db:
+            if sleepSeconds:
+                await db.execute(sleep, {"seconds": sleepSeconds})
+            total, orders = await C_AsyncOrderController(db).viewOrdersPage(user_id, 0, ORDERS_PAGE)
+            return {"total": total, "orders": serialize_orders(orders)}
+
+    @app.get("/threadpool/cart/{user_id}")
+    def threadpool_cart(user_id: int):
+        with SessionLocal() as db:
+            if sleepSeconds:
+                db.execute(sleep, {"seconds": sleepSeconds})
+            return serialize_cart(C_CartController(db).queryCart(user_id))
+
+    @app.get("/async/cart/{user_id}")
+    async def async_cart(user_id: int):
+        async with AsyncSessionLocal() as db:
+            if sleepSeconds:
+                await db.execute(sleep, {"seconds": sleepSeconds})
+            return serialize_cart(await C_AsyncCartController(db).queryCart(user_id))
+
+    return app
+
+
+def sample_users(limit: int) -> list:
+    """Users with orders or a cart, so every request has rows to load"""
+    with SessionLocal() as db:
+        query = union(select(M_Order.userId), select(M_Cart.userId)).limit(limit)
+        return [row[0] for row in db.execute(query)]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+async def load(app: FastAPI, paths: list, concurrency: int, threads: int) -> dict:
+    """Issue every path with at most `concurrency` in flight; latencies in ms"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    latencies = []
+    errors = 0
+    queue = iter(paths)
+
+    async def client(http):
+        nonlocal errors
+        for path in queue:
+            started = time.perf_counter()
+            response = await http.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {"elapsed": elapsed, "latencies": latencies, "errors": errors}
+
+
+async def run(app: FastAPI, model: str, view: str, users: list, args, metrics) -> dict:
+    paths = [f"/{model}/{view}/{users[i % len(users)]}" for i in range(args.requests)]
+    # Warm up connections and compiled statements outside the measurement
+    await load(app, paths[:args.concurrency], args.concurrency, args.threads)
+
+    waitsBefore, waitTotalBefore, timeoutsBefore = sum(metrics.waitBuckets), metrics.waitTotal, metrics.timeouts
+    result = await load(app, paths, args.concurrency, args.threads)
+    waits = sum(metrics.waitBuckets) - waitsBefore
+    latencies = result["latencies"]
+    return {
+        "rps": len(latencies) / result["elapsed"],
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies),
+        "wait": (metrics.waitTotal - waitTotalBefore) / waits if waits else 0.0,
+        "peak": metrics.peakInUse,
+        "timeouts": metrics.timeouts - timeoutsBefore,
+        "errors": result["errors"],
+    }
+
+
+async def main(app: FastAPI, users: list, args) -> None:
+    # One event loop for every run: asyncpg connections can't move between loops
+    print(f"{'view':<7} {'model':<11} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'wait ms':>8} {'peak conn':>9} {'timeouts':>8} {'errors':>6}")
+    try:
+        for view in args.views:
+            for model, metrics in (("threadpool", pool_metrics), ("async", async_pool_metrics)):
+                r = await run(app, model, view, users, args, metrics)
+                print(f"{view:<7} {model:<11} {r['rps']:>8.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} "
+                      f"{r['max']:>8.1f} {r['wait']:>8.2f} {r['peak']:>9} {r['timeouts']:>8} {r['errors']:>6}")
+    finally:
+        await async_engine.dispose()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per model and view")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once")
+    parser.add_argument("--threads", type=int, default=40,
+                        help="Threadpool size for sync endpoints (FastAPI's default is 40)")
+    parser.add_argument("--users", type=int, default=200, help="Distinct users to spread requests over")
+    parser.add_argument("--views", nargs="+", choices=["orders", "cart"], default=["orders", "cart"])
+    parser.add_argument("--sleep-ms", type=float, default=0, help="Extra pg_sleep per request (Postgres only)")
+    args = parser.parse_args()
+
+    if args.sleep_ms and engine.dialect.name != "postgresql":
+        parser.error("--sleep-ms needs a Postgres DATABASE_URL")
+
+    users = sample_users(args.users)
+    if not users:
+        print("No users with orders or carts in the database; run generate_sample_data.py first")
+        sys.exit(1)
+
+    app = build_app(args.sleep_ms / 1000)
+    print(f"{len(users)} users, {args.requests} requests per run, concurrency {args.concurrency}, "
+          f"{args.threads} threads, pool {engine.pool.size()}+{pool_metrics.maxOverflow}")
+    asyncio.run(main(app, users, args))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compare eager and lazy sample image generation as the catalog grows.
+
+For each laptop count, "eager" is the image work the entrypoint used to do
+on every boot (render 3 images per laptop); "lazy" is what booting costs
+now (building the /static mount, no image work) plus the latency of the
+first request for an image (rendered) and of a repeat request (served
+from disk). Runs in a scratch directory and needs no database.
+"""
+import sys
+import os
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import placeholder_images as placeholders
+from services.placeholder_images import LazyStaticFiles, PlaceholderImages
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def request(app, path: str) -> float:
+    """Time one GET through the ASGI app, returning milliseconds"""
+    scope = {"type": "http", "method": "GET", "path": path, "root_path": "", "headers": [], "query_string": b""}
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    elapsed = (time.perf_counter() - started) * 1000
+    if status.get("code") != 200:
+        raise RuntimeError(f"GET {path} returned {status.get('code')}")
+    return elapsed
+
+
+def run(numLaptops: int, workDir: str) -> dict:
+    staticDir = os.path.join(workDir, "static")
+    paths = [f"laptop_images/{laptopId}_img{i}.jpg" for laptopId in range(1, numLaptops + 1) for i in range(1, 4)]
+
+    # Eager: every image rendered before the server can start
+    started = time.perf_counter()
+    PlaceholderImages(staticDir, os.path.join(workDir, "eager.json")).renderAll(paths)
+    eager = time.perf_counter() - started
+    shutil.rmtree(os.path.join(staticDir, "laptop_images"))
+
+    # Lazy: boot builds the mount only; the benchmark has no laptops table, so skip the reference check
+    started = time.perf_counter()
+    images = PlaceholderImages(staticDir, os.path.join(workDir, "lazy.json"))
+    images.isReferenced = lambda spec, match, path: True
+    app = LazyStaticFiles(directory=staticDir, placeholders=images)
+    boot = time.perf_counter() - started
+
+    target = f"/laptop_images/{numLaptops}_img1.jpg"
+    first = asyncio.run(request(app, target))
+    repeat = asyncio.run(request(app, target))
+    shutil.rmtree(os.path.join(staticDir, "laptop_images"))
+    return {"eager": eager * 1000, "boot": boot * 1000, "first": first, "repeat": repeat}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--laptops", type=int, nargs="+", default=[10, 100, 500],
+                        help="Catalog sizes to measure")
+    args = parser.parse_args()
+
+    workDir = tempfile.mkdtemp(prefix="benchmark_startup_")
+    try:
+        os.makedirs(os.path.join(workDir, "static"))
+        shutil.copytree(os.path.join(BACKEND_DIR, placeholders.TEMPLATE_DIR), os.path.join(workDir, "static", "templates"))
+        # Templates are resolved relative to the working directory, like the API does
+        os.chdir(workDir)
+
+        print(f"{'laptops':>8} {'images':>7} {'eager boot (ms)':>16} {'lazy boot (ms)':>15} {'first GET (ms)':>15} {'repeat GET (ms)':>16}")
+        for numLaptops in args.laptops:
+            result = run(numLaptops, workDir)
+            print(f"{numLaptops:>8} {numLaptops * 3:>7} {result['eager']:>16.1f} {result['boot']:>15.2f} "
+                  f"{result['first']:>15.1f} {result['repeat']:>16.2f}")
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
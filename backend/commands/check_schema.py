@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Check that the live database matches db/models and is migrated to the latest revision.
+
+Reports tables, columns and indexes the models declare but the database
+lacks (including indexes a failed CREATE INDEX CONCURRENTLY left invalid),
+and whether Alembic migrations are pending. Exits with status 1 when any of
+those is found, so a deploy can stop before a query runs without its index.
+Live indexes that no model declares are listed but don't fail the check.
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path to import db
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from db.models import Base
+from db.schema_check import compare_schema
+from db.session import DB_APPLICATION_NAME, create_db_engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def describe(spec) -> str:
+    where = f" WHERE {spec.where}" if spec.where else ""
+    unique = "UNIQUE " if spec.unique else ""
+    return f"{spec.name}: {unique}{spec.table} ({', '.join(spec.columns)}){where}"
+
+
+def pending_revisions(conn) -> tuple:
+    """(current revision, head revision) of the Alembic migrations"""
+    script = ScriptDirectory.from_config(Config(ALEMBIC_INI))
+    return MigrationContext.configure(conn).get_current_revision(), script.get_current_head()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quiet", action="store_true", help="Only print problems")
+    args = parser.parse_args()
+
+    checkEngine = create_db_engine(applicationName=f"{DB_APPLICATION_NAME}-schema-check", pool_size=1, max_overflow=0)
+    try:
+        with checkEngine.connect() as conn:
+            diff = compare_schema(conn, Base.metadata)
+            current, head = pending_revisions(conn)
+    finally:
+        checkEngine.dispose()
+
+    problems = 0
+    if current != head:
+        print(f"✗ Migrations pending: database is at {current or 'no revision'}, head is {head} "
+              f"(run: alembic upgrade head)")
+        problems += 1
+    for table in diff["missing_tables"]:
+        print(f"✗ Missing table: {table}")
+    for column in diff["missing_columns"]:
+        print(f"✗ Missing column: {column}")
+    for spec in diff["missing_indexes"]:
+        print(f"✗ Missing index {describe(spec)}")
+    for spec in diff["invalid_indexes"]:
+        print(f"✗ Invalid index (failed concurrent build, rerun the migration) {describe(spec)}")
+    problems += len(diff["missing_tables"]) + len(diff["missing_columns"]) \
+        + len(diff["missing_indexes"]) + len(diff["invalid_indexes"])
+
+    if not args.quiet:
+        for spec in diff["extra_indexes"]:
+            print(f"  Not in the models: {describe(spec)}")
+
+    if problems:
+        print(f"✗ Schema check failed: {problems} problem(s)")
+        sys.exit(1)
+    print(f"✓ Schema matches the models (revision {head})")
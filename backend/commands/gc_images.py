@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Remove content-addressed product images that no laptop references any more.
+
+Blobs whose reference count has been zero for longer than the grace period are
+deleted together with their variants; files that never got a row are swept
+too. Safe to run while the API is serving (e.g. from cron).
+"""
+import sys
+import os
+import logging
+import argparse
+
+# Add parent directory to path to import db and services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.session import SessionLocal
+from services.image_store import IMAGE_GC_GRACE_HOURS, collect_garbage
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--grace-hours", type=float, default=IMAGE_GC_GRACE_HOURS,
+                        help="How long a blob must have been unreferenced before it is removed")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be removed without deleting")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = SessionLocal()
+    try:
+        stats = collect_garbage(db, args.grace_hours, args.dry_run)
+    finally:
+        db.close()
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"{verb} {stats['blobs']} blobs ({stats['bytes']} bytes, {stats['files']} files) and {stats['orphans']} orphaned files")
@@ -2,22 +2,42 @@
 """
 Standalone script to generate images for laptops and posts.
 This can be run independently of data generation.
+
+The API renders these on first request (services/placeholder_images.py), so
+this is only needed to warm the cache ahead of time, e.g. before a benchmark.
 """
 import sys
 import os
+import argparse
 
 # Add parent directory to path to import generate_sample_data
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy import func, select
+
 from commands.generate_sample_data import generate_laptop_images, generate_post_images
+from db.models import M_Laptop
+from db.session import SessionLocal
+from services.placeholder_images import SAMPLE_POSTS
+
+
+def count_laptops() -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.max(M_Laptop.laptopId))) or 0
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--laptops", type=int, default=None, help="Highest laptop id to render (default: from the database)")
+    parser.add_argument("--posts", type=int, default=SAMPLE_POSTS)
+    args = parser.parse_args()
+
     print("Generating laptop images...")
-    generate_laptop_images()
+    generate_laptop_images(args.laptops if args.laptops is not None else count_laptops())
     print("Laptop images generated successfully!")
-    
+
     print("Generating post images...")
-    generate_post_images(num_posts=20)
+    generate_post_images(num_posts=args.posts)
     print("Post images generated successfully!")
-    
+
     print("All images generated!")
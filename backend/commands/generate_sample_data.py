@@ -1,14 +1,19 @@
+import sys
 import json
 import random
 import os
+import argparse
 from datetime import datetime, timedelta
-from PIL import Image, ImageDraw, ImageFont
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal, ROUND_HALF_UP
 import string
 from passlib.context import CryptContext
 
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.placeholder_images import placeholder_images
+
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -528,87 +533,32 @@ def generate_posts(
     print(f"INSERT post queries written for {num_posts} posts to {sql_output_path}")
 
 
-def generate_laptop_images(
-    template_dir="./static/templates",
-    output_dir="./static/laptop_images",
-):
-    global NUM_LAPTOPS
-
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    try:
-        font = ImageFont.truetype("arial.ttf", 150)
-    except:
-        font = ImageFont.load_default()
-
-    def generate_image(laptop_id, i):
-        src_path = os.path.join(template_dir, f"laptop{i}.jpg")
-        dest_path = os.path.join(output_dir, f"{laptop_id}_img{i}.jpg")
-
-        if not os.path.exists(src_path):
-            print(f"[WARN] Template image {src_path} not found, skipping")
-            return
-
-        with Image.open(src_path) as img:
-            draw = ImageDraw.Draw(img)
-            draw.text(
-                (30, 30),
-                f"ID: {laptop_id}",
-                font=font,
-                fill="black",
-                stroke_fill="white",
-                stroke_width=3,
-            )
-            img.save(dest_path)
-
-    with ThreadPoolExecutor() as executor:
-        tasks = [
-            executor.submit(generate_image, laptop_id, i)
-            for laptop_id in range(1, NUM_LAPTOPS + 1)
-            for i in range(1, 4)  # 3 images per laptop
-        ]
-        for task in tqdm(tasks, desc="Generating laptop images"):
-            task.result()
-
-    print(f"Generated mock images for {NUM_LAPTOPS} laptops.")
-
+def generate_laptop_images(num_laptops=None):
+    """
+    Render every sample laptop image now (optional: the API renders them on first request).
 
-def generate_post_images(
-    num_posts=20,
-    template_path="./static/templates/posts.jpg",
-    output_dir="./static/post_images",
-):
+    Uses the same renderer and manifest as services/placeholder_images.py,
+    so images made here are not drawn again by the API.
+    """
+    num_laptops = NUM_LAPTOPS if num_laptops is None else num_laptops
+    paths = [
+        f"laptop_images/{laptop_id}_img{i}.jpg"
+        for laptop_id in range(1, num_laptops + 1)
+        for i in range(1, 4)  # 3 images per laptop
+    ]
+    render_placeholders(paths, "Generating laptop images")
+    print(f"Generated mock images for {num_laptops} laptops.")
 
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
 
-    try:
-        font = ImageFont.truetype("arial.ttf", size=100)
-    except:
-        font = ImageFont.load_default()
-
-    for i in tqdm(range(1, num_posts + 1), desc="Generating post images"):
-        if not os.path.exists(template_path):
-            print(f"[WARN] Template image not found at: {template_path}")
-            break
-
-        with Image.open(template_path) as img:
-            draw = ImageDraw.Draw(img)
-            text = f"Post #{i}"
-            draw.text(
-                (50, 50),
-                text,
-                font=font,
-                fill="black",
-                stroke_width=4,
-                stroke_fill="white",
-            )
+def generate_post_images(num_posts=20):
+    """Render every sample post image now (optional, see generate_laptop_images)"""
+    render_placeholders([f"post_images/post_{i}.jpg" for i in range(1, num_posts + 1)], "Generating post images")
+    print(f"Generated {num_posts} post images in './static/post_images'")
 
-            output_path = os.path.join(output_dir, f"post_{i}.jpg")
-            img.save(output_path)
 
-    print(f"Generated {num_posts} post images in '{output_dir}'")
+def render_placeholders(paths, description):
+    with tqdm(total=len(paths), desc=description) as progress:
+        placeholder_images.renderAll(paths, progress)
 
 
 def generate_orders(
@@ -863,13 +813,23 @@ def generate_refund_tickets(
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write sample data to commands/insert_sample_data.sql")
+    parser.add_argument(
+        "--eager-images",
+        action="store_true",
+        help="Render all sample images now instead of on first request",
+    )
+    args = parser.parse_args()
+
     clear_old_commands()
     generate_admin_account()
     generate_laptop_insert_queries()
-    generate_laptop_images()
+    if args.eager_images:
+        generate_laptop_images()
     generate_reviews()
     generate_subscriptions()
     generate_posts()
-    generate_post_images(num_posts=NUM_POSTS)
+    if args.eager_images:
+        generate_post_images(num_posts=NUM_POSTS)
     generate_orders(num_orders=100)
     generate_refund_tickets(num_tickets=30)
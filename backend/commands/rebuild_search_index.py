@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Rebuild the laptops Elasticsearch index with the current managed mapping.
+Copies the live documents into a new versioned index and swaps the alias atomically.
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.search import get_sync_search_client
+from services.search_index import (
+    LAPTOPS_MAPPING_VERSION,
+    get_live_mapping_version,
+    rebuild_laptops_index,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the mapping is current")
+    parser.add_argument("--keep-old", action="store_true", help="Keep the previous index after the swap")
+    args = parser.parse_args()
+
+    es = get_sync_search_client()
+    version = get_live_mapping_version(es)
+    print(f"Live mapping version: {version}, current: {LAPTOPS_MAPPING_VERSION}")
+
+    if version == LAPTOPS_MAPPING_VERSION and not args.force:
+        print("Index is up to date - nothing to do (use --force to rebuild anyway)")
+        sys.exit(0)
+
+    name = rebuild_laptops_index(es, delete_old=not args.keep_old)
+    print(f"Index rebuilt as {name}")
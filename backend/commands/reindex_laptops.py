@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Rebuild the laptops Elasticsearch index from Postgres without downtime.
+
+Rows are streamed with a server-side cursor into a new versioned index via
+parallel_bulk while the alias keeps serving the old index. Rows changed during
+the build are caught up, the document count is checked, and the alias is
+swapped atomically. Progress is checkpointed so an interrupted run can resume.
+"""
+import sys
+import os
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+
+# Add parent directory to path to import db and services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from elasticsearch import helpers
+from sqlalchemy import select, func, or_
+from tqdm import tqdm
+
+from db.session import SessionLocal
+from db.models import M_Laptop
+from services.search import get_sync_search_client
+from services.search_index import (
+    LAPTOPS_REPLICAS,
+    create_laptops_index,
+    laptop_document,
+    new_index_name,
+    swap_laptops_alias,
+)
+
+DEFAULT_STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".reindex_laptops_state.json")
+CHECKPOINT_EVERY = 5000
+
+
+def load_state(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(path: str, state: dict) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def active_laptops():
+    """Laptops that belong in the index (soft-deleted rows are left out)"""
+    return or_(M_Laptop.isActive, M_Laptop.isActive.is_(None))
+
+
+def stream_actions(db, index_name: str, after_id: int, batch_size: int, retry_ids: list = ()):
+    """Yield bulk index actions for the active laptops in retry_ids, then those with id > after_id, in id order"""
+    after = M_Laptop.laptopId > after_id
+    stmt = (
+        select(M_Laptop)
+        .where(active_laptops(), or_(after, M_Laptop.laptopId.in_(retry_ids)) if retry_ids else after)
+        .order_by(M_Laptop.laptopId)
+        .execution_options(yield_per=batch_size)
+    )
+    for laptop in db.scalars(stmt):
+        yield {"_index": index_name, "_id": laptop.laptopId, "_source": laptop_document(laptop)}
+
+
+def bulk_load(es, db, state: dict, args) -> int:
+    """
+    Stream rows into the new index, checkpointing the last acknowledged id.
+    Ids that failed are kept in the state file and retried first on --resume,
+    since the checkpoint moves past them.
+    """
+    index_name = state["index"]
+    retry_ids = state.get("failed_ids", [])
+    state["failed_ids"] = []
+    after = M_Laptop.laptopId > state["last_id"]
+    remaining = db.scalar(
+        select(func.count()).select_from(M_Laptop)
+        .where(active_laptops(), or_(after, M_Laptop.laptopId.in_(retry_ids)) if retry_ids else after)
+    )
+    if retry_ids:
+        print(f"Retrying {len(retry_ids)} laptops that failed in the previous run")
+    failures = 0
+    started = time.monotonic()
+    done = 0
+
+    results = helpers.parallel_bulk(
+        es,
+        stream_actions(db, index_name, state["last_id"], args.batch_size, retry_ids),
+        thread_count=args.threads,
+        chunk_size=args.chunk_size,
+        raise_on_error=False,
+        raise_on_exception=False,
+    )
+    with tqdm(total=remaining, unit="doc", desc="Indexing") as progress:
+        # parallel_bulk yields results in input order, so the last ok id is a safe resume point
+        # for everything but the failed ids, which are recorded separately
+        for ok, item in results:
+            result = item.get("index", {})
+            if ok:
+                state["last_id"] = max(state["last_id"], int(result["_id"]))
+                state["indexed"] += 1
+            else:
+                failures += 1
+                state["failed_ids"].append(int(result["_id"]))
+                print(f"Failed to index laptop {result.get('_id')}: {result.get('error')}")
+            done += 1
+            progress.update(1)
+            if done % CHECKPOINT_EVERY == 0:
+                save_state(args.state_file, state)
+
+    elapsed = time.monotonic() - started
+    save_state(args.state_file, state)
+    rate = done / elapsed if elapsed > 0 else 0
+    print(f"Bulk indexed {done} documents in {elapsed:.1f}s ({rate:.0f} docs/s), {failures} failures")
+    return failures
+
+
+def catch_up(es, db, state: dict) -> int:
+    """Re-apply rows modified since the build started (the alias kept taking writes meanwhile)"""
+    since = datetime.fromisoformat(state["started_at"]) - timedelta(seconds=5)
+    stmt = select(M_Laptop).where(M_Laptop.modifiedAt >= since).order_by(M_Laptop.laptopId)
+    actions = []
+    for laptop in db.scalars(stmt):
+        if laptop.isActive is False:
+            actions.append({"_op_type": "delete", "_index": state["index"], "_id": laptop.laptopId})
+        else:
+            actions.append({"_index": state["index"], "_id": laptop.laptopId, "_source": laptop_document(laptop)})
+    failures = 0
+    for ok, item in helpers.streaming_bulk(es, actions, raise_on_error=False, raise_on_exception=False):
+        op_type, result = next(iter(item.items()))
+        # Deleting a laptop the new index never had is not a failure
+        if not ok and not (op_type == "delete" and result.get("status") == 404):
+            failures += 1
+            print(f"Failed to {op_type} laptop {result.get('_id')}: {result.get('error')}")
+    print(f"Caught up {len(actions)} rows modified during the build, {failures} failures")
+    return failures
+
+
+def finalize_index(es, index_name: str) -> None:
+    """Restore the settings relaxed for bulk loading and make documents searchable"""
+    es.indices.put_settings(
+        index=index_name,
+        settings={"index": {"refresh_interval": None, "number_of_replicas": LAPTOPS_REPLICAS}},
+    )
+    es.indices.refresh(index=index_name)
+
+
+def reindex_laptops(args) -> None:
+    es = get_sync_search_client().options(request_timeout=args.timeout)
+    state = load_state(args.state_file) if args.resume else {}
+
+    if state and es.indices.exists(index=state["index"]):
+        print(f"Resuming into {state['index']} after laptop id {state['last_id']}")
+    else:
+        state = {
+            "index": new_index_name(),
+            "last_id": 0,
+            "indexed": 0,
+            "failed_ids": [],
+            "started_at": datetime.now().isoformat(),
+        }
+        create_laptops_index(es, state["index"])
+        # Bulk-load friendly settings; restored in finalize_index
+        es.indices.put_settings(
+            index=state["index"],
+            settings={"index": {"refresh_interval": "-1", "number_of_replicas": 0}},
+        )
+        save_state(args.state_file, state)
+        print(f"Building {state['index']}")
+
+    db = SessionLocal()
+    try:
+        failures = bulk_load(es, db, state, args)
+        if failures and not args.allow_failures:
+            print("Aborting before the alias swap; fix the failures and rerun with --resume to retry them")
+            sys.exit(1)
+
+        failures = catch_up(es, db, state)
+        if failures and not args.allow_failures:
+            print("Aborting before the alias swap; catch-up writes failed, rerun with --resume to repeat them")
+            sys.exit(1)
+        finalize_index(es, state["index"])
+
+        expected = db.scalar(select(func.count()).select_from(M_Laptop).where(active_laptops()))
+    finally:
+        db.close()
+
+    actual = es.count(index=state["index"])["count"]
+    print(f"Document count check: index={actual}, database={expected}")
+    if abs(actual - expected) > args.max_drift:
+        print("Count mismatch; the alias was not swapped (rerun with --resume or raise --max-drift)")
+        sys.exit(1)
+
+    swap_laptops_alias(es, state["index"], delete_old=not args.keep_old)
+    os.remove(args.state_file)
+    print(f"Alias now points at {state['index']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the laptops search index from Postgres")
+    parser.add_argument("--resume", action="store_true", help="Continue the build recorded in the state file")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows fetched per server-side cursor round trip")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Documents per bulk request")
+    parser.add_argument("--threads", type=int, default=4, help="parallel_bulk worker threads")
+    parser.add_argument("--timeout", type=float, default=60, help="Elasticsearch request timeout in seconds")
+    parser.add_argument("--max-drift", type=int, default=0, help="Allowed index/database count difference")
+    parser.add_argument("--allow-failures", action="store_true", help="Swap the alias even if some documents failed")
+    parser.add_argument("--keep-old", action="store_true", help="Keep the previous index after the swap")
+    reindex_laptops(parser.parse_args())
@@ -0,0 +1,18 @@
+-- Postgres full-text search used when Elasticsearch is unavailable (services/search_fallback.py)
+-- Safe to run repeatedly; keep the expression in sync with SEARCH_VECTOR_SQL in db/models/M_Laptop.py
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Weighted document: brand/sub-brand (A), name (B), cpu/vga (C)
+ALTER TABLE laptops ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple'::regconfig, coalesce(brand, '') || ' ' || coalesce(sub_brand, '')), 'A') ||
+    setweight(to_tsvector('simple'::regconfig, coalesce(name, '')), 'B') ||
+    setweight(to_tsvector('simple'::regconfig, coalesce(cpu, '') || ' ' || coalesce(vga, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_laptops_search_vector ON laptops USING GIN (search_vector);
+
+-- Trigram indexes serve the ILIKE '%...%' substring matches on these columns
+CREATE INDEX IF NOT EXISTS idx_laptops_name_trgm ON laptops USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_laptops_brand_trgm ON laptops USING GIN (brand gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_laptops_cpu_trgm ON laptops USING GIN (cpu gin_trgm_ops);
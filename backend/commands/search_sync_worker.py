@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Apply queued laptop changes from the search_outbox table to Elasticsearch.
+Run several processes (--processes, or several containers) to drain faster;
+they share the outbox safely through FOR UPDATE SKIP LOCKED.
+"""
+import sys
+import os
+import signal
+import logging
+import argparse
+import threading
+import multiprocessing
+
+# Add parent directory to path to import db and services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.session import SessionLocal, engine
+from services.search import get_sync_search_client
+from services.search_index import ensure_laptops_index
+from services.search_sync import (
+    SEARCH_SYNC_BATCH_SIZE,
+    SEARCH_SYNC_POLL_INTERVAL,
+    outbox_stats,
+    process_batch,
+    run_worker,
+)
+
+_stopping = threading.Event()
+
+
+def _request_stop(signum, frame):
+    _stopping.set()
+
+
+def worker_main(batchSize: int, pollInterval: float) -> None:
+    # Connections inherited from the parent process must not be reused after fork
+    engine.dispose(close=False)
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+    logging.getLogger(__name__).info(f"Search sync worker {os.getpid()} started")
+    run_worker(SessionLocal, get_sync_search_client(), batchSize, pollInterval, shouldStop=_stopping.is_set)
+
+
+def drain_once(batchSize: int) -> None:
+    """Process the outbox until it is empty, then exit"""
+    es = get_sync_search_client()
+    ensure_laptops_index(es)
+    total = 0
+    while True:
+        db = SessionLocal()
+        try:
+            handled = process_batch(db, es, batchSize)
+        finally:
+            db.close()
+        if handled == 0:
+            break
+        total += handled
+    print(f"Drained {total} outbox entries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=int(os.getenv("SEARCH_SYNC_PROCESSES", "1")))
+    parser.add_argument("--batch-size", type=int, default=SEARCH_SYNC_BATCH_SIZE, help="Outbox entries claimed per transaction")
+    parser.add_argument("--poll-interval", type=float, default=SEARCH_SYNC_POLL_INTERVAL, help="Seconds to wait when the outbox is empty")
+    parser.add_argument("--once", action="store_true", help="Drain the outbox and exit")
+    parser.add_argument("--stats", action="store_true", help="Print the outbox backlog and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    if args.stats:
+        db = SessionLocal()
+        try:
+            print(outbox_stats(db))
+        finally:
+            db.close()
+        sys.exit(0)
+
+    if args.once:
+        drain_once(args.batch_size)
+        sys.exit(0)
+
+    if args.processes <= 1:
+        worker_main(args.batch_size, args.poll_interval)
+        sys.exit(0)
+
+    workers = [
+        multiprocessing.Process(target=worker_main, args=(args.batch_size, args.poll_interval), name=f"search-sync-{i}")
+        for i in range(args.processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def _stop_workers(signum, frame):
+        # Each worker finishes its current batch before exiting
+        for worker in workers:
+            worker.terminate()
+
+    signal.signal(signal.SIGTERM, _stop_workers)
+    signal.signal(signal.SIGINT, _stop_workers)
+    for worker in workers:
+        worker.join()
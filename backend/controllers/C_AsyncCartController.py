@@ -0,0 +1,125 @@
+from .C_BaseController import C_BaseController
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+from db.models import M_Cart, M_CartItem, M_Laptop
+from typing import Optional, Tuple
+from datetime import datetime
+
+# Laptop columns the cart view reads. AsyncSession can't lazy load, so carts
+# come back with their items and these columns already loaded
+CART_LAPTOP_COLUMNS = (M_Laptop.laptopId, M_Laptop.modelName, M_Laptop.productImages, M_Laptop.price)
+
+
+class C_AsyncCartController(C_BaseController):
+    """AsyncSession counterpart of C_CartController"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__()
+        self.db = db
+    
+    async def queryCart(self, userId: int) -> Optional[M_Cart]:
+        """Get user's current cart, with items and their laptops (reloaded if already in the session)"""
+        result = await self.db.scalars(
+            select(M_Cart)
+            .where(M_Cart.userId == userId)
+            .options(selectinload(M_Cart.items).selectinload(M_CartItem.laptop).load_only(*CART_LAPTOP_COLUMNS))
+            .execution_options(populate_existing=True)
+        )
+        return result.first()
+    
+    async def addToCart(self, userId: int, laptopId: int, qty: int) -> M_Cart:
+        """Add item to user's cart"""
+        # Get or create cart for user (a new cart starts with a loaded, empty item list)
+        cart = await self.queryCart(userId)
+        if not cart:
+            cart = M_Cart(userId=userId, totalAmount=0, items=[])
+            self.db.add(cart)
+            await self.db.flush()
+        
+        # Get laptop price
+        laptop = await self.db.get(M_Laptop, laptopId, options=[load_only(M_Laptop.price, M_Laptop.stockQty)])
+        if not laptop:
+            raise ValueError("Laptop not found")
+        
+        if not laptop.isInStock():
+            raise ValueError("Laptop out of stock")
+        
+        # Add item to cart
+        cart.addItem(laptopId, qty, int(laptop.price))
+        cart.recalculateTotal()
+        
+        await self.db.commit()
+        
+        self.logAudit("cart_item_added", userId, laptopId)
+        
+        return await self.queryCart(userId)
+    
+    async def updateQuantity(self, userId: int, itemId: int, qty: int) -> M_Cart:
+        """Update quantity of an item in cart"""
+        cart = await self.queryCart(userId)
+        if not cart:
+            raise ValueError("Cart not found")
+        
+        # Find item
+        item = next((item for item in cart.items if item.itemId == itemId), None)
+        if not item:
+            raise ValueError("Item not found in cart")
+        
+        item.updateQuantity(qty)
+        cart.recalculateTotal()
+        
+        await self.db.commit()
+        
+        self.logAudit("cart_item_updated", userId, itemId)
+        
+        return await self.queryCart(userId)
+    
+    async def removeItem(self, userId: int, itemId: int) -> M_Cart:
+        """Remove an item from cart"""
+        cart = await self.queryCart(userId)
+        if not cart:
+            raise ValueError("Cart not found")
+        
+        cart.removeItem(itemId)
+        
+        await self.db.commit()
+        
+        self.logAudit("cart_item_removed", userId, itemId)
+        
+        return await self.queryCart(userId)
+    
+    async def clearCart(self, userId: int) -> None:
+        """Delete the user's cart and its items"""
+        cart = await self.queryCart(userId)
+        if cart:
+            await self.db.delete(cart)
+            await self.db.commit()
+    
+    def refreshPrices(self, cart: M_Cart) -> None:
+        """M_Cart.refreshPrices from the laptops queryCart already loaded, without a query per item"""
+        for item in cart.items:
+            if item.laptop and item.laptop.price:
+                item.unitPrice = int(item.laptop.price)
+                item.subtotal = item.computeSubtotal()
+        cart.recalculateTotal()
+    
+    async def getCartVersion(self, userId: int) -> Optional[Tuple[list, Optional[datetime]]]:
+        """
+        Version columns the cart view is built from, in one query: the cart row,
+        its items and the updated_at of their laptops (which moves with price,
+        name and image changes). Returns (rows, last modified) or None without a cart.
+        """
+        result = await self.db.execute(
+            select(M_Cart.cartId, M_Cart.updatedAt, M_CartItem.itemId, M_CartItem.quantity,
+                   M_CartItem.laptopId, M_Laptop.modifiedAt)
+            .outerjoin(M_CartItem, M_CartItem.cartId == M_Cart.cartId)
+            .outerjoin(M_Laptop, M_Laptop.laptopId == M_CartItem.laptopId)
+            .where(M_Cart.userId == userId)
+            .order_by(M_CartItem.itemId)
+        )
+        rows = result.all()
+        if not rows:
+            return None
+        timestamps = [t for row in rows for t in (row.updatedAt, row.modifiedAt) if t is not None]
+        return [tuple(row) for row in rows], max(timestamps, default=None)
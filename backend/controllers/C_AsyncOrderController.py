@@ -0,0 +1,41 @@
+from .C_BaseController import C_BaseController
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from db.models import M_Order
+from typing import List, Optional, Tuple
+
+
+class C_AsyncOrderController(C_BaseController):
+    """AsyncSession counterpart of C_OrderController's read side (order history)"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__()
+        self.db = db
+    
+    async def viewOrdersPage(self, userId: int, offset: int, limit: int) -> Tuple[int, List[M_Order]]:
+        """A user's total order count and one page of their orders, newest first, with items and refund tickets"""
+        total = await self.db.scalar(select(func.count(M_Order.orderId)).where(M_Order.userId == userId))
+        result = await self.db.scalars(
+            select(M_Order)
+            .where(M_Order.userId == userId)
+            .options(selectinload(M_Order.items), selectinload(M_Order.refundTickets))
+            .order_by(M_Order.createdAt.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        return total, list(result.all())
+    
+    async def getOrderDetail(self, orderId: int) -> Optional[M_Order]:
+        """Get an order with its items"""
+        result = await self.db.scalars(
+            select(M_Order).where(M_Order.orderId == orderId).options(selectinload(M_Order.items))
+        )
+        return result.first()
+    
+    async def getOrderVersion(self, orderId: int):
+        """Owner and updated_at of an order, without loading it (None if it doesn't exist)"""
+        result = await self.db.execute(
+            select(M_Order.userId, M_Order.updatedAt).where(M_Order.orderId == orderId)
+        )
+        return result.first()
@@ -0,0 +1,44 @@
+from .C_BaseController import C_BaseController
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from db.models import M_Laptop, M_Review
+from typing import List, Optional, Tuple
+from datetime import datetime
+
+
+class C_AsyncProductController(C_BaseController):
+    """AsyncSession counterpart of C_ProductController's read side (product detail and reviews)"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__()
+        self.db = db
+    
+    async def getLaptopDetails(self, laptopId: int, columns: Optional[list] = None) -> Optional[M_Laptop]:
+        """Get a laptop, optionally loading only some columns (anything not loaded can't be read later)"""
+        query = select(M_Laptop).where(M_Laptop.laptopId == laptopId)
+        if columns:
+            query = query.options(load_only(*columns))
+        return (await self.db.scalars(query)).first()
+    
+    async def getLaptopReviewsVersion(self, laptopId: int) -> Tuple[int, Optional[int], Optional[datetime]]:
+        """Count, newest id and latest updated_at of a laptop's reviews"""
+        result = await self.db.execute(
+            select(func.count(M_Review.reviewId), func.max(M_Review.reviewId), func.max(M_Review.updatedAt))
+            .where(M_Review.laptopId == laptopId)
+        )
+        return tuple(result.one())
+    
+    async def getLaptopReviews(self, laptopId: int, skip: int = 0) -> List[M_Review]:
+        """Reviews for a laptop, oldest first, from the skip-th on"""
+        result = await self.db.scalars(
+            select(M_Review).where(M_Review.laptopId == laptopId).order_by(M_Review.reviewId).offset(skip)
+        )
+        return list(result.all())
+    
+    async def getUserReviews(self, userId: int, skip: int, limit: int) -> List[M_Review]:
+        """One page of the reviews a user wrote"""
+        result = await self.db.scalars(
+            select(M_Review).where(M_Review.userId == userId).order_by(M_Review.reviewId).offset(skip).limit(limit)
+        )
+        return list(result.all())
@@ -0,0 +1,57 @@
+from .C_BaseController import C_BaseController
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from db.models import M_Review, M_Laptop
+from datetime import datetime
+from decimal import Decimal
+
+
+class C_AsyncReviewController(C_BaseController):
+    """AsyncSession counterpart of C_ReviewController"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__()
+        self.db = db
+    
+    async def validateAndStoreReview(self, userId: int, laptopId: int, rating: int, comment: str) -> M_Review:
+        """Validate and store a product review, updating the laptop's rating in the same transaction"""
+        # Validate rating
+        if rating < 1 or rating > 5:
+            raise ValueError("Rating must be between 1 and 5")
+        
+        # Check if laptop exists
+        laptop = await self.db.get(M_Laptop, laptopId, options=[load_only(M_Laptop.rate, M_Laptop.numRate)])
+        if not laptop:
+            raise ValueError("Laptop not found")
+        
+        # Create review
+        review = M_Review(
+            userId=userId,
+            laptopId=laptopId,
+            rating=rating,
+            comment=comment,
+            # asyncpg only binds datetime objects to timestamp columns (no ISO strings)
+            createdAt=datetime.utcnow()
+        )
+        
+        # Validate review
+        if not review.validate():
+            raise ValueError("Invalid review data")
+        
+        self.db.add(review)
+        await self.db.flush()
+        
+        # Update laptop rating from an aggregate instead of loading every review
+        count, average = (await self.db.execute(
+            select(func.count(M_Review.reviewId), func.avg(M_Review.rating)).where(M_Review.laptopId == laptopId)
+        )).one()
+        laptop.rate = Decimal(str(round(float(average), 2)))
+        laptop.numRate = count
+        
+        await self.db.commit()
+        await self.db.refresh(review)
+        
+        self.logAudit("review_submitted", userId, review.reviewId)
+        
+        return review
@@ -1,5 +1,5 @@
 from .C_BaseController import C_BaseController
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 from db.models import M_Laptop, M_Review
 from typing import List, Optional
 
@@ -66,13 +66,21 @@ class C_ProductController(C_BaseController):
         
         return products
     
-    def getLaptopDetails(self, laptopId: int) -> Optional[M_Laptop]:
-        """Get detailed information about a specific laptop"""
-        laptop = self.db.query(M_Laptop).filter(
-            M_Laptop.laptopId == laptopId
-        ).first()
+    def getLaptopDetails(self, laptopId: int, columns: Optional[list] = None) -> Optional[M_Laptop]:
+        """Get detailed information about a specific laptop, optionally loading only some columns"""
+        query = self.db.query(M_Laptop).filter(M_Laptop.laptopId == laptopId)
+        if columns:
+            query = query.options(load_only(*columns))
+        laptop = query.first()
         return laptop
     
+    def getLaptopsByIds(self, laptopIds: List[int], columns: Optional[list] = None) -> List[M_Laptop]:
+        """Get several laptops with one IN query (unordered), optionally loading only some columns"""
+        query = self.db.query(M_Laptop).filter(M_Laptop.laptopId.in_(laptopIds))
+        if columns:
+            query = query.options(load_only(*columns))
+        return query.all()
+    
     def getLaptopReviews(self, laptopId: int) -> List[M_Review]:
         """Get all reviews for a specific laptop"""
         reviews = self.db.query(M_Review).filter(
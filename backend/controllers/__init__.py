@@ -12,6 +12,10 @@ from .C_RefundController import C_RefundController
 from .C_ReviewController import C_ReviewController
 from .C_AnalyticsController import C_AnalyticsController
 from .C_InventoryController import C_InventoryController
+from .C_AsyncCartController import C_AsyncCartController
+from .C_AsyncOrderController import C_AsyncOrderController
+from .C_AsyncProductController import C_AsyncProductController
+from .C_AsyncReviewController import C_AsyncReviewController
 
 __all__ = [
     "C_BaseController",
@@ -26,4 +30,8 @@ __all__ = [
     "C_ReviewController",
     "C_AnalyticsController",
     "C_InventoryController",
+    "C_AsyncCartController",
+    "C_AsyncOrderController",
+    "C_AsyncProductController",
+    "C_AsyncReviewController",
 ]
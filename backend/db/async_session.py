@@ -0,0 +1,106 @@
+"""
+Async Database Session
+AsyncSession engine (asyncpg) for routes that have moved off the threadpool
+"""
+import os
+from typing import Optional
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from db.routing import PRIMARY
+from db.session import (
+    DATABASE_URL,
+    DB_APPLICATION_NAME,
+    DB_STATEMENT_TIMEOUT_MS,
+    READ_DATABASE_URL,
+    MeteredAsyncQueuePool,
+    PoolMetrics,
+    engine_options,
+    meter_engine,
+    read_router,
+    request_client_key,
+    server_settings,
+)
+
+# Async drivers for the backends DATABASE_URL may name
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(url):
+    """The same database through its async driver (ASYNC_DATABASE_URL overrides this for DATABASE_URL)"""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_url(DATABASE_URL)
+
+
+def create_async_db_engine(url=ASYNC_DATABASE_URL, applicationName: str = DB_APPLICATION_NAME,
+                           statementTimeoutMs: int = DB_STATEMENT_TIMEOUT_MS, readOnly: bool = False,
+                           **overrides) -> AsyncEngine:
+    """
+    Async counterpart of create_db_engine: same DB_* pool settings and session
+    parameters, passed to asyncpg as server_settings. Each worker gets its own
+    pool next to the sync one, so count both when sizing against max_connections.
+    """
+    options = engine_options()
+    if make_url(url).get_backend_name() == "postgresql":
+        options["poolclass"] = MeteredAsyncQueuePool
+        options["connect_args"] = {"server_settings": server_settings(applicationName, statementTimeoutMs, readOnly)}
+    options.update(overrides)
+
+    newEngine = create_async_engine(url, **options)
+    meter_engine(newEngine.sync_engine, options["max_overflow"])
+    return newEngine
+
+
+class _PrimarySession(Session):
+    """Sync session behind AsyncSessionLocal, so commits there can be told apart"""
+
+
+async_engine = create_async_db_engine()
+async_pool_metrics: PoolMetrics = async_engine.sync_engine.info["pool_metrics"]
+
+# expire_on_commit=False: attributes read after a commit must not trigger lazy loads, which can't run here
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False,
+                                       sync_session_class=_PrimarySession)
+
+async_read_engine: Optional[AsyncEngine] = create_async_db_engine(
+    async_url(READ_DATABASE_URL), applicationName=f"{DB_APPLICATION_NAME}-read", readOnly=True
+) if READ_DATABASE_URL else None
+async_read_pool_metrics: Optional[PoolMetrics] = async_read_engine.sync_engine.info["pool_metrics"] \
+    if async_read_engine is not None else None
+
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine or async_engine, expire_on_commit=False,
+                                           autoflush=False)
+
+
+@event.listens_for(_PrimarySession, "after_commit")
+def _stick_to_primary(session) -> None:
+    # Same read-your-writes stickiness as sessions from get_db
+    key = session.info.get("client_key")
+    if key is not None:
+        read_router.recordWrite(key)
+
+
+async def get_async_db(request: Request):
+    """AsyncSession on the primary; a commit makes the client's reads sticky to the primary for a while"""
+    async with AsyncSessionLocal() as db:
+        db.info["client_key"] = request_client_key(request)
+        yield db
+
+
+async def get_async_read_db(request: Request):
+    """AsyncSession for read-only routes, routed like get_read_db"""
+    if read_router.checkDue():
+        # The replica lag probe uses the sync engine, so it must not run on the event loop
+        await run_in_threadpool(read_router.replicaHealthy)
+    if read_router.route(request_client_key(request), recheck=False) == PRIMARY:
+        factory = AsyncSessionLocal
+    else:
+        factory = AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
@@ -0,0 +1,24 @@
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    Integer,
+    String,
+    TIMESTAMP,
+    func,
+)
+from .base import Base
+
+
+class M_ImageBlob(Base):
+    """Content-addressed image file under static/media, counted by the laptops whose product_images list it"""
+
+    __tablename__ = "image_blobs"
+
+    # Map camelCase attributes to snake_case database columns
+    digest = Column("digest", String(64), primary_key=True)
+    extension = Column("extension", String(8), nullable=False)
+    byteSize = Column("byte_size", BigInteger, nullable=False)
+    refCount = Column("ref_count", Integer, nullable=False, default=0)
+    createdAt = Column("created_at", TIMESTAMP, server_default=func.now())
+    # Last time refCount changed; unreferenced blobs are collected after a grace period
+    updatedAt = Column("updated_at", TIMESTAMP, server_default=func.now())
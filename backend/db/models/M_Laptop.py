@@ -6,11 +6,22 @@ from sqlalchemy import (
     TIMESTAMP,
     func,
     Boolean,
+    Computed,
+    Index,
+    text,
 )
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import JSON
+import json
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import JSON, TSVECTOR
 from .base import Base
 
+# Weighted document for the Postgres search fallback: brand/sub-brand (A), name (B), cpu/vga (C)
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(brand, '') || ' ' || coalesce(sub_brand, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(name, '')), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(cpu, '') || ' ' || coalesce(vga, '')), 'C')"
+)
+
 
 class M_Laptop(Base):
     __tablename__ = "laptops"
@@ -24,6 +35,7 @@ class M_Laptop(Base):
     specSummary = Column("description", String, nullable=False)
     isActive = Column("is_active", Boolean, default=True, nullable=True)
     updatedAt = Column("inserted_at", TIMESTAMP, server_default=func.now())
+    modifiedAt = Column("updated_at", TIMESTAMP, server_default=func.now())
 
     # Additional detailed specifications
     subBrand = Column("sub_brand", String)
@@ -53,15 +65,79 @@ class M_Laptop(Base):
     numberEthernetPorts = Column("number_ethernet_ports", Integer)
     numberAudioJacks = Column("number_audio_jacks", Integer)
     productImages = Column("product_images", JSON)
+    # product image URL -> {"thumbnail", "webp", "jpeg"} URLs written by services/image_pipeline.py
+    imageVariants = Column("image_variants", JSON)
     originalPrice = Column("original_price", Integer, nullable=False)
     rate = Column("rate", DECIMAL(3, 2))
     numRate = Column("num_rate", Integer)
 
+    # Generated by Postgres (commands/search_fallback.sql), never loaded unless asked for
+    searchVector = deferred(Column("search_vector", TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
     # Relationships
     reviews = relationship("M_Review", back_populates="laptop", cascade="all, delete-orphan")
     cartItems = relationship("M_CartItem", back_populates="laptop", cascade="all, delete-orphan")
     orderItems = relationship("M_OrderItem", back_populates="laptop")
 
+    __table_args__ = (
+        # Active catalog by id (listings, cursor pages, the catalog snapshot); soft-deleted rows stay out.
+        # The predicate matches both filters in use: "is_active = true" and "is_active = true OR is_active IS NULL"
+        Index("ix_laptops_active", "id", postgresql_where=text("is_active = true OR is_active IS NULL")),
+    )
+
+    # API field name -> model attribute (API names match the Elasticsearch document)
+    API_FIELDS = {
+        "id": "laptopId",
+        "brand": "brand",
+        "name": "modelName",
+        "description": "specSummary",
+        "product_images": "productImages",
+        "image_variants": "imageVariants",
+        "sale_price": "price",
+        "quantity": "stockQty",
+        "sub_brand": "subBrand",
+        "usage_type": "usageType",
+        "cpu": "cpu",
+        "vga": "vga",
+        "ram_amount": "ramAmount",
+        "ram_type": "ramType",
+        "storage_amount": "storageAmount",
+        "storage_type": "storageType",
+        "webcam_resolution": "webcamResolution",
+        "screen_size": "screenSize",
+        "screen_resolution": "screenResolution",
+        "screen_refresh_rate": "screenRefreshRate",
+        "screen_brightness": "screenBrightness",
+        "battery_capacity": "batteryCapacity",
+        "battery_cells": "batteryCells",
+        "weight": "weight",
+        "default_os": "defaultOs",
+        "warranty": "warranty",
+        "width": "width",
+        "depth": "depth",
+        "height": "height",
+        "number_usb_a_ports": "numberUsbAPorts",
+        "number_usb_c_ports": "numberUsbCPorts",
+        "number_hdmi_ports": "numberHdmiPorts",
+        "number_ethernet_ports": "numberEthernetPorts",
+        "number_audio_jacks": "numberAudioJacks",
+        "original_price": "originalPrice",
+        "rate": "rate",
+        "num_rate": "numRate",
+        "is_active": "isActive",
+        "inserted_at": "updatedAt",
+        "updated_at": "modifiedAt",
+    }
+
+    # Projection profiles: the fields each kind of catalog response needs
+    CARD_FIELDS = (
+        "id", "brand", "sub_brand", "name", "product_images", "image_variants", "sale_price",
+        "original_price", "quantity", "rate", "num_rate",
+    )
+    DETAIL_FIELDS = tuple(f for f in API_FIELDS if f not in ("is_active", "inserted_at", "updated_at"))
+    ADMIN_FIELDS = tuple(API_FIELDS)
+    PROJECTION_PROFILES = {"card": CARD_FIELDS, "detail": DETAIL_FIELDS, "admin": ADMIN_FIELDS}
+
     def isInStock(self) -> bool:
         """Check if the laptop is in stock"""
         return self.stockQty > 0
@@ -75,3 +151,24 @@ class M_Laptop(Base):
     def changePrice(self, newPrice: float) -> None:
         """Update the laptop price"""
         self.price = int(newPrice)
+
+    @classmethod
+    def projectionFields(cls, profile: str) -> tuple:
+        """API fields for a projection profile (card, detail or admin)"""
+        return cls.PROJECTION_PROFILES[profile]
+
+    @classmethod
+    def projectionColumns(cls, profile: str) -> list:
+        """Model columns to load_only for a projection profile"""
+        return [getattr(cls, cls.API_FIELDS[f]) for f in cls.projectionFields(profile)]
+
+    def toDict(self, fields: tuple) -> dict:
+        """Serialize the given API fields, with product_images as a list and image_variants as an object"""
+        data = {f: getattr(self, self.API_FIELDS[f]) for f in fields}
+        if "product_images" in data:
+            images = data["product_images"]
+            data["product_images"] = json.loads(images) if isinstance(images, str) else images or []
+        if "image_variants" in data:
+            variants = data["image_variants"]
+            data["image_variants"] = json.loads(variants) if isinstance(variants, str) else variants or {}
+        return data
@@ -6,7 +6,9 @@ from sqlalchemy import (
     DECIMAL,
     TIMESTAMP,
     func,
+    text,
     Text,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -17,11 +19,11 @@ class M_Order(Base):
 
     # Map camelCase attributes to snake_case database columns
     orderId = Column("id", Integer, primary_key=True, index=True, autoincrement=True)
-    userId = Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    userId = Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     shippingAddress = Column("shipping_address", Text, nullable=True)
     totalAmount = Column("total_price", DECIMAL(10, 2), nullable=False)
     status = Column("status", String(50), nullable=False, default="pending")
-    createdAt = Column("created_at", TIMESTAMP(timezone=True), server_default=func.now())
+    createdAt = Column("created_at", TIMESTAMP(timezone=True), server_default=func.now(), index=True)
     updatedAt = Column("updated_at", TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Additional fields
@@ -37,6 +39,13 @@ class M_Order(Base):
     paymentTransactions = relationship("M_PaymentTransaction", back_populates="order", cascade="all, delete-orphan")
     refundTickets = relationship("M_RefundTicket", back_populates="order")
 
+    __table_args__ = (
+        # Legacy sample orders have no user
+        Index("idx_orders_user_id", "user_id", postgresql_where=text("user_id IS NOT NULL")),
+        # Admin order list filtered by status, newest first
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
+
     def updateStatus(self, newStatus: str, updatedBy: int) -> None:
         """Update order status with validation"""
         valid_statuses = ["pending", "paid", "shipped", "delivered", "cancelled"]
@@ -54,7 +63,7 @@ class M_OrderItem(Base):
 
     # Map camelCase attributes to snake_case database columns
     orderItemId = Column("id", Integer, primary_key=True, index=True, autoincrement=True)
-    orderId = Column("order_id", Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    orderId = Column("order_id", Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
     laptopId = Column("product_id", Integer, ForeignKey("laptops.id", ondelete="RESTRICT"), nullable=False)
     quantity = Column("quantity", Integer, nullable=False)
     unitPrice = Column("price_at_purchase", DECIMAL(10, 2), nullable=False)
@@ -51,6 +51,7 @@ class M_RefundTicket(Base):
             name="check_status_valid_values",
         ),
         Index("ix_refund_email_phone", "email", "phone_number", postgresql_using="btree"),
+        Index("ix_refund_tickets_status_created_at", "status", "created_at"),
     )
 
     def approve(self, adminId: int, comments: str) -> None:
@@ -4,6 +4,9 @@ from sqlalchemy import (
     Integer,
     String,
     DateTime,
+    Index,
+    func,
+    text,
 )
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -16,14 +19,20 @@ class M_Review(Base):
     reviewId = Column("id", Integer, primary_key=True, autoincrement=True)
     rating = Column("rating", Integer, nullable=False)
     comment = Column("review_text", String, nullable=True)
-    userId = Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    laptopId = Column("laptop_id", Integer, ForeignKey("laptops.id", ondelete="CASCADE"), nullable=False)
+    userId = Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    laptopId = Column("laptop_id", Integer, ForeignKey("laptops.id", ondelete="CASCADE"), nullable=False, index=True)
     createdAt = Column("created_at", DateTime, nullable=False)
+    updatedAt = Column("updated_at", DateTime, server_default=func.now())
 
     # Relationships
     user = relationship("M_User", back_populates="reviews")
     laptop = relationship("M_Laptop", back_populates="reviews")
 
+    __table_args__ = (
+        # Legacy sample reviews have no user
+        Index("idx_reviews_user_id", "user_id", postgresql_where=text("user_id IS NOT NULL")),
+    )
+
     def validate(self) -> bool:
         """Validate review data"""
         if self.rating < 1 or self.rating > 5:
@@ -0,0 +1,54 @@
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    Integer,
+    String,
+    Text,
+    TIMESTAMP,
+    func,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from .base import Base
+
+
+class M_SearchOutbox(Base):
+    """Laptop change waiting to be applied to Elasticsearch (filled by a trigger on laptops)"""
+
+    __tablename__ = "search_outbox"
+
+    # Map camelCase attributes to snake_case database columns
+    outboxId = Column("id", BigInteger, primary_key=True)
+    laptopId = Column("laptop_id", Integer, nullable=False, index=True)
+    operation = Column("operation", String(10), nullable=False)  # index, update or delete
+    changedFields = Column("changed_fields", ARRAY(Text), nullable=True)  # None means the whole document
+    attempts = Column("attempts", Integer, nullable=False, default=0)
+    lastError = Column("last_error", Text, nullable=True)
+    createdAt = Column("created_at", TIMESTAMP, server_default=func.now())
+
+
+class M_SearchDeadLetter(Base):
+    """Outbox entry that could not be applied after the maximum number of attempts"""
+
+    __tablename__ = "search_dead_letters"
+
+    deadLetterId = Column("id", BigInteger, primary_key=True)
+    outboxId = Column("outbox_id", BigInteger, nullable=False)
+    laptopId = Column("laptop_id", Integer, nullable=False)
+    operation = Column("operation", String(10), nullable=False)
+    changedFields = Column("changed_fields", ARRAY(Text), nullable=True)
+    attempts = Column("attempts", Integer, nullable=False)
+    error = Column("error", Text, nullable=True)
+    createdAt = Column("created_at", TIMESTAMP, nullable=True)
+    failedAt = Column("failed_at", TIMESTAMP, server_default=func.now())
+
+    @classmethod
+    def fromOutbox(cls, entry: M_SearchOutbox) -> "M_SearchDeadLetter":
+        return cls(
+            outboxId=entry.outboxId,
+            laptopId=entry.laptopId,
+            operation=entry.operation,
+            changedFields=entry.changedFields,
+            attempts=entry.attempts,
+            error=entry.lastError,
+            createdAt=entry.createdAt,
+        )
@@ -9,6 +9,8 @@ from .M_Cart import M_Cart, M_CartItem
 from .M_Order import M_Order, M_OrderItem
 from .M_PaymentTransaction import M_PaymentTransaction
 from .M_RefundTicket import M_RefundTicket, RefundStatus
+from .M_SearchOutbox import M_SearchOutbox, M_SearchDeadLetter
+from .M_ImageBlob import M_ImageBlob
 
 # Export all models
 __all__ = [
@@ -24,4 +26,7 @@ __all__ = [
     "M_PaymentTransaction",
     "M_RefundTicket",
     "RefundStatus",
+    "M_SearchOutbox",
+    "M_SearchDeadLetter",
+    "M_ImageBlob",
 ]
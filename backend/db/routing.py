@@ -0,0 +1,131 @@
+"""
+Read Routing
+Decides whether a read-only request is served by the replica or the primary
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import Optional
+from cachetools import TTLCache
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Routing configurations: keep DB_REPLICA_MAX_LAG below DB_READ_STICKY_SECONDS, so a client
+# that is no longer sticky reads from a replica that has replayed its writes
+DB_READ_STICKY_SECONDS = float(os.getenv("DB_READ_STICKY_SECONDS", "5"))
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "2"))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+# Clients tracked as sticky at once (per worker); the oldest are dropped first
+DB_STICKY_CLIENTS = 100000
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+# (replay timestamps stop moving while the primary is idle, so they alone overstate lag)
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def client_key(authorization: Optional[str], host: Optional[str]) -> str:
+    """Stickiness key for a request: its bearer token (one login session), else its address"""
+    source = authorization or f"host:{host or ''}"
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+class ReadRouter:
+    """
+    Routing policy for get_read_db.
+
+    Reads go to the replica unless one of these sends them to the primary:
+    no replica is configured; the client committed a write on the primary in
+    the last DB_READ_STICKY_SECONDS (read-your-writes); or the replica is
+    behind by more than DB_REPLICA_MAX_LAG or unreachable. The lag is checked
+    at most every DB_REPLICA_CHECK_INTERVAL seconds, by whichever request
+    needs it first; the replica is not used until a check has passed.
+
+    Stickiness is remembered per worker process, so a client whose requests
+    are spread across workers is only covered by the lag bound.
+    """
+
+    def __init__(self, replica: Optional[Engine], stickySeconds: float = DB_READ_STICKY_SECONDS,
+                 maxLag: float = DB_REPLICA_MAX_LAG, interval: float = DB_REPLICA_CHECK_INTERVAL):
+        self.replica = replica
+        self.maxLag = maxLag
+        self.interval = interval
+        self._sticky = TTLCache(maxsize=DB_STICKY_CLIENTS, ttl=stickySeconds)
+        self._stickyLock = threading.Lock()
+        self._checkLock = threading.Lock()
+        self._healthy = False
+        self._checkedAt = float("-inf")
+        self.lag: Optional[float] = None
+        self.routed = {REPLICA: 0, "no_replica": 0, "sticky": 0, "lagging": 0}
+
+    def recordWrite(self, key: str) -> None:
+        """Pin a client's reads to the primary after it committed a write"""
+        with self._stickyLock:
+            self._sticky[key] = True
+
+    def isSticky(self, key: str) -> bool:
+        with self._stickyLock:
+            return key in self._sticky
+
+    def _checkReplica(self) -> None:
+        try:
+            with self.replica.connect() as conn:
+                lag = float(conn.execute(text(REPLICA_LAG_SQL)).scalar()) \
+                    if self.replica.dialect.name == "postgresql" else 0.0
+            healthy = lag <= self.maxLag
+            if self._healthy and not healthy:
+                logger.warning(f"Replica is {lag:.1f}s behind, reading from the primary")
+        except Exception as e:
+            lag, healthy = None, False
+            if self._healthy:
+                logger.warning(f"Replica unavailable, reading from the primary: {str(e)}")
+        self.lag, self._healthy = lag, healthy
+
+    def checkDue(self) -> bool:
+        """Whether the next replicaHealthy() call will query the replica (async callers run it in the threadpool)"""
+        return self.replica is not None and time.monotonic() - self._checkedAt >= self.interval
+
+    def replicaHealthy(self) -> bool:
+        """Replica lag within bounds, rechecked every interval (other threads keep the last answer meanwhile)"""
+        if time.monotonic() - self._checkedAt >= self.interval and self._checkLock.acquire(blocking=False):
+            try:
+                if time.monotonic() - self._checkedAt >= self.interval:
+                    self._checkReplica()
+                    self._checkedAt = time.monotonic()
+            finally:
+                self._checkLock.release()
+        return self._healthy
+
+    def route(self, key: str, recheck: bool = True) -> str:
+        """PRIMARY or REPLICA for a read by this client (recheck=False: never query the replica here)"""
+        if self.replica is None:
+            reason = "no_replica"
+        elif self.isSticky(key):
+            reason = "sticky"
+        elif not (self.replicaHealthy() if recheck else self._healthy):
+            reason = "lagging"
+        else:
+            reason = REPLICA
+        self.routed[reason] += 1
+        return REPLICA if reason == REPLICA else PRIMARY
+
+    def stats(self) -> dict:
+        return {
+            "replica_configured": self.replica is not None,
+            "replica_healthy": self._healthy,
+            "replica_lag_seconds": self.lag,
+            "sticky_clients": len(self._sticky),
+            "routed": dict(self.routed),
+        }
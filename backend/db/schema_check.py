@@ -0,0 +1,140 @@
+"""
+Schema Check
+Compares the live database schema with the db/models metadata
+"""
+import re
+from typing import NamedTuple, Optional
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Connection
+
+# Indexes left behind by a failed CREATE INDEX CONCURRENTLY: they exist but serve no query
+INVALID_INDEXES_SQL = """
+SELECT c.relname
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE NOT i.indisvalid AND n.nspname = current_schema()
+"""
+
+# Casts Postgres adds when it prints a predicate back
+PREDICATE_CASTS = re.compile(r"::(?:character varying|text|boolean|integer|bigint)")
+
+
+class IndexSpec(NamedTuple):
+    table: str
+    name: Optional[str]
+    columns: tuple
+    unique: bool
+    where: Optional[str]
+    constraint: bool = False  # primary key or unique constraint rather than an index
+
+    @property
+    def signature(self) -> tuple:
+        return self.table, self.columns, self.where
+
+
+def normalize_predicate(predicate) -> Optional[str]:
+    """Partial index predicate in a form that compares equal however it was written or printed"""
+    if predicate is None:
+        return None
+    normalized = PREDICATE_CASTS.sub("", str(predicate).lower())
+    return re.sub(r"[\s()]", "", normalized) or None
+
+
+def model_indexes(metadata: MetaData, dialectName: str) -> list:
+    """Indexes the models declare (index=True columns and Index() entries)"""
+    indexes = []
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            where = index.dialect_options[dialectName]["where"] if dialectName in index.dialect_options else None
+            indexes.append(IndexSpec(
+                table.name, index.name, tuple(column.name for column in index.columns), bool(index.unique),
+                normalize_predicate(where),
+            ))
+    return indexes
+
+
+def live_indexes(conn: Connection, tables: list) -> tuple:
+    """
+    (valid, invalid) indexes of the given tables in the live database.
+    Primary keys and unique constraints count as unique indexes, since that is how they are built.
+    """
+    inspector = inspect(conn)
+    invalidNames = set()
+    if conn.dialect.name == "postgresql":
+        invalidNames = {row[0] for row in conn.execute(text(INVALID_INDEXES_SQL))}
+
+    valid, invalid = [], []
+    for table in tables:
+        primaryKey = inspector.get_pk_constraint(table)
+        if primaryKey.get("constrained_columns"):
+            valid.append(IndexSpec(table, primaryKey.get("name"), tuple(primaryKey["constrained_columns"]), True, None, True))
+        for constraint in inspector.get_unique_constraints(table):
+            valid.append(IndexSpec(table, constraint["name"], tuple(constraint["column_names"]), True, None, True))
+        for index in inspector.get_indexes(table):
+            if "duplicates_constraint" in index:
+                continue
+            # Expression indexes (e.g. the trigram ones) report their expressions instead of columns
+            columns = tuple(index.get("expressions") or index["column_names"])
+            where = index.get("dialect_options", {}).get(f"{conn.dialect.name}_where")
+            spec = IndexSpec(table, index["name"], columns, bool(index["unique"]), normalize_predicate(where))
+            (invalid if index["name"] in invalidNames else valid).append(spec)
+    return valid, invalid
+
+
+def _satisfies(live: IndexSpec, wanted: IndexSpec) -> bool:
+    """A live index serves a model index with the same predicate on the same columns, or on more columns
+    that start with them (a b-tree on (a, b, c) serves (a, b)); a unique one needs the exact columns"""
+    if live.table != wanted.table or live.where != wanted.where:
+        return False
+    if wanted.unique:
+        return live.unique and live.columns == wanted.columns
+    return live.columns[:len(wanted.columns)] == wanted.columns
+
+
+def covered_model_indexes(conn: Connection, metadata: MetaData) -> set:
+    """Names of model indexes the live schema already has, possibly under another name"""
+    existing = set(inspect(conn).get_table_names())
+    wanted = [spec for spec in model_indexes(metadata, conn.dialect.name) if spec.table in existing]
+    valid, _ = live_indexes(conn, sorted({spec.table for spec in wanted}))
+    return {spec.name for spec in wanted if any(_satisfies(live, spec) for live in valid)}
+
+
+def compare_schema(conn: Connection, metadata: MetaData) -> dict:
+    """
+    Differences between the live schema and the models.
+
+    Indexes are matched by table, columns and predicate rather than by name,
+    since create_table.sql names them idx_* and the models ix_* (see
+    _satisfies for what counts as a match). missing_*
+    and invalid_indexes mean queries will run without what the models
+    expect; extra_indexes are live indexes no model declares (the search
+    fallback indexes, for instance) and are informational.
+    """
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+
+    missingTables = [table.name for table in metadata.sorted_tables if table.name not in existing]
+    missingColumns = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        liveColumns = {column["name"] for column in inspector.get_columns(table.name)}
+        missingColumns += [f"{table.name}.{column.name}" for column in table.columns if column.name not in liveColumns]
+
+    tables = [table.name for table in metadata.sorted_tables if table.name in existing]
+    valid, invalid = live_indexes(conn, tables)
+    wanted = [spec for spec in model_indexes(metadata, conn.dialect.name) if spec.table in existing]
+    missingIndexes = [spec for spec in wanted if not any(_satisfies(live, spec) for live in valid)]
+    extraIndexes = [
+        live for live in valid
+        if not live.constraint and not any(live.signature == spec.signature for spec in wanted)
+    ]
+
+    return {
+        "missing_tables": missingTables,
+        "missing_columns": missingColumns,
+        "missing_indexes": missingIndexes,
+        "invalid_indexes": invalid,
+        "extra_indexes": extraIndexes,
+    }
@@ -1,15 +1,299 @@
-from sqlalchemy import create_engine
+"""
+Database Session
+Engine factory configured from the environment, with connection pool metrics
+"""
+import os
+import time
+import logging
+import threading
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from db.models import Base
+from db.routing import PRIMARY, ReadRouter, client_key
 
-DATABASE_URL = "postgresql://postgres:postgres@db/postgres"
-engine = create_engine(DATABASE_URL)
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Connection configurations (DATABASE_URL wins over the PG* variables the entrypoint uses)
+DATABASE_URL = os.getenv("DATABASE_URL") or URL.create(
+    "postgresql",
+    username=os.getenv("PGUSER", "postgres"),
+    password=os.getenv("PGPASSWORD", "postgres"),
+    host=os.getenv("PGHOST", "db"),
+    port=int(os.getenv("PGPORT", "5432")),
+    database=os.getenv("PGDATABASE", "postgres"),
+)
+# Replica for get_read_db (a streaming standby, or any copy of the schema locally); unset reads the primary
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL") or None
+
+# Pool configurations (per worker process: size them so that
+# WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) + other clients stays under max_connections)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "laptopshop-backend")
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Upper bounds (ms) of the checkout wait histogram; the last bucket is open-ended
+CHECKOUT_WAIT_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """
+    Connection pool counters for one engine, fed by SQLAlchemy pool events.
+
+    in_use and overflow are what this worker holds right now; the peaks and
+    the checkout wait histogram show how close the pool came to its limit
+    since startup. Multiply capacity by the number of workers to compare
+    against Postgres max_connections.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pool = None
+        self.maxOverflow = 0
+        self.inUse = 0
+        self.peakInUse = 0
+        self.peakOverflow = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.waitTotal = 0.0
+        self.waitMax = 0.0
+        self.waitBuckets = [0] * (len(CHECKOUT_WAIT_BUCKETS) + 1)
+
+    def attach(self, engine: Engine) -> None:
+        self.pool = engine.pool
+        event.listen(engine, "engine_disposed", self._onDisposed)
+        event.listen(engine.pool, "connect", self._onConnect)
+        event.listen(engine.pool, "checkout", self._onCheckout)
+        event.listen(engine.pool, "checkin", self._onCheckin)
+        event.listen(engine.pool, "invalidate", self._onInvalidate)
+
+    def _onDisposed(self, engine) -> None:
+        # dispose() swaps in a fresh pool; the events carry over, the pool reference doesn't
+        self.pool = engine.pool
+
+    def _onConnect(self, dbapiConnection, record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _onCheckout(self, dbapiConnection, record, proxy) -> None:
+        overflow = self.pool.overflow() if isinstance(self.pool, QueuePool) else 0
+        with self._lock:
+            self.inUse += 1
+            self.checkouts += 1
+            self.peakInUse = max(self.peakInUse, self.inUse)
+            self.peakOverflow = max(self.peakOverflow, overflow)
+
+    def _onCheckin(self, dbapiConnection, record) -> None:
+        with self._lock:
+            self.inUse = max(self.inUse - 1, 0)
+
+    def _onInvalidate(self, dbapiConnection, record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def recordWait(self, seconds: float, timedOut: bool = False) -> None:
+        """Time a caller spent getting a connection from the pool (see MeteredQueuePool)"""
+        ms = seconds * 1000
+        bucket = next((i for i, bound in enumerate(CHECKOUT_WAIT_BUCKETS) if ms <= bound), len(CHECKOUT_WAIT_BUCKETS))
+        with self._lock:
+            self.waitTotal += ms
+            self.waitMax = max(self.waitMax, ms)
+            self.waitBuckets[bucket] += 1
+            if timedOut:
+                self.timeouts += 1
+
+    def stats(self) -> dict:
+        pool = self.pool
+        queued = isinstance(pool, QueuePool)
+        capacity = pool.size() + self.maxOverflow if queued else None
+        with self._lock:
+            waits = sum(self.waitBuckets)
+            return {
+                "pool_size": pool.size() if queued else None,
+                "max_overflow": self.maxOverflow if queued else None,
+                "capacity": capacity,
+                "workers": WEB_CONCURRENCY,
+                "all_workers_capacity": capacity * WEB_CONCURRENCY if queued else None,
+                "idle": pool.checkedin() if queued else None,
+                "in_use": self.inUse,
+                "overflow": max(pool.overflow(), 0) if queued else 0,
+                "peak_in_use": self.peakInUse,
+                "peak_overflow": max(self.peakOverflow, 0),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "checkout_wait_ms": {
+                    "avg": round(self.waitTotal / waits, 3) if waits else 0.0,
+                    "max": round(self.waitMax, 3),
+                    "buckets": {
+                        **{f"le_{bound}": count for bound, count in zip(CHECKOUT_WAIT_BUCKETS, self.waitBuckets)},
+                        "inf": self.waitBuckets[-1],
+                    },
+                },
+            }
+
+
+class _MeteredPool:
+    """Times each checkout: pool events fire only once a connection is handed out"""
+
+    metrics: PoolMetrics = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.recordWait(time.perf_counter() - started, timedOut=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.recordWait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options() -> dict:
+    """DB_* pool settings, shared by the sync and async engines"""
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def server_settings(applicationName: str, statementTimeoutMs: int, readOnly: bool) -> dict:
+    """Session parameters every connection starts with"""
+    settings = {"application_name": applicationName}
+    if statementTimeoutMs > 0:
+        settings["statement_timeout"] = str(statementTimeoutMs)
+    if readOnly:
+        settings["default_transaction_read_only"] = "on"
+    return settings
+
+
+def meter_engine(newEngine: Engine, maxOverflow: int) -> PoolMetrics:
+    """Attach PoolMetrics to an engine (the sync_engine of an async one)"""
+    metrics = PoolMetrics()
+    metrics.maxOverflow = maxOverflow
+    metrics.attach(newEngine)
+    if isinstance(newEngine.pool, _MeteredPool):
+        newEngine.pool.metrics = metrics
+    newEngine.info = {"pool_metrics": metrics}
+    return metrics
+
+
+def create_db_engine(url=DATABASE_URL, applicationName: str = DB_APPLICATION_NAME,
+                     statementTimeoutMs: int = DB_STATEMENT_TIMEOUT_MS, readOnly: bool = False,
+                     **overrides) -> Engine:
+    """
+    Engine with the DB_* pool settings, statement_timeout and application_name
+    (and default_transaction_read_only when readOnly).
+
+    The engine's pool metrics are at engine.info["pool_metrics"]. overrides
+    are passed to create_engine as-is (e.g. pool_size for a one-off script).
+    """
+    options = engine_options()
+    if make_url(url).get_backend_name() == "postgresql":
+        options["poolclass"] = MeteredQueuePool
+        settings = server_settings(applicationName, statementTimeoutMs, readOnly)
+        connectArgs = {"application_name": settings.pop("application_name")}
+        if settings:
+            connectArgs["options"] = " ".join(f"-c {name}={value}" for name, value in settings.items())
+        options["connect_args"] = connectArgs
+    options.update(overrides)
+
+    newEngine = create_engine(url, **options)
+    meter_engine(newEngine, options["max_overflow"])
+    return newEngine
+
+
+def check_pool_capacity(checkEngine: Engine, poolsPerWorker: int = 1) -> None:
+    """Warn when every worker's full pools would not fit in Postgres max_connections (blocking)"""
+    if checkEngine.dialect.name != "postgresql":
+        return
+    total = WEB_CONCURRENCY * poolsPerWorker * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    with checkEngine.connect() as conn:
+        maxConnections = int(conn.execute(text("SHOW max_connections")).scalar())
+    if total > maxConnections:
+        logger.warning(
+            f"Database pools can open {total} connections ({WEB_CONCURRENCY} workers x {poolsPerWorker} pools "
+            f"x {DB_POOL_SIZE}+{DB_MAX_OVERFLOW}) but max_connections is {maxConnections}"
+        )
+    else:
+        logger.info(f"Database pools: up to {total} of {maxConnections} connections")
+
+
+engine = create_db_engine()
+pool_metrics: PoolMetrics = engine.info["pool_metrics"]
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+read_engine: Optional[Engine] = create_db_engine(
+    READ_DATABASE_URL, applicationName=f"{DB_APPLICATION_NAME}-read", readOnly=True
+) if READ_DATABASE_URL else None
+read_pool_metrics: Optional[PoolMetrics] = read_engine.info["pool_metrics"] if read_engine is not None else None
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine or engine)
 
-def get_db():
+# Shared routing policy for get_read_db
+read_router = ReadRouter(read_engine)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _stick_to_primary(session) -> None:
+    # Recorded at commit, before the response goes out, so the client's next read already sees it
+    key = session.info.get("client_key")
+    if key is not None:
+        read_router.recordWrite(key)
+
+
+def request_client_key(request: Request) -> str:
+    return client_key(request.headers.get("authorization"), request.client.host if request.client else None)
+
+
+def get_db(request: Request):
+    """Session on the primary; a commit makes the client's reads sticky to the primary for a while"""
     db = SessionLocal()
+    db.info["client_key"] = request_client_key(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request):
+    """Session for read-only routes: the replica, or the primary when read_router says so"""
+    if read_router.route(request_client_key(request)) == PRIMARY:
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
     try:
         yield db
     finally:
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 
 from dotenv import load_dotenv
@@ -5,13 +6,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from db.models import *
-from db.session import *
+from db.session import check_pool_capacity, engine, read_engine
 from schemas.laptops import *
 from schemas.orders import *
 from schemas.refund_tickets import *
 from schemas.reviews import *
 
-from fastapi.staticfiles import StaticFiles
 
 from routes.laptops import laptops_router
 from routes.reviews import reviews_router
@@ -21,8 +21,64 @@ from routes.accounts import accounts_router
 from routes.refund_tickets import refund_tickets_router
 from routes.analytics import analytics_router
 from routes.payments import payments_router
+from routes.images import images_router
+from services.search import startup_search_client, shutdown_search_client, get_sync_search_client
+from services.search_index import ensure_laptops_index
+from services.catalog_engine import catalog_engine
+from services.suggest import suggestion_service
+from services.image_pipeline import image_pipeline
+from services.image_store import MEDIA_DIR, ImmutableStaticFiles
+from services.image_resize import image_resizer
+from services.temp_uploads import temp_upload_sweeper
+from services.placeholder_images import LazyStaticFiles, placeholder_images
+from db.async_session import async_engine, async_read_engine
+from fastapi.concurrency import run_in_threadpool
+import os
+import logging
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warn when the per-worker pools (sync and async) add up to more than Postgres max_connections
+    try:
+        await run_in_threadpool(check_pool_capacity, engine, 2)
+    except Exception as e:
+        logger.warning(f"Could not check database pool capacity: {str(e)}")
+    # Open the pooled Elasticsearch client once per worker and close it on shutdown
+    await startup_search_client()
+    # Create the managed laptops index if missing and check its mapping version
+    try:
+        await run_in_threadpool(ensure_laptops_index, get_sync_search_client())
+    except Exception as e:
+        logger.warning(f"Could not verify Elasticsearch index: {str(e)}")
+    # Build the columnar catalog snapshot in the background and keep it refreshed
+    await catalog_engine.start()
+    # Autocomplete prefix index, rebuilt periodically in the background
+    await suggestion_service.start()
+    # Worker processes for upload watermarking and image variants
+    image_pipeline.start()
+    # Worker processes and disk cache for on-demand /img renditions
+    await run_in_threadpool(image_resizer.start)
+    # Removes temp uploads that were never attached to a laptop
+    await temp_upload_sweeper.start()
+    yield
+    await temp_upload_sweeper.stop()
+    await run_in_threadpool(image_resizer.stop)
+    await run_in_threadpool(image_pipeline.stop)
+    await suggestion_service.stop()
+    await catalog_engine.stop()
+    await shutdown_search_client()
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
+    await run_in_threadpool(engine.dispose)
+    if read_engine is not None:
+        await run_in_threadpool(read_engine.dispose)
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(laptops_router, tags=["laptops"])
 app.include_router(reviews_router, tags=["reviews"])
 app.include_router(cart_router, tags=["cart"])
@@ -31,6 +87,7 @@ app.include_router(accounts_router, tags=["accounts"])
 app.include_router(refund_tickets_router, tags=["refund_tickets"])
 app.include_router(analytics_router, tags=["analytics"])
 app.include_router(payments_router, tags=["payments"])
+app.include_router(images_router, tags=["images"])
 security = HTTPBearer()
 
 
@@ -47,9 +104,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Content-addressed product images: mounted ahead of /static so they are served as immutable
+os.makedirs(MEDIA_DIR, exist_ok=True)
+app.mount("/static/media", ImmutableStaticFiles(directory=MEDIA_DIR), name="media")
+# Sample laptop and post images are rendered on first request (see services/placeholder_images.py)
+app.mount("/static", LazyStaticFiles(directory="static", placeholders=placeholder_images), name="static")
 
 
 @app.get("/secure")
@@ -0,0 +1,67 @@
+"""
+Alembic environment: migrates DATABASE_URL (or the PG* variables) to db/models.
+
+Autogenerate compares against Base.metadata. Indexes are matched like
+commands/check_schema.py does, by columns rather than name, so it neither
+recreates the idx_* indexes create_table.sql made under the models' ix_*
+names nor drops live indexes no model declares (the search fallback ones).
+"""
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy.engine import make_url
+from db.models import Base
+from db.schema_check import covered_model_indexes
+from db.session import DATABASE_URL, DB_APPLICATION_NAME, create_db_engine
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(covered: set):
+    def include(obj, name, type_, reflected, compare_to):
+        if type_ == "index" and compare_to is None:
+            return not reflected and name not in covered
+        return True
+    return include
+
+
+def run_migrations_offline() -> None:
+    """Print the SQL instead of running it (alembic upgrade head --sql)"""
+    context.configure(
+        url=make_url(DATABASE_URL).render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # No statement_timeout: index builds on big tables outlast the API's limit
+    migrationEngine = create_db_engine(
+        applicationName=f"{DB_APPLICATION_NAME}-migrations", statementTimeoutMs=0, pool_size=1, max_overflow=0
+    )
+    try:
+        with migrationEngine.connect() as connection:
+            covered = covered_model_indexes(connection, target_metadata)
+            # End the inspection's implicit transaction so the migrations run (and commit) in their own
+            connection.commit()
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                include_object=include_object(covered),
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        migrationEngine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,114 @@
+"""Search sync outbox, dead letters and the laptop change trigger
+
+Revision ID: 6a1a595dae7d
+Revises: e4699015a875
+Create Date: 2026-10-18 09:12:41.205318
+
+Every laptop insert, update and delete is queued in search_outbox in the
+same transaction, and commands/search_sync_worker.py applies the queue to
+Elasticsearch. Idempotent: databases created while these objects lived in
+create_table.sql already have them, and the trigger is dropped and recreated.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6a1a595dae7d'
+down_revision = 'e4699015a875'
+branch_labels = None
+depends_on = None
+
+SEARCH_OUTBOX_SQL = """
+CREATE TABLE IF NOT EXISTS search_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    laptop_id INTEGER NOT NULL,
+    operation VARCHAR(10) NOT NULL,
+    changed_fields TEXT[],  -- Changed columns for partial updates, NULL for the whole document
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT check_outbox_operation CHECK (operation IN ('index', 'update', 'delete'))
+)
+"""
+
+# Outbox entries that kept failing after SEARCH_SYNC_MAX_ATTEMPTS
+SEARCH_DEAD_LETTERS_SQL = """
+CREATE TABLE IF NOT EXISTS search_dead_letters (
+    id BIGSERIAL PRIMARY KEY,
+    outbox_id BIGINT NOT NULL,
+    laptop_id INTEGER NOT NULL,
+    operation VARCHAR(10) NOT NULL,
+    changed_fields TEXT[],
+    attempts INTEGER NOT NULL,
+    error TEXT,
+    created_at TIMESTAMP,  -- When the change was queued
+    failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+ENQUEUE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION enqueue_laptop_search_sync()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed TEXT[];
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO search_outbox (laptop_id, operation) VALUES (OLD.id, 'delete');
+        RETURN OLD;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.is_active IS DISTINCT FROM FALSE THEN
+            INSERT INTO search_outbox (laptop_id, operation) VALUES (NEW.id, 'index');
+        END IF;
+        RETURN NEW;
+    END IF;
+
+    -- Soft delete and restore move the whole document in or out of the index
+    IF NEW.is_active IS FALSE THEN
+        IF OLD.is_active IS DISTINCT FROM FALSE THEN
+            INSERT INTO search_outbox (laptop_id, operation) VALUES (NEW.id, 'delete');
+        END IF;
+        RETURN NEW;
+    END IF;
+    IF OLD.is_active IS FALSE THEN
+        INSERT INTO search_outbox (laptop_id, operation) VALUES (NEW.id, 'index');
+        RETURN NEW;
+    END IF;
+
+    -- Only the columns that actually changed (updated_at alone is not a change)
+    SELECT array_agg(n.key) INTO changed
+    FROM jsonb_each(to_jsonb(NEW)) AS n
+    WHERE n.key <> 'updated_at' AND n.value IS DISTINCT FROM to_jsonb(OLD) -> n.key;
+
+    IF changed IS NOT NULL THEN
+        INSERT INTO search_outbox (laptop_id, operation, changed_fields)
+        VALUES (NEW.id, 'update', array_append(changed, 'updated_at'));
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+ENQUEUE_TRIGGER_SQL = """
+CREATE TRIGGER enqueue_laptop_search_sync_trigger
+AFTER INSERT OR UPDATE OR DELETE ON laptops
+FOR EACH ROW
+EXECUTE FUNCTION enqueue_laptop_search_sync()
+"""
+
+
+def upgrade() -> None:
+    op.execute(SEARCH_OUTBOX_SQL)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_search_outbox_laptop_id ON search_outbox(laptop_id)")
+    op.execute(SEARCH_DEAD_LETTERS_SQL)
+    op.execute(ENQUEUE_FUNCTION_SQL)
+    op.execute("DROP TRIGGER IF EXISTS enqueue_laptop_search_sync_trigger ON laptops")
+    op.execute(ENQUEUE_TRIGGER_SQL)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS enqueue_laptop_search_sync_trigger ON laptops")
+    op.execute("DROP FUNCTION IF EXISTS enqueue_laptop_search_sync()")
+    op.execute("DROP TABLE IF EXISTS search_dead_letters")
+    op.execute("DROP TABLE IF EXISTS search_outbox")
@@ -0,0 +1,58 @@
+"""Add indexes for the hot review, order and catalog queries
+
+Revision ID: 96e045882376
+Revises: b7596eb747ce
+Create Date: 2026-10-17 22:16:17.693500
+
+Indexes the models declare that create_table.sql never built. They are built
+with CREATE INDEX CONCURRENTLY, outside a transaction, so the tables keep
+taking writes while they build; this revision can run against a live
+database. A concurrent build that fails leaves an invalid index behind,
+which is dropped and rebuilt on the next run.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '96e045882376'
+down_revision = 'b7596eb747ce'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, predicate)
+INDEXES = (
+    ("ix_reviews_laptop_id", "reviews", ["laptop_id"], None),
+    ("ix_order_items_order_id", "order_items", ["order_id"], None),
+    ("ix_orders_status_created_at", "orders", ["status", "created_at"], None),
+    ("ix_orders_created_at", "orders", ["created_at"], None),
+    ("ix_refund_tickets_status_created_at", "refund_tickets", ["status", "created_at"], None),
+    ("ix_refund_tickets_user_id", "refund_tickets", ["user_id"], None),
+    ("ix_laptops_active", "laptops", ["id"], "is_active = true OR is_active IS NULL"),
+)
+
+
+def _drop_if_invalid(name: str, table: str) -> None:
+    if context.is_offline_mode() or op.get_bind().dialect.name != "postgresql":
+        return
+    invalid = op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if invalid:
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, predicate in INDEXES:
+            _drop_if_invalid(name, table)
+            op.create_index(
+                name, table, columns, if_not_exists=True, postgresql_concurrently=True,
+                postgresql_where=sa.text(predicate) if predicate else None,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, predicate in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
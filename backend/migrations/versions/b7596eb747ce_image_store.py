@@ -0,0 +1,45 @@
+"""Image variants column and the content-addressed image store
+
+Revision ID: b7596eb747ce
+Revises: 6a1a595dae7d
+Create Date: 2026-10-18 09:20:05.731942
+
+laptops.image_variants holds the resized variants of each product image,
+and image_blobs counts the laptops that reference each file under
+static/media (commands/gc_images.py collects the unreferenced ones).
+Idempotent: databases created while these lived in create_table.sql
+already have them.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7596eb747ce'
+down_revision = '6a1a595dae7d'
+branch_labels = None
+depends_on = None
+
+IMAGE_BLOBS_SQL = """
+CREATE TABLE IF NOT EXISTS image_blobs (
+    digest VARCHAR(64) PRIMARY KEY,
+    extension VARCHAR(8) NOT NULL,
+    byte_size BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE laptops ADD COLUMN IF NOT EXISTS image_variants TEXT")
+    op.execute(IMAGE_BLOBS_SQL)
+    # Candidates for commands/gc_images.py
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_image_blobs_unreferenced ON image_blobs(updated_at) WHERE ref_count <= 0"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS image_blobs")
+    op.execute("ALTER TABLE laptops DROP COLUMN IF EXISTS image_variants")
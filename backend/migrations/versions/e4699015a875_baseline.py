@@ -0,0 +1,29 @@
+"""Baseline: schema created by create_table.sql
+
+Revision ID: e4699015a875
+Revises: 
+Create Date: 2026-10-17 22:16:14.638768
+
+The schema as the first release's commands/create_table.sql built it, which
+every existing database already has and the entrypoint still creates on a
+new one. Everything added to the schema since then (tables, columns,
+triggers, indexes) is a revision after this one, never an edit to
+create_table.sql, since that script only ever runs on an empty database.
+The search fallback objects are the one exception: search_fallback.sql is
+idempotent and the entrypoint runs it on every start.
+"""
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4699015a875'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
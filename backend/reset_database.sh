@@ -6,11 +6,17 @@ python backend/commands/generate_sample_data.py
 # Reset Postgres database
 PGPASSWORD=postgres psql -h db -U postgres -d postgres -f backend/commands/clear_database.sql
 PGPASSWORD=postgres psql -h db -U postgres -d postgres -f backend/commands/create_table.sql
+alembic -c backend/alembic.ini upgrade head
 PGPASSWORD=postgres psql -h db -U postgres -d postgres -f backend/commands/insert_sample_data.sql
+PGPASSWORD=postgres psql -h db -U postgres -d postgres -f backend/commands/search_fallback.sql
+python backend/commands/check_schema.py --quiet
 
 # Reset Elasticsearch index
 curl -X DELETE "http://elasticsearch:9200/_all"
 
+# Rebuild the managed laptops index (mapping + alias) straight from Postgres
+python backend/commands/reindex_laptops.py
+
 # Ensure pg_cron is set up correctly
 PGPASSWORD=postgres psql -h db -U postgres -d postgres -c "DROP EXTENSION IF EXISTS pg_cron CASCADE;"
 PGPASSWORD=postgres psql -h db -U postgres -d postgres -c "CREATE EXTENSION pg_cron;"
\ No newline at end of file
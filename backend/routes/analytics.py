@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from db.session import get_db
+from db.session import get_read_db, pool_metrics, read_pool_metrics, read_router
+from db.async_session import async_pool_metrics, async_read_pool_metrics
 from controllers.C_AnalyticsController import C_AnalyticsController
 from services.auth import get_current_admin_user
 from db.models import M_User
@@ -9,12 +10,24 @@ from datetime import datetime
 analytics_router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
+@analytics_router.get("/db-pool")
+def get_db_pool_metrics(current_user: M_User = Depends(get_current_admin_user)):
+    """Connection pool usage, checkout waits and read routing for this worker (admin only)"""
+    return {
+        "primary": pool_metrics.stats(),
+        "replica": read_pool_metrics.stats() if read_pool_metrics is not None else None,
+        "primary_async": async_pool_metrics.stats(),
+        "replica_async": async_read_pool_metrics.stats() if async_read_pool_metrics is not None else None,
+        "read_routing": read_router.stats(),
+    }
+
+
 @analytics_router.get("/metrics")
 def get_metrics(
     period_start: datetime = Query(..., description="Start of period"),
     period_end: datetime = Query(..., description="End of period"),
     current_user: M_User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get analytics metrics for a specific time period (admin only)"""
     try:
@@ -1,22 +1,23 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import HTTPBearer
 from datetime import datetime
 import json
 
 from schemas.cart import *
 from services.auth import get_current_user_id
-from db.session import get_db
-from controllers.C_CartController import C_CartController
+from services.http_cache import PRIVATE_CACHE_CONTROL, ConditionalGet, conditional_get, version_etag
+from db.async_session import get_async_db
+from controllers.C_AsyncCartController import C_AsyncCartController
 from db.models import M_Cart, M_CartItem
 
 security = HTTPBearer()
 cart_router = APIRouter(prefix="/cart", tags=["cart"])
 
 
-def serialize_cart(cart: M_Cart, db: Session) -> CartResponse:
+def serialize_cart(cart: M_Cart, controller: C_AsyncCartController) -> CartResponse:
     """Helper to serialize cart with current laptop prices"""
-    cart.refreshPrices(db)
+    controller.refreshPrices(cart)
     
     items_response = []
     for item in cart.items:
@@ -45,28 +46,35 @@ def serialize_cart(cart: M_Cart, db: Session) -> CartResponse:
 
 
 @cart_router.post("/add", response_model=CartResponse)
-def add_to_cart(
+async def add_to_cart(
     item: CartItemAdd,
     uid: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add item to cart"""
     try:
-        controller = C_CartController(db)
-        cart = controller.addToCart(uid, item.laptop_id, item.quantity)
-        return serialize_cart(cart, db)
+        controller = C_AsyncCartController(db)
+        cart = await controller.addToCart(uid, item.laptop_id, item.quantity)
+        return serialize_cart(cart, controller)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @cart_router.get("/view", response_model=CartResponse)
-def view_cart(
+async def view_cart(
     uid: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    http_cache: ConditionalGet = Depends(conditional_get(PRIVATE_CACHE_CONTROL, vary="Authorization"))
 ):
-    """Get user's cart"""
-    controller = C_CartController(db)
-    cart = controller.queryCart(uid)
+    """Get user's cart (answers 304 while the cart, its items and their laptops are unchanged)"""
+    controller = C_AsyncCartController(db)
+    version = await controller.getCartVersion(uid)
+    if version:
+        rows, last_modified = version
+        http_cache.check(version_etag("cart", uid, rows), last_modified)
+    else:
+        http_cache.skip()
+    cart = await controller.queryCart(uid)
     
     if not cart:
         # Return empty cart
@@ -77,18 +85,18 @@ def view_cart(
             items=[]
         )
     
-    return serialize_cart(cart, db)
+    return serialize_cart(cart, controller)
 
 
 @cart_router.put("/update", response_model=CartResponse)
-def update_cart_item(
+async def update_cart_item(
     item: CartItemUpdate,
     uid: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update cart item quantity"""
-    controller = C_CartController(db)
-    cart = controller.queryCart(uid)
+    controller = C_AsyncCartController(db)
+    cart = await controller.queryCart(uid)
     
     if not cart:
         raise HTTPException(
@@ -112,25 +120,25 @@ def update_cart_item(
     try:
         if item.new_quantity == 0:
             # Remove item
-            cart = controller.removeItem(uid, cart_item.itemId)
+            cart = await controller.removeItem(uid, cart_item.itemId)
         else:
             # Update quantity
-            cart = controller.updateQuantity(uid, cart_item.itemId, item.new_quantity)
+            cart = await controller.updateQuantity(uid, cart_item.itemId, item.new_quantity)
         
-        return serialize_cart(cart, db)
+        return serialize_cart(cart, controller)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @cart_router.delete("/remove/{laptop_id}", response_model=CartResponse)
-def remove_from_cart(
+async def remove_from_cart(
     laptop_id: int,
     uid: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove specific item from cart"""
-    controller = C_CartController(db)
-    cart = controller.queryCart(uid)
+    controller = C_AsyncCartController(db)
+    cart = await controller.queryCart(uid)
     
     if not cart:
         raise HTTPException(
@@ -152,22 +160,18 @@ def remove_from_cart(
         )
     
     try:
-        cart = controller.removeItem(uid, cart_item.itemId)
-        return serialize_cart(cart, db)
+        cart = await controller.removeItem(uid, cart_item.itemId)
+        return serialize_cart(cart, controller)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @cart_router.delete("/clear", response_model=dict)
-def clear_cart(
+async def clear_cart(
     uid: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Clear all items from the cart"""
-    cart = db.query(M_Cart).filter(M_Cart.userId == uid).first()
-    
-    if cart:
-        db.delete(cart)
-        db.commit()
+    await C_AsyncCartController(db).clearCart(uid)
     
     return {"message": "Cart cleared successfully"}
@@ -0,0 +1,74 @@
+# routes/images.py
+
+import logging
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from services.http_cache import PUBLIC_CACHE_CONTROL, ConditionalGet, version_etag
+from services.image_resize import (
+    IMAGE_RESIZE_WIDTHS,
+    RESIZE_FORMAT_PATTERN,
+    RESIZE_FORMATS,
+    UnreadableImage,
+    image_resizer,
+    negotiate_format,
+    resolve_source,
+    snap_width,
+)
+from services.image_store import IMMUTABLE_CACHE_CONTROL, url_digest
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+images_router = APIRouter(prefix="/img", tags=["images"])
+
+
+def locate_source(path: str) -> tuple[str, str]:
+    """Resolve a static image and its content hash (blocking: may hash a legacy file)"""
+    source = resolve_source(path)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return source, image_resizer.sourceHash(path, source)
+
+
+@images_router.get("/stats")
+async def image_resize_stats():
+    """Disk cache size and hit/miss/coalesced counts for the resize endpoint"""
+    return image_resizer.stats()
+
+
+@images_router.get("/{path:path}")
+async def resize_image(
+    path: str,
+    request: Request,
+    response: Response,
+    w: int = Query(..., gt=0, le=IMAGE_RESIZE_WIDTHS[-1] * 2, description="Target width in pixels (snapped up to a configured width)"),
+    fmt: str = Query("auto", pattern=RESIZE_FORMAT_PATTERN, description="webp, jpeg, or auto to follow the Accept header"),
+):
+    """
+    A static image (path relative to /static) resized to width w.
+
+    Renditions are rendered once in a worker pool and then served from a
+    size-bounded disk cache; images are never upscaled.
+    """
+    source, source_hash = await run_in_threadpool(locate_source, path)
+    width = snap_width(w)
+    output = negotiate_format(fmt, request.headers.get("accept"))
+
+    # Store blobs never change; legacy files may be replaced under the same path
+    cache_control = IMMUTABLE_CACHE_CONTROL if url_digest(f"/static/{path}") else PUBLIC_CACHE_CONTROL
+    http_cache = ConditionalGet(request, response, cache_control, vary="Accept" if fmt == "auto" else None)
+    # The validator is known before rendering, so a revalidation never waits on the worker pool
+    http_cache.check(version_etag(source_hash, width, output))
+
+    try:
+        rendition = await image_resizer.rendition(source, source_hash, width, output)
+    except UnreadableImage as e:
+        logger.warning(f"Image resize failed for {path}: {str(e)}")
+        raise HTTPException(status_code=422, detail="Image could not be resized")
+    except Exception as e:
+        # A broken worker pool or a full or unwritable cache is a server fault: answer 500
+        logger.error(f"Image resize failed for {path}: {str(e)}")
+        raise
+    return FileResponse(rendition, media_type=RESIZE_FORMATS[output][1], headers=http_cache.headers)
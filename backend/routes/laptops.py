@@ -2,75 +2,176 @@
 
 import json
 import os
-import shutil
-from fastapi import APIRouter, Query, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Query, Depends, HTTPException, Request
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from elasticsearch import NotFoundError
 from sqlalchemy.orm import Session
-from elasticsearch import Elasticsearch
-from db.models import M_Laptop
-from schemas.laptops import LaptopCreate, LaptopUpdate
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import M_Laptop, M_User
+from schemas.laptops import LaptopCreate, LaptopUpdate, LatestBatchRequest
 from db.session import get_db
+from db.async_session import get_async_read_db
+from services.auth import get_current_admin_user
+from services import search_fallback
+from services.search import (
+    CPU_FACET_VALUES,
+    FACET_FIELDS,
+    LAPTOPS_INDEX,
+    PROJECTION_PATTERN,
+    SCREEN_SIZE_FACET_VALUES,
+    get_raw_search_client,
+    get_search_client,
+    paged_search,
+    scan_hits,
+    source_filter,
+)
+from services.search_cache import search_cache
+from services.search_raw import json_array, raw_json_response, raw_paged_search, raw_search, splice_json
+from services.catalog_export import EXPORT_PATTERN, export_response
+from services.http_cache import PUBLIC_CACHE_CONTROL, ConditionalGet, conditional_get
+from services.search_fallback import is_unavailable_error, run_catalog_search, search_backend
+from services.catalog_engine import catalog_engine
+from services.suggest import SUGGEST_MAX_LIMIT, suggestion_service
+from services.image_pipeline import image_pipeline, remove_variants
+from services import image_store
+from services.temp_uploads import TEMP_DIR, UploadTooLarge, receive_upload, safe_name
+from services.search_index import SUBSTRING_MAX_GRAM, SUBSTRING_MIN_GRAM, laptops_index_is_current
 from controllers.C_InventoryController import C_InventoryController
 from controllers.C_ProductController import C_ProductController
+from controllers.C_AsyncProductController import C_AsyncProductController
 from fastapi import UploadFile, File
-from PIL import Image, ImageDraw, ImageFont
 from typing import List
 import time
+from functools import partial
 
 
+# Configure logging
+logger = logging.getLogger(__name__)
+
 laptops_router = APIRouter(prefix="/laptops", tags=["laptops"])
-es = Elasticsearch("http://elasticsearch:9200")
 
-@laptops_router.post("/upload-temp/{folder_name}/{filename}")
-async def upload_temp_file(file: UploadFile = File(...), folder_name: str = "temp", filename: str = "temp_file"):
+# Upper bound on ids resolved by one /laptops/batch request
+BATCH_MAX_IDS = 300
+
+# Narrowest sale_price histogram bucket /laptops/filter accepts: VND prices span tens of
+# millions, so narrower buckets would exceed Elasticsearch's search.max_buckets
+PRICE_INTERVAL_MIN = 100_000
+
+
+def format_laptop_hits(hits) -> list:
+    """Extract hit sources and ensure product_images is always an array"""
+    formatted_results = []
+    for hit in hits:
+        data = hit["_source"]
+        if isinstance(data.get("product_images"), str):
+            try:
+                data["product_images"] = json.loads(data["product_images"])
+            except:
+                data["product_images"] = []
+        elif not isinstance(data.get("product_images"), list):
+            data["product_images"] = []
+        formatted_results.append(data)
+    return formatted_results
+
+
+def search_cache_tags(brands, laptop_ids) -> list:
+    """Tag a cached response with its brand filter (or "*") and the laptops it contains"""
+    tags = [f"brand:{b}" for b in brands] if brands else ["brand:*"]
+    tags.extend(f"laptop:{laptop_id}" for laptop_id in laptop_ids)
+    return tags
+
+
+def result_ids(results: list) -> list:
+    return [item.get("id") for item in results]
+
+
+def invalidate_search_cache(laptop_id: int, *brands) -> None:
+    """Drop cached responses a change to this laptop could affect"""
+    tags = ["brand:*", f"laptop:{laptop_id}"]
+    tags.extend(f"brand:{b}" for b in brands if b)
+    search_cache.invalidate(tags)
+
+
+def store_product_images(db: Session, urls: list) -> list:
+    """Move temp uploads into the image store; store and legacy /static/laptop_images URLs are kept"""
+    stored = []
+    for url in urls:
+        if not url.startswith(("/static/laptop_images/", image_store.MEDIA_URL_PREFIX)):
+            digest, extension, size = image_store.store_file("." + url)
+            image_store.register_blob(db, digest, extension, size)
+            url = image_store.blob_url(digest, extension)
+        if url not in stored:
+            stored.append(url)
+    return stored
+
+
+@laptops_router.post(
+    "/upload-temp/{folder_name}/{filename}",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                }
+            },
+        }
+    },
+)
+async def upload_temp_file(request: Request, folder_name: str = "temp", filename: str = "temp_file"):
     """
     Upload a file to a temporary folder and return the file path.
-    
+
+    The multipart body is streamed to disk in chunks off the event loop and
+    hashed on the way; files over UPLOAD_MAX_FILE_BYTES or requests over
+    UPLOAD_MAX_REQUEST_BYTES are rejected with 413. Files never attached to a
+    laptop are removed by the temp upload sweeper.
+
     Args:
-        file: The uploaded file
+        request: Multipart body with the uploaded file in the "file" field
         folder_name: The name of the folder within the temp directory
         filename: The name of the file to be saved
 
     Returns:
-        JSON response with the temporary file path
+        JSON response with the temporary file path, size and SHA-256
     """
-    try:
-        # Create temp directory if it doesn't exist
-        os.makedirs(f"static/temp/{folder_name}", exist_ok=True)
+    if not safe_name(folder_name) or not safe_name(filename):
+        raise HTTPException(status_code=400, detail="Invalid folder or file name")
 
-        # Generate a unique filename using timestamp and original filename
-        filepath = os.path.join("static/temp", folder_name, filename)
-
-        # Save the file using async operations
-        content = await file.read()
-        with open(filepath, "wb") as buffer:
-            buffer.write(content)
-        
-        # Return the file path as a URL
-        relative_path = f"/static/temp/{folder_name}/{filename}"
-
-        return {
-            "filename": filename,
-            "filepath": relative_path
-        }
+    filepath = os.path.join(TEMP_DIR, folder_name, filename)
+    try:
+        stored = await receive_upload(request, filepath)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
 
+    # Return the file path as a URL
+    return {
+        "filename": filename,
+        "filepath": f"/static/temp/{folder_name}/{filename}",
+        "size": stored["size"],
+        "sha256": stored["sha256"],
+    }
+
+
 @laptops_router.post("/")
 def insert_laptop(laptop: LaptopCreate, db: Session = Depends(get_db)):
     controller = C_InventoryController(db)
     
-    # Process images
-    for i, filepath in enumerate(laptop.product_images):
-        # Move the image to the static folder
-        if not filepath.startswith("/static/laptop_images/"):
-            # Ensure the directory exists
-            os.makedirs("static/laptop_images", exist_ok=True)
-            # Generate a new filename
-            filename = os.path.basename(filepath)
-            # Move the file
-            shutil.move("." + filepath, os.path.join("static/laptop_images", filename))
-            # Update the filepath in the list
-            laptop.product_images[i] = f"/static/laptop_images/{filename}"
+    # Process images: temp uploads move into the content-addressed store
+    try:
+        laptop.product_images = store_product_images(db, laptop.product_images)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    image_store.update_references(db, [], laptop.product_images)
 
     # Use controller to create laptop
     try:
@@ -111,6 +212,7 @@ def insert_laptop(laptop: LaptopCreate, db: Session = Depends(get_db)):
             originalPrice=laptop_data.get('original_price')
         )
         new_laptop = db.query(M_Laptop).filter(M_Laptop.laptopId == laptop_id).first()
+        invalidate_search_cache(laptop_id, new_laptop.brand)
         return {"message": "Laptop added successfully", "laptop": new_laptop}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -131,13 +233,9 @@ def delete_laptop(laptop_id: int, db: Session = Depends(get_db)):
         
         # Use controller to delete laptop (soft delete)
         controller.deleteLaptop(laptop_id)
-        
-        # Remove from Elasticsearch
-        try:
-            es.delete(index="laptops", id=laptop_id)
-        except:
-            pass
-            
+        brand = db.query(M_Laptop.brand).filter(M_Laptop.laptopId == laptop_id).scalar()
+        invalidate_search_cache(laptop_id, brand)
+        # The search_outbox trigger queues the Elasticsearch delete in the same transaction
         return {"message": "Laptop deleted successfully"}
     except HTTPException:
         raise
@@ -161,6 +259,7 @@ def update_laptop(
         laptop = db.query(M_Laptop).filter(M_Laptop.laptopId == laptop_id).first()
         if not laptop:
             raise HTTPException(status_code=404, detail="Laptop not found")
+        old_brand = laptop.brand
         
         # Map snake_case field names to camelCase model attributes
         field_mapping = {
@@ -203,36 +302,27 @@ def update_laptop(
         for key, value in update_data.items():
             if key == "product_images" and isinstance(value, list):
                 try:
-                    processed_images = []
-                    # If the updated product_images have new paths, move them to the static folder
-                    for filepath in value:
-                        if not filepath.startswith("/static/laptop_images/"):
-                            # Ensure the directory exists
-                            os.makedirs("static/laptop_images", exist_ok=True)
-                            # Generate a new filename
-                            filename = os.path.basename(filepath)
-                            # Move the file
-                            shutil.move("." + filepath, os.path.join("static/laptop_images", filename))
-                            # Update the filepath in the list
-                            processed_images.append(f"/static/laptop_images/{filename}")
-                        else:
-                            processed_images.append(filepath)
+                    # If the updated product_images have new paths, move them into the image store
+                    processed_images = store_product_images(db, value)
 
                     # If the updated product_images removes some images, we need to handle that
-                    if laptop.productImages:
-                        try:
-                            existing_images = json.loads(laptop.productImages) if isinstance(laptop.productImages, str) else laptop.productImages
-                            for filepath in existing_images:
-                                if filepath not in processed_images:
-                                    try:
-                                        os.remove("." + filepath)
-                                    except FileNotFoundError:
-                                        pass
-                        except:
-                            pass
-                    
+                    existing_images = laptop.toDict(("product_images",))["product_images"]
+                    for filepath in existing_images:
+                        # Store blobs may be shared, so they are only released here and garbage collected later
+                        if filepath not in processed_images and not image_store.url_digest(filepath):
+                            try:
+                                os.remove("." + filepath)
+                            except FileNotFoundError:
+                                pass
+                            remove_variants(filepath)
+                    image_store.update_references(db, existing_images, processed_images)
+
                     # Convert list to JSON string before setting to updates
                     updates["productImages"] = json.dumps(processed_images)
+                    variants = laptop.toDict(("image_variants",))["image_variants"]
+                    updates["imageVariants"] = json.dumps(
+                        {url: v for url, v in variants.items() if url in processed_images}
+                    )
                 except Exception as e:
                     db.rollback()
                     raise HTTPException(status_code=400, detail=f"Image processing failed: {str(e)}")
@@ -243,42 +333,9 @@ def update_laptop(
 
         # Use controller to modify product
         laptop = controller.modifyProduct(laptop_id, **updates)
-        
-        # Sync updated laptop data to Elasticsearch
-        try:
-            laptop_dict = {
-                'id': laptop.laptopId,
-                'brand': laptop.brand,
-                'name': laptop.modelName,
-                'description': laptop.specSummary,
-                'product_images': json.loads(laptop.productImages) if isinstance(laptop.productImages, str) else laptop.productImages,
-                'sale_price': laptop.price,
-                'quantity': laptop.stockQty,
-                'sub_brand': laptop.subBrand,
-                'usage_type': laptop.usageType,
-                'cpu': laptop.cpu,
-                'vga': laptop.vga,
-                'ram_amount': laptop.ramAmount,
-                'ram_type': laptop.ramType,
-                'storage_amount': laptop.storageAmount,
-                'storage_type': laptop.storageType,
-                'screen_size': laptop.screenSize,
-                'screen_resolution': laptop.screenResolution,
-                'screen_refresh_rate': laptop.screenRefreshRate,
-                'screen_brightness': laptop.screenBrightness,
-                'battery_capacity': laptop.batteryCapacity,
-                'battery_cells': laptop.batteryCells,
-                'weight': laptop.weight,
-                'default_os': laptop.defaultOs,
-                'warranty': laptop.warranty,
-                'original_price': laptop.originalPrice,
-                'rate': laptop.rate,
-                'num_rate': laptop.numRate,
-            }
-            es.index(index="laptops", id=laptop.laptopId, body=laptop_dict)
-        except Exception as es_error:
-            print(f"Warning: Failed to update Elasticsearch: {str(es_error)}")
-        
+        invalidate_search_cache(laptop_id, old_brand, laptop.brand)
+        # Elasticsearch picks up the change from search_outbox (see commands/search_sync_worker.py)
+
         # Return the laptop with properly formatted product_images
         response_data = {
             "message": "Laptop updated successfully",
@@ -303,16 +360,30 @@ def update_laptop(
 STOP_WORDS = {"laptop", "laptops"}
 
 @laptops_router.get("/search")
-def search_laptops(
+async def search_laptops(
     query: str = Query(...),
     limit: int = Query(10),
     page: int = Query(1),
-    sort: str = Query("relevant")
+    sort: str = Query("relevant"),
+    cursor: str = Query(None, description='Cursor pagination: "*" for the first page, then next_cursor'),
+    total: str = Query("exact", pattern="^(exact|approximate)$"),
+    fields: str = Query("card", pattern=PROJECTION_PATTERN, description="Projection profile"),
 ):
     terms = query.lower().split()
     filtered_terms = [t for t in terms if t not in STOP_WORDS]
     filtered_query = " ".join(filtered_terms) or query
 
+    # Offset pages from an index that stores product_images as arrays are served
+    # as raw _source bytes (cached as the encoded body under their own key)
+    raw = cursor is None and laptops_index_is_current()
+
+    # Cursor pages are bound to a point-in-time and are not cached
+    cache_key = ("search_raw" if raw else "search", tuple(filtered_terms) or (query.lower(),), sort, page, limit, total, fields)
+    if cursor is None:
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return raw_json_response(cached) if raw else cached
+
     search_query = {
         "bool": {
             "should": [
@@ -369,270 +440,649 @@ def search_laptops(
     }
     sorting = sort_options.get(sort, [])
 
-    query_body = {
-        "query": search_query,
-        "size": limit,
-        "from": (page - 1) * limit,
-    }
+    query_body = {"query": search_query, "_source": source_filter(fields)}
     if sorting:
         query_body["sort"] = sorting
 
-    results = es.search(index="laptops", body=query_body, track_total_hits=True)
-    
-    # Format results to ensure product_images is always an array
-    formatted_results = []
-    for hit in results["hits"]["hits"]:
-        data = hit["_source"]
-        # Ensure product_images is an array
-        if isinstance(data.get("product_images"), str):
-            try:
-                data["product_images"] = json.loads(data["product_images"])
-            except:
-                data["product_images"] = []
-        elif not isinstance(data.get("product_images"), list):
-            data["product_images"] = []
-        formatted_results.append(data)
+    try:
+        results = await run_catalog_search(
+            cursor,
+            (
+                partial(raw_paged_search, query_body, limit, page=page, approximateTotal=total == "approximate")
+                if raw else
+                partial(paged_search, query_body, limit, page=page, cursor=cursor, approximateTotal=total == "approximate")
+            ),
+            partial(
+                search_fallback.search_laptops, query, filtered_terms, limit, page=page, sort=sort,
+                cursor=cursor, approximateTotal=total == "approximate", fields=fields,
+            ),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {
-        "page": page,
+    envelope = {
+        "page": page if cursor is None else None,
         "limit": limit,
-        "total_count": results["hits"]["total"]["value"],
-        "results": formatted_results,
+        "total_count": results["total_count"],
+        "total_relation": results["total_relation"],
+        "has_more": results["has_more"],
+        "next_cursor": results["next_cursor"],
     }
+    if "sources" in results:
+        body = splice_json(envelope, "results", json_array(results["sources"]))
+        search_cache.set(cache_key, body, search_cache_tags(None, results["ids"]))
+        return raw_json_response(body)
 
+    formatted_results = format_laptop_hits(results["hits"])
+    response = {**envelope, "results": formatted_results}
+    if cursor is None and not raw:
+        search_cache.set(cache_key, response, search_cache_tags(None, result_ids(formatted_results)))
+    return response
 
-@laptops_router.get("/filter")
-def filter_laptops(
-    price_min: int = Query(None),
-    price_max: int = Query(None),
-    brand: list[str] = Query([]),
-    sub_brand: list[str] = Query([]),
-    cpu: list[str] = Query([]),
-    vga: list[str] = Query([]),
-    ram_amount: list[int] = Query([]),
-    storage_amount: list[int] = Query([]),
-    screen_size: list[int] = Query([]),
-    weight_min: float = Query(None),
-    weight_max: float = Query(None),
-    usage_type: list[str] = Query([]),
-    limit: int = Query(None),
-    page: int = Query(1),
-    sort: str = Query("latest"),
-):
-    print(cpu)
-    filter_query = {"bool": {"filter": []}}
+
+def vga_clause(value: str) -> dict:
+    """Substring match on vga via the n-gram sub-field (wildcard only on legacy indices)"""
+    needle = value.lower()
+    if laptops_index_is_current() and SUBSTRING_MIN_GRAM <= len(needle) <= SUBSTRING_MAX_GRAM:
+        return {"match": {"vga.ngram": needle}}
+    return {"wildcard": {"vga.keyword": f"*{needle}*"}}
+
+
+def screen_size_range(size: int) -> dict:
+    """Screen size buckets cover [size, size + 0.6] inches"""
+    return {"range": {"screen_size": {"gte": size, "lte": size + 0.6}}}
+
+
+def build_facet_aggs(clauses: dict, price_interval: int) -> dict:
+    """Build one filter-wrapped aggregation per facet, excluding that facet's own filter"""
+    def others(name):
+        return {"bool": {"filter": [c for k, c in clauses.items() if k in FACET_FIELDS and k != name]}}
+
+    facet_aggs = {
+        "brand": {"terms": {"field": "brand.keyword", "size": 50}},
+        "cpu": {"filters": {"filters": {v: {"match_phrase": {"cpu": v}} for v in CPU_FACET_VALUES}}},
+        "ram_amount": {"terms": {"field": "ram_amount", "size": 20}},
+        "storage_amount": {"terms": {"field": "storage_amount", "size": 20}},
+        "screen_size": {
+            "filters": {"filters": {str(v): screen_size_range(v) for v in SCREEN_SIZE_FACET_VALUES}}
+        },
+    }
+    aggs = {
+        name: {"filter": others(name), "aggs": {"values": agg}}
+        for name, agg in facet_aggs.items()
+    }
+    aggs["sale_price"] = {
+        "filter": others("sale_price"),
+        "aggs": {
+            "stats": {"stats": {"field": "sale_price"}},
+            "histogram": {"histogram": {"field": "sale_price", "interval": price_interval}},
+        },
+    }
+    return aggs
+
+
+def parse_facet_aggs(aggregations: dict) -> dict:
+    """Flatten the aggregations from build_facet_aggs into value/count lists"""
+    facets = {}
+    for name in ("brand", "ram_amount", "storage_amount"):
+        facets[name] = [
+            {"value": b["key"], "count": b["doc_count"]}
+            for b in aggregations[name]["values"]["buckets"]
+        ]
+    facets["cpu"] = [
+        {"value": key, "count": b["doc_count"]}
+        for key, b in aggregations["cpu"]["values"]["buckets"].items()
+    ]
+    facets["screen_size"] = sorted(
+        (
+            {"value": int(key), "count": b["doc_count"]}
+            for key, b in aggregations["screen_size"]["values"]["buckets"].items()
+        ),
+        key=lambda f: f["value"],
+    )
+    price = aggregations["sale_price"]
+    facets["sale_price"] = {
+        "min": price["stats"]["min"],
+        "max": price["stats"]["max"],
+        "histogram": [
+            {"from": int(b["key"]), "count": b["doc_count"]}
+            for b in price["histogram"]["buckets"]
+        ],
+    }
+    return facets
+
+
+FILTER_SORT_OPTIONS = {
+    "latest": [{"inserted_at": {"order": "desc"}}],
+    "price_asc": [{"sale_price": {"order": "asc"}}],
+    "price_desc": [{"sale_price": {"order": "desc"}}],
+}
+
+
+def build_filter_clauses(filters: dict) -> dict:
+    """Named Elasticsearch filter clauses, so each facet can be computed with every other filter applied"""
+    brand, sub_brand, cpu, vga = filters["brand"], filters["sub_brand"], filters["cpu"], filters["vga"]
+    ram_amount, storage_amount = filters["ram_amount"], filters["storage_amount"]
+    screen_size, usage_type = filters["screen_size"], filters["usage_type"]
+    weight_min, weight_max = filters["weight_min"], filters["weight_max"]
+    price_min, price_max = filters["price_min"], filters["price_max"]
+
+    clauses = {}
     should_query = {"bool": {"should": []}}
 
     if brand and "all" not in brand:
-        filter_query["bool"]["filter"].append({"terms": {"brand.keyword": brand}})
+        clauses["brand"] = {"terms": {"brand.keyword": brand}}
     if sub_brand:
-        filter_query["bool"]["filter"].append(
-            {"terms": {"sub_brand.keyword": sub_brand}}
-        )
+        clauses["sub_brand"] = {"terms": {"sub_brand.keyword": sub_brand}}
     if ram_amount:
-        filter_query["bool"]["filter"].append({"terms": {"ram_amount": ram_amount}})
+        clauses["ram_amount"] = {"terms": {"ram_amount": ram_amount}}
     if storage_amount:
-        filter_query["bool"]["filter"].append(
-            {"terms": {"storage_amount": storage_amount}}
-        )
+        clauses["storage_amount"] = {"terms": {"storage_amount": storage_amount}}
     if cpu:
         cpu_conditions = []
         for cpu_value in cpu:
             cpu_conditions.append({"match_phrase": {"cpu": cpu_value}})
-        filter_query["bool"]["filter"].append({
+        clauses["cpu"] = {
             "bool": {
                 "should": cpu_conditions,
                 "minimum_should_match": 1
             }
-        })
+        }
     if vga:
         should_query["bool"]["should"].extend(
-            [
-                {"wildcard": {"vga.keyword": f"*{v.lower()}*"}}
-                for v in vga
-                if isinstance(v, str)
-            ]
+            [vga_clause(v) for v in vga if isinstance(v, str)]
         )
     # Add filter for usage_type parameter
     if usage_type:
-        filter_query["bool"]["filter"].append({"terms": {"usage_type.keyword": usage_type}})
+        clauses["usage_type"] = {"terms": {"usage_type.keyword": usage_type}}
     if screen_size:
-        filter_query["bool"]["filter"].append(
-            {
-                "bool": {
-                    "should": [
-                        {"range": {"screen_size": {"gte": size, "lte": size + 0.6}}}
-                        for size in screen_size
-                    ],
-                    "minimum_should_match": 1,
-                }
+        clauses["screen_size"] = {
+            "bool": {
+                "should": [screen_size_range(size) for size in screen_size],
+                "minimum_should_match": 1,
             }
-        )
+        }
     if weight_min is not None or weight_max is not None:
         weight_filter = {"range": {"weight": {}}}
         if weight_min is not None:
             weight_filter["range"]["weight"]["gte"] = weight_min
         if weight_max is not None:
             weight_filter["range"]["weight"]["lte"] = weight_max
-        filter_query["bool"]["filter"].append(weight_filter)
+        clauses["weight"] = weight_filter
     if price_min is not None or price_max is not None:
         price_filter = {"range": {"sale_price": {}}}
         if price_min is not None:
             price_filter["range"]["sale_price"]["gte"] = price_min
         if price_max is not None:
             price_filter["range"]["sale_price"]["lte"] = price_max
-        filter_query["bool"]["filter"].append(price_filter)
+        clauses["sale_price"] = price_filter
     if should_query["bool"]["should"]:
         should_query["bool"]["minimum_should_match"] = 1
-        filter_query["bool"]["filter"].append(should_query)
+        clauses["vga"] = should_query
+    return clauses
 
-    sort_options = {
-        "latest": [{"inserted_at": {"order": "desc"}}],
-        "price_asc": [{"sale_price": {"order": "asc"}}],
-        "price_desc": [{"sale_price": {"order": "desc"}}],
+
+async def _formatted_pages(first_page, pages):
+    try:
+        if first_page:
+            yield format_laptop_hits(first_page)
+        async for page in pages:
+            yield format_laptop_hits(page)
+    finally:
+        # Close the scan now rather than when it is garbage collected, so its point-in-time is released
+        await pages.aclose()
+
+
+async def _threadpool_pages(iterator):
+    try:
+        async for page in iterate_in_threadpool(iterator):
+            yield page
+    finally:
+        # Release the Postgres cursor and session when the client goes away early; the
+        # generator runs its cleanup (and the session's I/O) in the threadpool like its pages
+        await run_in_threadpool(iterator.close)
+
+
+async def export_filtered_laptops(filters: dict, sort: str, fields: str, output: str, limit: int = None):
+    """
+    Stream every match of a filter as NDJSON or CSV in constant memory.
+
+    Elasticsearch is scanned page by page over a point-in-time with
+    search_after; while it is unavailable Postgres streams the same rows
+    through a server-side cursor. limit, if given, caps the number of rows.
+    """
+    columns = M_Laptop.projectionFields(fields)
+    if await search_backend.useElasticsearch():
+        query_body = {
+            "query": {"bool": {"filter": list(build_filter_clauses(filters).values())}},
+            "sort": FILTER_SORT_OPTIONS.get(sort, FILTER_SORT_OPTIONS["latest"]),
+            "_source": source_filter(fields),
+        }
+        pages = scan_hits(query_body)
+        try:
+            # Read the first page before answering, so an outage can still fall back
+            first_page = await anext(pages, None)
+        except Exception as e:
+            if not is_unavailable_error(e):
+                raise
+            search_backend.markDown(e)
+        else:
+            return export_response(_formatted_pages(first_page, pages), output, columns, limit)
+
+    search_backend.fallbackRequests += 1
+    pages = _threadpool_pages(search_fallback.iter_filter_pages(filters, sort, fields))
+    return export_response(pages, output, columns, limit)
+
+
+@laptops_router.get("/filter")
+async def filter_laptops(
+    price_min: int = Query(None),
+    price_max: int = Query(None),
+    brand: list[str] = Query([]),
+    sub_brand: list[str] = Query([]),
+    cpu: list[str] = Query([]),
+    vga: list[str] = Query([]),
+    ram_amount: list[int] = Query([]),
+    storage_amount: list[int] = Query([]),
+    screen_size: list[int] = Query([]),
+    weight_min: float = Query(None),
+    weight_max: float = Query(None),
+    usage_type: list[str] = Query([]),
+    limit: int = Query(None, ge=1),
+    page: int = Query(1, ge=1),
+    sort: str = Query("latest"),
+    cursor: str = Query(None, description='Cursor pagination: "*" for the first page, then next_cursor'),
+    total: str = Query("exact", pattern="^(exact|approximate)$"),
+    facets: bool = Query(False, description="Include facet counts and sale_price stats"),
+    price_interval: int = Query(5_000_000, ge=PRICE_INTERVAL_MIN, description="sale_price histogram bucket width"),
+    fields: str = Query("card", pattern=PROJECTION_PATTERN, description="Projection profile"),
+    output: str = Query(
+        "json", alias="format", pattern=EXPORT_PATTERN,
+        description="ndjson/csv stream every match (limit caps the rows; page, cursor and facets are ignored)",
+    ),
+):
+    filters = {
+        "price_min": price_min, "price_max": price_max, "brand": brand, "sub_brand": sub_brand,
+        "cpu": cpu, "vga": vga, "ram_amount": ram_amount, "storage_amount": storage_amount,
+        "screen_size": screen_size, "weight_min": weight_min, "weight_max": weight_max,
+        "usage_type": usage_type,
     }
-    sorting = sort_options.get(sort, sort_options["latest"])
+    if output != "json":
+        return await export_filtered_laptops(filters, sort, fields, output, limit)
 
-    query_body = {"query": filter_query, "sort": sorting}
-    if limit is not None:
-        query_body.update({"size": limit, "from": (page - 1) * limit})
+    # Card listings with offset paging are answered from the in-process columnar snapshot,
+    # which is cheaper than a cache lookup (in the threadpool, so a big filter or facet pass doesn't
+    # hold up the event loop); cursors and other projections go to Elasticsearch
+    if cursor is None and fields == "card" and catalog_engine.ready():
+        results = await run_in_threadpool(
+            catalog_engine.filter, filters, limit, page=page, sort=sort, facets=facets, priceInterval=price_interval
+        )
+        return {
+            "sort": sort,
+            "page": page if limit is not None else None,
+            "limit": limit,
+            **results,
+        }
 
-    results = es.search(index="laptops", body=query_body, track_total_hits=True)
-    total_count = results["hits"]["total"]["value"]
+    filters_key = (
+        price_min, price_max, tuple(sorted(brand)), tuple(sorted(sub_brand)),
+        tuple(sorted(cpu)), tuple(sorted(vga)), tuple(sorted(ram_amount)),
+        tuple(sorted(storage_amount)), tuple(sorted(screen_size)), weight_min, weight_max,
+        tuple(sorted(usage_type)),
+    )
+    # Offset pages without facets are served as raw _source bytes (see /search)
+    raw = cursor is None and not facets and laptops_index_is_current()
 
-    # Format results to ensure product_images is always an array
-    formatted_results = []
-    for hit in results["hits"]["hits"]:
-        data = hit["_source"]
-        # Ensure product_images is an array
-        if isinstance(data.get("product_images"), str):
-            try:
-                data["product_images"] = json.loads(data["product_images"])
-            except:
-                data["product_images"] = []
-        elif not isinstance(data.get("product_images"), list):
-            data["product_images"] = []
-        formatted_results.append(data)
+    # Hits and facets are cached separately: facets don't depend on page/sort/limit.
+    # Cursor pages are bound to a point-in-time and are not cached.
+    cache_key = ("filter_raw" if raw else "filter",) + filters_key + (limit, page, sort, total, fields)
+    facet_key = ("facets",) + filters_key + (price_interval,)
+    response = search_cache.get(cache_key) if cursor is None else None
+    facet_data = search_cache.get(facet_key) if facets else None
+    if response is not None and raw:
+        return raw_json_response(response)
+    if response is not None and (not facets or facet_data is not None):
+        return {**response, "facets": facet_data} if facets else response
+
+    clauses = build_filter_clauses(filters)
+    sorting = FILTER_SORT_OPTIONS.get(sort, FILTER_SORT_OPTIONS["latest"])
+
+    if facets:
+        # Facet filters move to post_filter so each facet's aggregation can drop its own filter
+        query_body = {
+            "query": {"bool": {"filter": [c for k, c in clauses.items() if k not in FACET_FIELDS]}},
+            "post_filter": {"bool": {"filter": [c for k, c in clauses.items() if k in FACET_FIELDS]}},
+            "sort": sorting,
+        }
+    else:
+        query_body = {"query": {"bool": {"filter": list(clauses.values())}}, "sort": sorting}
+    query_body["_source"] = source_filter(fields)
+    need_facets = facets and facet_data is None
+
+    async def facet_search():
+        es = get_search_client()
+        return await es.search(
+            index=LAPTOPS_INDEX,
+            body={
+                "query": query_body["query"],
+                "aggs": build_facet_aggs(clauses, price_interval),
+                "size": 0,
+                "track_total_hits": False,
+            },
+        )
+
+    try:
+        if response is None:
+            if need_facets:
+                query_body["aggs"] = build_facet_aggs(clauses, price_interval)
+            results = await run_catalog_search(
+                cursor,
+                (
+                    partial(raw_paged_search, query_body, limit, page=page, approximateTotal=total == "approximate")
+                    if raw else
+                    partial(paged_search, query_body, limit, page=page, cursor=cursor, approximateTotal=total == "approximate")
+                ),
+                partial(
+                    search_fallback.filter_laptops, filters, limit, page=page, sort=sort, cursor=cursor,
+                    approximateTotal=total == "approximate", fields=fields, facets=need_facets,
+                    priceInterval=price_interval,
+                ),
+            )
+            facet_results = results
+        else:
+            # Hits are cached, only the facets are missing
+            facet_results = await run_catalog_search(
+                None, facet_search, partial(search_fallback.facet_counts, filters, price_interval)
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if need_facets:
+        # The Postgres engine returns facets already flattened
+        facet_data = facet_results.get("facets") or parse_facet_aggs(facet_results["aggregations"])
+        # Brand counts ignore the brand filter, so any laptop change can affect them
+        search_cache.set(facet_key, facet_data, ["brand:*"])
+
+    if response is None:
+        envelope = {
+            "sort": sort,
+            "page": page if limit is not None and cursor is None else None,
+            "limit": limit,
+            "total_count": results["total_count"],
+            "total_relation": results["total_relation"],
+            "has_more": results["has_more"],
+            "next_cursor": results["next_cursor"],
+        }
+        brand_tags = brand if brand and "all" not in brand else None
+        if "sources" in results:
+            body = splice_json(envelope, "results", json_array(results["sources"]))
+            search_cache.set(cache_key, body, search_cache_tags(brand_tags, results["ids"]))
+            return raw_json_response(body)
+
+        formatted_results = format_laptop_hits(results["hits"])
+        response = {**envelope, "results": formatted_results}
+        if cursor is None and not raw:
+            search_cache.set(cache_key, response, search_cache_tags(brand_tags, result_ids(formatted_results)))
+
+    return {**response, "facets": facet_data} if facets else response
+
+
+@laptops_router.get("/cache/stats")
+def get_search_cache_stats(current_user: M_User = Depends(get_current_admin_user)):
+    """Hit, miss and eviction counters for the search-result cache (admin only)"""
+    return search_cache.stats()
 
+
+@laptops_router.get("/search/backend")
+def get_search_backend_status(current_user: M_User = Depends(get_current_admin_user)):
+    """Which engine serves catalog search right now, and the columnar snapshot state (admin only)"""
     return {
-        "sort": sort,
-        "page": page if limit is not None else None,
-        "limit": limit,
-        "total_count": total_count,
-        "results": formatted_results,
+        **search_backend.status(),
+        "catalog_snapshot": catalog_engine.stats(),
+        "suggestions": suggestion_service.stats(),
     }
 
 
-@laptops_router.get("/latest")
-def get_latest_laptops(
-    brand: str = Query("all"), subbrand: str = Query("all"), limit: int = Query(35)
-):
+def latest_query(brand: str, subbrand: str, limit: int, fields: str) -> dict:
+    """Search body for the newest laptops of a brand / sub-brand ("all" for any)"""
     filter_query = {"bool": {"filter": []}}
     if brand.lower() != "all":
         filter_query["bool"]["filter"].append({"term": {"brand.keyword": brand}})
     if subbrand.lower() != "all":
         filter_query["bool"]["filter"].append({"term": {"sub_brand.keyword": subbrand}})
+    return {
+        "query": filter_query,
+        "sort": [{"inserted_at": {"order": "desc"}}],
+        "size": limit,
+        "_source": source_filter(fields),
+        # No hit count, so the index sort on inserted_at lets shards stop early
+        "track_total_hits": False,
+    }
 
-    results = es.search(
-        index="laptops",
-        body={
-            "query": filter_query,
-            "sort": [{"inserted_at": {"order": "desc"}}],
-            "size": limit,
-        },
-    )
+
+def latest_cache_key(brand: str, subbrand: str, limit: int, fields: str) -> tuple:
+    return ("latest", brand, subbrand, limit, fields)
+
+
+def latest_cache_tags(brand: str, laptop_ids: list) -> list:
+    return search_cache_tags(None if brand.lower() == "all" else [brand], laptop_ids)
+
+
+@laptops_router.get("/latest")
+async def get_latest_laptops(
+    brand: str = Query("all"),
+    subbrand: str = Query("all"),
+    limit: int = Query(35),
+    fields: str = Query("card", pattern=PROJECTION_PATTERN, description="Projection profile"),
+):
+    cache_key = latest_cache_key(brand, subbrand, limit, fields)
+    if laptops_index_is_current():
+        # Pass the hits' _source bytes straight through (cached as the encoded body)
+        raw_key = ("raw",) + cache_key
+        body = search_cache.get(raw_key)
+        if body is None:
+            hits = await raw_search(latest_query(brand, subbrand, limit, fields))
+            body = splice_json({}, "results", json_array(hits.sources))
+            search_cache.set(raw_key, body, latest_cache_tags(brand, hits.ids))
+        return raw_json_response(body)
+
+    formatted_results = search_cache.get(cache_key)
+    if formatted_results is not None:
+        return {"results": formatted_results}
+
+    es = get_search_client()
+    results = await es.search(index=LAPTOPS_INDEX, body=latest_query(brand, subbrand, limit, fields))
     
-    # Format results to ensure product_images is always an array
-    formatted_results = []
-    for hit in results["hits"]["hits"]:
-        data = hit["_source"]
-        # Ensure product_images is an array
-        if isinstance(data.get("product_images"), str):
-            try:
-                data["product_images"] = json.loads(data["product_images"])
-            except:
-                data["product_images"] = []
-        elif not isinstance(data.get("product_images"), list):
-            data["product_images"] = []
-        formatted_results.append(data)
+    formatted_results = format_laptop_hits(results["hits"]["hits"])
+    search_cache.set(cache_key, formatted_results, latest_cache_tags(brand, result_ids(formatted_results)))
     
     return {"results": formatted_results}
 
 
+@laptops_router.post("/latest/batch")
+async def get_latest_laptops_batch(batch: LatestBatchRequest):
+    """
+    Resolve several homepage sliders in one request.
+
+    Cached sliders are served directly; the rest go to Elasticsearch as a
+    single _msearch. Results are keyed by "brand:subbrand:limit".
+    """
+    results = {}
+    pending = []
+    for spec in batch.sliders:
+        key = f"{spec.brand}:{spec.subbrand}:{spec.limit}"
+        if key in results or any(key == p[0] for p in pending):
+            continue
+        cache_key = latest_cache_key(spec.brand, spec.subbrand, spec.limit, batch.fields)
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending.append((key, cache_key, spec))
+
+    if pending:
+        searches = []
+        for _, _, spec in pending:
+            searches.append({"index": LAPTOPS_INDEX})
+            searches.append(latest_query(spec.brand, spec.subbrand, spec.limit, batch.fields))
+
+        es = get_search_client()
+        response = await es.msearch(searches=searches)
+
+        for (key, cache_key, spec), item in zip(pending, response["responses"]):
+            if "error" in item:
+                # One failed slider should not blank the whole homepage
+                logger.warning(f"Latest slider {key} failed: {item['error']}")
+                results[key] = []
+                continue
+            formatted_results = format_laptop_hits(item["hits"]["hits"])
+            search_cache.set(cache_key, formatted_results, latest_cache_tags(spec.brand, result_ids(formatted_results)))
+            results[key] = formatted_results
+
+    return {"results": results}
+
+
+@laptops_router.get("/suggest")
+async def suggest_laptops(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=SUGGEST_MAX_LIMIT),
+):
+    """Search-box autocomplete: model names, sub-brands and CPU families, most popular first"""
+    return {"query": q, "suggestions": suggestion_service.suggest(q, limit)}
+
+
+def parse_laptop_ids(ids: str) -> list:
+    """Parse a comma-separated id list, dropping duplicates but keeping the first-seen order"""
+    try:
+        laptop_ids = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if not laptop_ids:
+        raise HTTPException(status_code=400, detail="At least one id is required")
+    if len(laptop_ids) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_IDS} ids per request")
+    return laptop_ids
+
+
+@laptops_router.get("/batch")
+async def get_laptops_batch(
+    ids: str = Query(..., description="Comma-separated laptop ids, e.g. 3,17,42"),
+    fields: str = Query("card", pattern=PROJECTION_PATTERN, description="Projection profile"),
+    db: Session = Depends(get_db),
+):
+    """
+    Resolve many laptops by id in one request (cart, checkout and order views).
+
+    Elasticsearch answers with a single _mget; ids it doesn't hold (inactive
+    laptops, or all of them while it is down) are read from Postgres with one
+    IN query. Results follow the order of ids and unknown ids are listed
+    under "missing".
+    """
+    laptop_ids = parse_laptop_ids(ids)
+    found = {}
+
+    if await search_backend.useElasticsearch():
+        try:
+            source = source_filter(fields)
+            response = await get_search_client().mget(
+                index=LAPTOPS_INDEX,
+                ids=laptop_ids,
+                source_includes=source.get("includes"),
+                source_excludes=source.get("excludes"),
+            )
+            docs = [doc for doc in response["docs"] if doc.get("found")]
+            for doc, data in zip(docs, format_laptop_hits(docs)):
+                found[int(doc["_id"])] = data
+        except Exception as es_error:
+            # Only an outage falls back; query or mapping errors surface as a 500
+            if not is_unavailable_error(es_error):
+                logger.error(f"Elasticsearch mget failed: {str(es_error)}")
+                raise
+            search_backend.markDown(es_error)
+            logger.warning(f"Elasticsearch mget failed: {str(es_error)}, falling back to database")
+
+    misses = [i for i in laptop_ids if i not in found]
+    if misses:
+        controller = C_ProductController(db)
+        laptops = await run_in_threadpool(
+            controller.getLaptopsByIds, misses, M_Laptop.projectionColumns(fields)
+        )
+        projection = M_Laptop.projectionFields(fields)
+        for laptop in laptops:
+            found[laptop.laptopId] = laptop.toDict(projection)
+
+    return {
+        "results": [found[i] for i in laptop_ids if i in found],
+        "missing": [i for i in laptop_ids if i not in found],
+    }
+
+
 @laptops_router.get("/id/{laptop_id}")
-def get_laptop(laptop_id: int, db: Session = Depends(get_db)):
-    controller = C_ProductController(db)
+async def get_laptop(
+    laptop_id: int,
+    fields: str = Query("detail", pattern=PROJECTION_PATTERN, description="Projection profile"),
+    db: AsyncSession = Depends(get_async_read_db),
+    http_cache: ConditionalGet = Depends(conditional_get(PUBLIC_CACHE_CONTROL)),
+):
+    """
+    Laptop details. The ETag hashes the body, so a client revalidating an
+    unchanged laptop gets a 304 without the payload whichever store served it.
+    """
+    controller = C_AsyncProductController(db)
     
     # Try to get from Elasticsearch first
+    es_data = None
     try:
-        query = {"query": {"term": {"id": laptop_id}}}
-        results = es.search(index="laptops", body=query)
-        if results["hits"]["hits"]:
-            es_data = results["hits"]["hits"][0]["_source"]
-            # Ensure product_images is properly formatted
-            if isinstance(es_data.get("product_images"), str):
-                try:
-                    es_data["product_images"] = json.loads(es_data["product_images"])
-                except:
-                    es_data["product_images"] = []
-            return es_data
+        if laptops_index_is_current():
+            # product_images is stored as an array, so _source bytes are served as they are
+            source = source_filter(fields)
+            response = await get_raw_search_client().get_source(
+                index=LAPTOPS_INDEX,
+                id=laptop_id,
+                source_includes=source.get("includes"),
+                source_excludes=source.get("excludes"),
+            )
+            es_data = response.body
+        else:
+            query = {"query": {"term": {"id": laptop_id}}, "_source": source_filter(fields)}
+            results = await get_search_client().search(index=LAPTOPS_INDEX, body=query)
+            if results["hits"]["hits"]:
+                es_data = results["hits"]["hits"][0]["_source"]
+                # Ensure product_images is properly formatted
+                if isinstance(es_data.get("product_images"), str):
+                    try:
+                        es_data["product_images"] = json.loads(es_data["product_images"])
+                    except:
+                        es_data["product_images"] = []
+    except NotFoundError:
+        # Not indexed (e.g. inactive): read it from the database
+        pass
     except Exception as es_error:
         print(f"Elasticsearch query failed: {es_error}, falling back to database")
+    if es_data is not None:
+        return http_cache.respond(es_data)
     
-    # Fallback to database using controller
-    laptop = controller.getLaptopDetails(laptop_id)
+    # Fallback to database using controller, loading only the profile's columns
+    laptop = await controller.getLaptopDetails(laptop_id, M_Laptop.projectionColumns(fields))
     if not laptop:
         raise HTTPException(status_code=404, detail="Laptop not found")
     
-    # Convert laptop to dict with proper formatting
-    laptop_dict = {
-        'id': laptop.laptopId,
-        'brand': laptop.brand,
-        'name': laptop.modelName,
-        'description': laptop.specSummary,
-        'product_images': json.loads(laptop.productImages) if isinstance(laptop.productImages, str) else laptop.productImages or [],
-        'sale_price': laptop.price,
-        'quantity': laptop.stockQty,
-        'sub_brand': laptop.subBrand,
-        'usage_type': laptop.usageType,
-        'cpu': laptop.cpu,
-        'vga': laptop.vga,
-        'ram_amount': laptop.ramAmount,
-        'ram_type': laptop.ramType,
-        'storage_amount': laptop.storageAmount,
-        'storage_type': laptop.storageType,
-        'screen_size': laptop.screenSize,
-        'screen_resolution': laptop.screenResolution,
-        'screen_refresh_rate': laptop.screenRefreshRate,
-        'screen_brightness': laptop.screenBrightness,
-        'battery_capacity': laptop.batteryCapacity,
-        'battery_cells': laptop.batteryCells,
-        'weight': laptop.weight,
-        'default_os': laptop.defaultOs,
-        'warranty': laptop.warranty,
-        'width': laptop.width,
-        'depth': laptop.depth,
-        'height': laptop.height,
-        'number_usb_a_ports': laptop.numberUsbAPorts,
-        'number_usb_c_ports': laptop.numberUsbCPorts,
-        'number_hdmi_ports': laptop.numberHdmiPorts,
-        'number_ethernet_ports': laptop.numberEthernetPorts,
-        'number_audio_jacks': laptop.numberAudioJacks,
-        'original_price': laptop.originalPrice,
-        'rate': laptop.rate,
-        'num_rate': laptop.numRate,
-    }
-    return laptop_dict
+    return http_cache.respond(laptop.toDict(M_Laptop.projectionFields(fields)))
 
 
-@laptops_router.post("/{laptop_id}/upload_images")
+@laptops_router.post("/{laptop_id}/upload_images", status_code=202)
 def upload_images_to_laptop(
     laptop_id: int, files: list[UploadFile] = File(...), db: Session = Depends(get_db)
 ):
     """
     Upload new images for a laptop. If the laptop already has images,
-    the new images are appended. For example, if there are already 3 images,
-    the next file will be saved as id_img4.jpg and added to the URL list.
+    the new images are appended; an image the laptop already lists is skipped.
+
+    The files are stored under their content hash and their URLs saved before
+    returning. Watermarking and the WebP/JPEG variants (listed under
+    image_variants once ready) are produced in the background by
+    services/image_pipeline.py, which then replaces each URL with the
+    watermarked blob's.
     """
     laptop = db.query(M_Laptop).filter(M_Laptop.laptopId == laptop_id).first()
     if not laptop:
@@ -647,42 +1097,30 @@ def upload_images_to_laptop(
         except json.JSONDecodeError:
             existing_urls = []
 
-    os.makedirs("static/laptop_images", exist_ok=True)
-
-    try:
-        font = ImageFont.truetype("arial.ttf", 150)
-    except Exception:
-        font = ImageFont.load_default()
-
     new_urls = []
-    starting_index = len(existing_urls)
-    for i, file in enumerate(files):
-        new_index = starting_index + i + 1
-        filename = f"{laptop_id}_img{new_index}.jpg"
-        filepath = os.path.join("static/laptop_images", filename)
-
-        # Save the uploaded file
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Reopen image to draw watermark
-        with Image.open(filepath) as img:
-            draw = ImageDraw.Draw(img)
-            draw.text(
-                (30, 30),
-                f"ID: {laptop_id}",
-                fill="black",
-                stroke_fill="white",
-                stroke_width=3,
-                font=font,
-            )
-            img.save(filepath)
-
-        new_urls.append(f"/static/laptop_images/{filename}")
+    for file in files:
+        # Stored under its content hash; the pipeline then swaps in a watermarked blob
+        try:
+            digest, extension, size = image_store.store_stream(file.file)
+        except ValueError as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=f"{file.filename}: {str(e)}")
+        image_store.register_blob(db, digest, extension, size)
+        url = image_store.blob_url(digest, extension)
+        # Uploading the same image twice only lists it once
+        if url not in existing_urls and url not in new_urls:
+            new_urls.append(url)
 
     # Append new URLs to the existing list and update DB
     all_urls = existing_urls + new_urls
+    image_store.update_references(db, existing_urls, all_urls)
     laptop.productImages = json.dumps(all_urls)
     db.commit()
+    invalidate_search_cache(laptop_id, laptop.brand)
+
+    # Queue only after the commit, so a finished job always finds its URL on the row
+    on_recorded = partial(invalidate_search_cache, laptop_id, laptop.brand)
+    for url in new_urls:
+        image_pipeline.submit(laptop_id, url, on_recorded)
 
-    return {"message": "Images uploaded successfully", "image_urls": all_urls}
+    return {"message": "Images uploaded, processing queued", "image_urls": all_urls, "processing": new_urls}
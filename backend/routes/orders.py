@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from decimal import Decimal, InvalidOperation
@@ -7,7 +8,8 @@ from typing import List, Optional
 from pydantic import BaseModel
 
 from db.models import M_Laptop, M_Order, M_OrderItem, M_User, M_RefundTicket, M_Cart
-from db.session import get_db
+from db.session import get_db, get_read_db
+from db.async_session import get_async_read_db
 from schemas.orders import (
     OrderResponse,
     UpdateStatus,
@@ -15,7 +17,9 @@ from schemas.orders import (
 from datetime import datetime
 
 from services.auth import get_current_user_id, get_current_admin_user, get_current_user
+from services.http_cache import PRIVATE_CACHE_CONTROL, ConditionalGet, conditional_get, version_etag
 from controllers.C_OrderController import C_OrderController
+from controllers.C_AsyncOrderController import C_AsyncOrderController
 
 # --- Create Router ---
 orders_router = APIRouter(prefix="/orders", tags=["orders"])
@@ -209,28 +213,22 @@ class PaginatedOrdersResponse(BaseModel):
 
 
 @orders_router.get("", response_model=PaginatedOrdersResponse)
-def get_my_orders(
+async def get_my_orders(
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     user_id: int = Depends(get_current_user_id),
 ):
     """
     Retrieves a paginated list of orders for the currently authenticated user
     from the PostgreSQL database.
     """
-    controller = C_OrderController(db)
+    controller = C_AsyncOrderController(db)
     offset = (page - 1) * limit
 
     try:
-        # Use controller to view orders
-        all_orders = controller.viewOrders(user_id)
-        
-        # Get total count for pagination
-        total_count = len(all_orders)
-
-        # Apply pagination manually
-        orders = all_orders[offset:offset + limit]
+        # Count and load only the requested page, with items and refund tickets
+        total_count, orders = await controller.viewOrdersPage(user_id, offset, limit)
 
         # Convert SQLAlchemy models to OrderResponse format
         formatted_orders = [
@@ -276,19 +274,26 @@ def get_my_orders(
 
 
 @orders_router.get("/{order_id}", response_model=OrderResponse)
-def get_my_single_M_Order(
+async def get_my_single_M_Order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     user_id: int = Depends(get_current_user_id),
+    http_cache: ConditionalGet = Depends(conditional_get(PRIVATE_CACHE_CONTROL, vary="Authorization")),
 ):
     """
     Fetches a single order by authenticated user ID.
+    Order items never change after checkout, so updated_at versions the whole response.
     """
-    controller = C_OrderController(db)
+    controller = C_AsyncOrderController(db)
     
     try:
+        # Answer 304 from the order's version before loading it
+        version = await controller.getOrderVersion(order_id)
+        if version and version.userId == user_id:
+            http_cache.check(version_etag("order", order_id, version.updatedAt), version.updatedAt)
+
         # Use controller to get order detail
-        order = controller.getOrderDetail(order_id)
+        order = await controller.getOrderDetail(order_id)
         
         # Verify order belongs to user
         if not order or order.userId != user_id:
@@ -455,7 +460,7 @@ def admin_get_all_orders(
     end_date: Optional[datetime] = Query(
         None, description="Filter orders created on or before this date (ISO Format)"
     ),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     print(
         f"Admin fetching all orders with filters: page={page}, limit={limit}, get_all={get_all}, status_filter={status_filter}, email_filter={email_filter}, phone_filter={phone_filter}, payment_method_filter={payment_method_filter}, start_date={start_date}, end_date={end_date}"
@@ -531,7 +536,7 @@ def admin_get_all_orders_unpaginated(
     end_date: Optional[datetime] = Query(
         None, description="Filter orders created on or before this date (ISO Format)"
     ),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     [Admin] Retrieves ALL orders, with optional filters, without pagination.
@@ -10,7 +10,7 @@ from schemas.refund_tickets import (
     RefundTicketUpdate,
     RefundTicketResponse,
 )
-from db.session import get_db
+from db.session import get_db, get_read_db
 from controllers.C_RefundController import C_RefundController
 from services.auth import get_current_admin_user, get_current_user_id
 
@@ -98,7 +98,7 @@ async def get_refund_tickets(
     email: Optional[str] = None,
     phone_number: Optional[str] = None,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     # Use options(joinedload) to eager load the Order relationship and its items
     query = db.query(M_RefundTicket).options(
@@ -1,34 +1,32 @@
 # routes/reviews.py
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
-from db.models import M_Review, M_Laptop
+from db.models import M_Laptop
 from schemas.reviews import ReviewCreate, ReviewResponse
 from services.auth import get_current_user_id
-from db.session import get_db
-from controllers.C_ReviewController import C_ReviewController
-from controllers.C_ProductController import C_ProductController
+from db.async_session import get_async_db, get_async_read_db
+from controllers.C_AsyncReviewController import C_AsyncReviewController
+from controllers.C_AsyncProductController import C_AsyncProductController
+from services.http_cache import PUBLIC_CACHE_CONTROL, ConditionalGet, conditional_get, version_etag
 
 reviews_router = APIRouter(prefix="/reviews", tags=["reviews"])
 
 
 @reviews_router.post("/", response_model=ReviewResponse)
-async def create_review(review: ReviewCreate, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
-    controller = C_ReviewController(db)
+async def create_review(review: ReviewCreate, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user_id)):
+    controller = C_AsyncReviewController(db)
     
     try:
         # Use controller to validate and store review
-        review_id = controller.validateAndStoreReview(
+        new_review = await controller.validateAndStoreReview(
             userId=user_id,
             laptopId=review.laptop_id,
             rating=review.rating,
             comment=review.review_text
         )
-        
-        # Fetch and return the created review
-        new_review = db.query(M_Review).filter(M_Review.reviewId == review_id).first()
         return new_review
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -37,10 +35,10 @@ async def create_review(review: ReviewCreate, db: Session = Depends(get_db), use
 async def get_reviews_by_user(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     user_id: int = Depends(get_current_user_id)
 ):
-    reviews = db.query(M_Review).filter(M_Review.userId == user_id).offset(skip).limit(limit).all()
+    reviews = await C_AsyncProductController(db).getUserReviews(user_id, skip, limit)
     
     if not reviews:
         return []
@@ -51,21 +49,22 @@ async def get_reviews_by_user(
 async def get_reviews_by_laptop(
     laptop_id: int,
     skip: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db),
+    http_cache: ConditionalGet = Depends(conditional_get(PUBLIC_CACHE_CONTROL))
 ):
-    product_controller = C_ProductController(db)
+    product_controller = C_AsyncProductController(db)
     
     # Check if the laptop exists using controller
-    laptop = product_controller.getLaptopDetails(laptop_id)
+    laptop = await product_controller.getLaptopDetails(laptop_id, [M_Laptop.laptopId])
     if not laptop:
         raise HTTPException(status_code=404, detail="Laptop not found")
     
-    # Get reviews for this laptop using controller
-    reviews = product_controller.getLaptopReviews(laptop_id)
+    # Count, newest id and latest edit change whenever a review is added, edited or removed
+    count, newest_id, last_modified = await product_controller.getLaptopReviewsVersion(laptop_id)
+    http_cache.check(version_etag("reviews", laptop_id, skip, count, newest_id, last_modified), last_modified)
     
-    # Apply pagination manually
-    if skip > 0:
-        reviews = reviews[skip:]
+    # Get reviews for this laptop using controller, skipping in the query
+    reviews = await product_controller.getLaptopReviews(laptop_id, skip)
     
     if not reviews:
         return []
@@ -77,3 +77,14 @@ class LaptopUpdate(BaseModel):
 class LaptopResponse(LaptopCreate):
     id: int
     model_config = ConfigDict(from_attributes=True)
+
+
+class LatestSliderSpec(BaseModel):
+    brand: str = "all"
+    subbrand: str = "all"
+    limit: int = Field(35, gt=0, le=100)
+
+
+class LatestBatchRequest(BaseModel):
+    sliders: List[LatestSliderSpec] = Field(..., min_length=1, max_length=50)
+    fields: str = Field("card", pattern="^(card|detail|admin)$")
@@ -0,0 +1,441 @@
+"""
+Columnar Catalog Engine
+In-process NumPy snapshot of the active catalog that answers /laptops/filter without Elasticsearch
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+from db.models import M_Laptop
+from db.session import SessionLocal
+from services.search import CPU_FACET_VALUES, SCREEN_SIZE_FACET_VALUES
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Engine configurations
+CATALOG_ENGINE_ENABLED = os.getenv("CATALOG_ENGINE_ENABLED", "true").lower() == "true"
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "2"))
+CATALOG_FULL_REFRESH_INTERVAL = float(os.getenv("CATALOG_FULL_REFRESH_INTERVAL", "600"))
+# Rows whose updated_at lands up to this far behind the watermark (long transactions) are still picked up
+CATALOG_REFRESH_OVERLAP = timedelta(seconds=float(os.getenv("CATALOG_REFRESH_OVERLAP", "10")))
+
+# Elasticsearch's default page size, used when the caller passes no limit
+DEFAULT_PAGE_SIZE = 10
+EPOCH = datetime(1970, 1, 1)
+
+NUMERIC_COLUMNS = {
+    # column -> (model attribute, dtype, missing value)
+    "sale_price": ("price", np.int64, 0),
+    "ram_amount": ("ramAmount", np.int64, -1),
+    "storage_amount": ("storageAmount", np.int64, -1),
+    "screen_size": ("screenSize", np.float64, np.nan),
+    "weight": ("weight", np.float64, np.nan),
+    # Missing timestamps become 0, so they sort last for "latest" like Elasticsearch's missing: _last
+    "inserted_at": ("updatedAt", np.int64, 0),
+}
+CATEGORICAL_COLUMNS = {
+    "brand": "brand",
+    "sub_brand": "subBrand",
+    "usage_type": "usageType",
+    "cpu": "cpu",
+    "vga": "vga",
+}
+LOADED_COLUMNS = sorted(
+    {M_Laptop.API_FIELDS[f] for f in M_Laptop.CARD_FIELDS}
+    | {attr for attr, _, _ in NUMERIC_COLUMNS.values()}
+    | set(CATEGORICAL_COLUMNS.values())
+    | {"isActive", "modifiedAt"}
+)
+
+
+class Dictionary:
+    """
+    Dictionary encoding for a categorical column.
+
+    Codes are only ever appended, so snapshots built earlier keep decoding
+    correctly while a refresh adds new values.
+    """
+
+    def __init__(self):
+        self.values: list = []
+        self._codes: dict = {}
+        self._lock = threading.Lock()
+
+    def encode(self, value) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(value)
+                    self._codes[value] = code
+        return code
+
+    def codesFor(self, values) -> np.ndarray:
+        """Codes of the given values (unknown values are skipped)"""
+        return np.array([self._codes[v] for v in values if v in self._codes], dtype=np.int32)
+
+    def codesContaining(self, needles) -> np.ndarray:
+        """Codes whose value contains any needle, case-insensitively (substring filters on cpu/vga)"""
+        needles = [n.lower() for n in needles]
+        return np.array(
+            [code for code, value in enumerate(list(self.values))
+             if value is not None and any(n in value.lower() for n in needles)],
+            dtype=np.int32,
+        )
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _timestamp(value: Optional[datetime]) -> int:
+    return int(value.timestamp() * 1_000_000) if value else NUMERIC_COLUMNS["inserted_at"][2]
+
+
+class CatalogSnapshot:
+    """
+    Immutable column arrays for one version of the catalog.
+
+    Row i of every array describes the same laptop; `alive` masks out rows
+    removed since the last full build. Sorted permutations are precomputed
+    so a query only has to mask and slice.
+    """
+
+    def __init__(self, ids: np.ndarray, numeric: dict, categorical: dict, cards: list, alive: np.ndarray):
+        self.ids = ids
+        self.numeric = numeric
+        self.categorical = categorical
+        self.cards = cards
+        self.alive = alive
+        self.positions = {int(laptopId): i for i, laptopId in enumerate(ids)}
+        # np.lexsort sorts by the last key first; id breaks ties like the Elasticsearch cursor
+        self.permutations = {
+            "latest": np.lexsort((ids, -numeric["inserted_at"])),
+            "price_asc": np.lexsort((ids, numeric["sale_price"])),
+            "price_desc": np.lexsort((ids, -numeric["sale_price"])),
+        }
+
+    def __len__(self) -> int:
+        return int(self.alive.sum())
+
+
+class ColumnarCatalog:
+    """Builds, refreshes and queries the catalog snapshot"""
+
+    def __init__(self):
+        self.dictionaries = {name: Dictionary() for name in CATEGORICAL_COLUMNS}
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._versions: dict = {}
+        self._watermark: Optional[datetime] = None
+        self._builtAt = 0.0
+        self._refreshLock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.queries = 0
+        self.refreshes = 0
+
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    # Building and refreshing
+    def _row(self, laptop: M_Laptop) -> tuple:
+        numeric = {}
+        for name, (attr, dtype, missing) in NUMERIC_COLUMNS.items():
+            value = getattr(laptop, attr)
+            if name == "inserted_at":
+                numeric[name] = _timestamp(value)
+            elif dtype is np.float64:
+                numeric[name] = _to_float(value)
+            else:
+                numeric[name] = missing if value is None else int(value)
+        categorical = {
+            name: self.dictionaries[name].encode(getattr(laptop, attr))
+            for name, attr in CATEGORICAL_COLUMNS.items()
+        }
+        return numeric, categorical, laptop.toDict(M_Laptop.CARD_FIELDS)
+
+    def _snapshotFrom(self, ids: list, rows: list, alive: Optional[np.ndarray] = None) -> CatalogSnapshot:
+        numeric = {
+            name: np.array([r[0][name] for r in rows], dtype=dtype)
+            for name, (_, dtype, _) in NUMERIC_COLUMNS.items()
+        }
+        categorical = {
+            name: np.array([r[1][name] for r in rows], dtype=np.int32)
+            for name in CATEGORICAL_COLUMNS
+        }
+        return CatalogSnapshot(
+            np.array(ids, dtype=np.int64),
+            numeric,
+            categorical,
+            [r[2] for r in rows],
+            alive if alive is not None else np.ones(len(ids), dtype=bool),
+        )
+
+    def _query(self, db, since: Optional[datetime] = None):
+        stmt = select(M_Laptop).options(load_only(*[getattr(M_Laptop, a) for a in LOADED_COLUMNS]))
+        if since is None:
+            stmt = stmt.where(M_Laptop.isActive | M_Laptop.isActive.is_(None))
+        else:
+            stmt = stmt.where(M_Laptop.modifiedAt > since)
+        return db.scalars(stmt.order_by(M_Laptop.laptopId).execution_options(yield_per=1000))
+
+    def build(self) -> None:
+        """Load the whole active catalog into a fresh snapshot"""
+        started = time.monotonic()
+        ids, rows, versions = [], [], {}
+        watermark = None
+        with SessionLocal() as db:
+            for laptop in self._query(db):
+                ids.append(laptop.laptopId)
+                rows.append(self._row(laptop))
+                versions[laptop.laptopId] = laptop.modifiedAt
+                if laptop.modifiedAt and (watermark is None or laptop.modifiedAt > watermark):
+                    watermark = laptop.modifiedAt
+        with self._refreshLock:
+            self._snapshot = self._snapshotFrom(ids, rows)
+            self._versions = versions
+            self._watermark = watermark or EPOCH
+            self._builtAt = time.monotonic()
+        logger.info(f"Catalog snapshot built with {len(ids)} laptops in {time.monotonic() - started:.2f}s")
+
+    def refresh(self) -> int:
+        """
+        Apply laptops modified since the last refresh to a copy of the snapshot.
+
+        Changed rows are updated in place, new ones appended and deactivated
+        ones masked out; readers keep using the previous snapshot until the
+        new one is swapped in. Returns the number of rows applied.
+        """
+        if self._snapshot is None or time.monotonic() - self._builtAt > CATALOG_FULL_REFRESH_INTERVAL:
+            # Periodic full build also compacts masked-out rows and catches hard deletes
+            self.build()
+            return len(self._snapshot)
+
+        with SessionLocal() as db:
+            changed = [
+                laptop for laptop in self._query(db, self._watermark - CATALOG_REFRESH_OVERLAP)
+                if self._versions.get(laptop.laptopId) != laptop.modifiedAt
+            ]
+        if not changed:
+            return 0
+
+        with self._refreshLock:
+            current = self._snapshot
+            numeric = {name: column.copy() for name, column in current.numeric.items()}
+            categorical = {name: column.copy() for name, column in current.categorical.items()}
+            cards = list(current.cards)
+            alive = current.alive.copy()
+            newIds, newRows = [], []
+            for laptop in changed:
+                self._versions[laptop.laptopId] = laptop.modifiedAt
+                if laptop.modifiedAt and laptop.modifiedAt > self._watermark:
+                    self._watermark = laptop.modifiedAt
+                position = current.positions.get(laptop.laptopId)
+                active = laptop.isActive is not False
+                if position is None:
+                    if active:
+                        newIds.append(laptop.laptopId)
+                        newRows.append(self._row(laptop))
+                    continue
+                alive[position] = active
+                if active:
+                    rowNumeric, rowCategorical, card = self._row(laptop)
+                    for name, value in rowNumeric.items():
+                        numeric[name][position] = value
+                    for name, value in rowCategorical.items():
+                        categorical[name][position] = value
+                    cards[position] = card
+
+            ids = current.ids
+            if newIds:
+                appended = self._snapshotFrom(newIds, newRows)
+                ids = np.concatenate([ids, appended.ids])
+                numeric = {n: np.concatenate([c, appended.numeric[n]]) for n, c in numeric.items()}
+                categorical = {n: np.concatenate([c, appended.categorical[n]]) for n, c in categorical.items()}
+                cards.extend(appended.cards)
+                alive = np.concatenate([alive, appended.alive])
+            self._snapshot = CatalogSnapshot(ids, numeric, categorical, cards, alive)
+            self.refreshes += 1
+        return len(changed)
+
+    async def _refreshLoop(self) -> None:
+        while True:
+            try:
+                applied = await run_in_threadpool(self.refresh)
+                if applied:
+                    logger.info(f"Catalog snapshot refreshed ({applied} laptops)")
+            except Exception as e:
+                logger.warning(f"Catalog snapshot refresh failed: {str(e)}")
+            await asyncio.sleep(CATALOG_REFRESH_INTERVAL)
+
+    async def start(self) -> None:
+        """Build the snapshot in the background and keep it fresh (called from the FastAPI lifespan)"""
+        if CATALOG_ENGINE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._refreshLoop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # Querying
+    def _filterMasks(self, snapshot: CatalogSnapshot, filters: dict) -> dict:
+        """Named boolean masks mirroring the Elasticsearch clauses built by /laptops/filter"""
+        numeric, categorical = snapshot.numeric, snapshot.categorical
+        masks = {}
+
+        def inValues(name, values):
+            masks[name] = np.isin(categorical[name], self.dictionaries[name].codesFor(values))
+
+        brand = filters.get("brand")
+        if brand and "all" not in brand:
+            inValues("brand", brand)
+        if filters.get("sub_brand"):
+            inValues("sub_brand", filters["sub_brand"])
+        if filters.get("usage_type"):
+            inValues("usage_type", filters["usage_type"])
+        for name in ("cpu", "vga"):
+            if filters.get(name):
+                masks[name] = np.isin(categorical[name], self.dictionaries[name].codesContaining(filters[name]))
+        for name in ("ram_amount", "storage_amount"):
+            if filters.get(name):
+                masks[name] = np.isin(numeric[name], filters[name])
+        if filters.get("screen_size"):
+            screen = numeric["screen_size"]
+            masks["screen_size"] = np.logical_or.reduce(
+                [(screen >= size) & (screen <= size + 0.6) for size in filters["screen_size"]]
+            )
+        for name, column in (("weight", "weight"), ("sale_price", "sale_price")):
+            prefix = "price" if name == "sale_price" else name
+            low, high = filters.get(f"{prefix}_min"), filters.get(f"{prefix}_max")
+            if low is not None or high is not None:
+                mask = np.ones(len(snapshot.ids), dtype=bool)
+                if low is not None:
+                    mask &= numeric[column] >= low
+                if high is not None:
+                    mask &= numeric[column] <= high
+                masks[name] = mask
+        return masks
+
+    def filter(self, filters: dict, limit: Optional[int], page: int = 1, sort: str = "latest",
+               facets: bool = False, priceInterval: int = 5_000_000) -> dict:
+        """
+        Answer a /laptops/filter query from the snapshot.
+
+        Returns the card documents of the requested page in the shape of
+        services.search.paged_search, plus flattened facets when asked.
+        """
+        snapshot = self._snapshot
+        masks = self._filterMasks(snapshot, filters)
+        mask = snapshot.alive.copy()
+        for m in masks.values():
+            mask &= m
+
+        permutation = snapshot.permutations.get(sort, snapshot.permutations["latest"])
+        ordered = permutation[mask[permutation]]
+        total = len(ordered)
+        size = limit if limit is not None else DEFAULT_PAGE_SIZE
+        offset = (page - 1) * limit if limit is not None else 0
+        pageRows = ordered[offset:offset + size]
+        hasMore = total > offset + size if limit is not None else len(pageRows) < total
+
+        self.queries += 1
+        results = {
+            "results": [snapshot.cards[i] for i in pageRows],
+            "total_count": total,
+            "total_relation": "eq",
+            "has_more": bool(hasMore),
+            "next_cursor": None,
+        }
+        if facets:
+            results["facets"] = self._facets(snapshot, masks, priceInterval)
+        return results
+
+    def _facets(self, snapshot: CatalogSnapshot, masks: dict, priceInterval: int) -> dict:
+        """Facets in the shape of parse_facet_aggs, each computed without its own filter"""
+        numeric, categorical = snapshot.numeric, snapshot.categorical
+
+        def without(name):
+            mask = snapshot.alive.copy()
+            for key, m in masks.items():
+                if key != name:
+                    mask &= m
+            return mask
+
+        def terms(values, size, decode=None, missing=None):
+            keys, counts = np.unique(values, return_counts=True)
+            order = np.lexsort((keys, -counts))[:size]
+            return [
+                {"value": decode(int(keys[i])) if decode else int(keys[i]), "count": int(counts[i])}
+                for i in order if keys[i] != missing
+            ]
+
+        brandCodes = categorical["brand"][without("brand")]
+        brandCounts = np.bincount(brandCodes, minlength=len(self.dictionaries["brand"].values))
+        brands = self.dictionaries["brand"].values
+        facets = {
+            "brand": [
+                {"value": brands[code], "count": int(brandCounts[code])}
+                for code in sorted(np.flatnonzero(brandCounts), key=lambda c: (-brandCounts[c], str(brands[c])))[:50]
+                if brands[code] is not None
+            ],
+            "ram_amount": terms(numeric["ram_amount"][without("ram_amount")], 20, missing=-1),
+            "storage_amount": terms(numeric["storage_amount"][without("storage_amount")], 20, missing=-1),
+        }
+
+        cpuCodes = categorical["cpu"][without("cpu")]
+        facets["cpu"] = [
+            {"value": v, "count": int(np.isin(cpuCodes, self.dictionaries["cpu"].codesContaining([v])).sum())}
+            for v in CPU_FACET_VALUES
+        ]
+        screen = numeric["screen_size"][without("screen_size")]
+        facets["screen_size"] = [
+            {"value": v, "count": int(((screen >= v) & (screen <= v + 0.6)).sum())}
+            for v in SCREEN_SIZE_FACET_VALUES
+        ]
+
+        prices = numeric["sale_price"][without("sale_price")]
+        if len(prices):
+            low, high = int(prices.min()), int(prices.max())
+            buckets = prices // priceInterval
+            first = low // priceInterval
+            # Like the Elasticsearch histogram, empty buckets between min and max are included
+            counts = np.bincount(buckets - first)
+            histogram = [{"from": int((first + i) * priceInterval), "count": int(c)} for i, c in enumerate(counts)]
+        else:
+            low = high = None
+            histogram = []
+        facets["sale_price"] = {"min": low, "max": high, "histogram": histogram}
+        return facets
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "enabled": CATALOG_ENGINE_ENABLED,
+            "ready": snapshot is not None,
+            "laptops": len(snapshot) if snapshot is not None else 0,
+            "rows": len(snapshot.ids) if snapshot is not None else 0,
+            "watermark": self._watermark.isoformat() if self._watermark and self._watermark != EPOCH else None,
+            "queries": self.queries,
+            "refreshes": self.refreshes,
+        }
+
+
+# Shared engine for the catalog endpoints
+catalog_engine = ColumnarCatalog()
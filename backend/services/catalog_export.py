@@ -0,0 +1,103 @@
+"""
+Catalog Export Service
+Encodes streamed filter results as NDJSON or CSV for export and feed jobs
+"""
+import io
+import csv
+import json
+import logging
+from decimal import Decimal
+from typing import AsyncIterator, Optional
+from fastapi.responses import StreamingResponse
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Streaming formats accepted by /laptops/filter
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+EXPORT_PATTERN = "^(json|ndjson|csv)$"
+
+
+def _json_default(value):
+    # Postgres rows carry Decimals where Elasticsearch returns numbers
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return str(value)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def encode_ndjson(rows: list) -> bytes:
+    """One JSON document per line"""
+    return "".join(
+        json.dumps(row, default=_json_default, ensure_ascii=False, separators=(",", ":")) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+
+class CsvEncoder:
+    """Encodes pages of rows under a fixed header; list values (product_images) are JSON-encoded"""
+
+    def __init__(self, columns: tuple):
+        self.columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _flush(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(self.columns)
+        return self._flush()
+
+    def encode(self, rows: list) -> bytes:
+        self._writer.writerows([_csv_value(row.get(c)) for c in self.columns] for row in rows)
+        return self._flush()
+
+
+async def export_chunks(pages: AsyncIterator[list], format: str, columns: tuple,
+                        maxRows: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Encode pages of rows into one chunk per page, stopping after maxRows rows"""
+    csvEncoder = CsvEncoder(columns) if format == "csv" else None
+    sent = 0
+    try:
+        if csvEncoder:
+            yield csvEncoder.header()
+        async for rows in pages:
+            if maxRows is not None:
+                rows = rows[:maxRows - sent]
+            if rows:
+                yield csvEncoder.encode(rows) if csvEncoder else encode_ndjson(rows)
+                sent += len(rows)
+            if maxRows is not None and sent >= maxRows:
+                break
+    except Exception as e:
+        # Headers are already sent: the client sees a truncated body
+        logger.error(f"Catalog export aborted after {sent} rows: {str(e)}")
+        raise
+    finally:
+        # Also when the client disconnects mid-stream: closing the pages releases
+        # the Elasticsearch point-in-time or the Postgres cursor they hold
+        await pages.aclose()
+
+
+def export_response(pages: AsyncIterator[list], format: str, columns: tuple,
+                    maxRows: Optional[int] = None, filename: str = "laptops") -> StreamingResponse:
+    """StreamingResponse that downloads the pages as filename.ndjson / filename.csv"""
+    return StreamingResponse(
+        export_chunks(pages, format, columns, maxRows),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
@@ -0,0 +1,124 @@
+"""
+HTTP Cache Service
+ETag / Last-Modified validators and Cache-Control for conditional GETs
+"""
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache configurations
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+# Shared catalog data: browsers and proxies may reuse it for a short while
+PUBLIC_CACHE_CONTROL = f"public, max-age={HTTP_CACHE_MAX_AGE}"
+# Per-user data: only the browser may store it, and it must revalidate every time
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+# Bump when a response shape changes so clients don't keep validating old bodies
+REPRESENTATION_VERSION = "1"
+
+
+def version_etag(*parts: Any) -> str:
+    """Strong ETag derived from the version columns a representation is built from"""
+    key = "|".join([REPRESENTATION_VERSION, *(str(p) for p in parts)])
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag derived from the encoded response body"""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def encode_json(payload: Any) -> bytes:
+    """Encode a payload the way JSONResponse would"""
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive timestamps come from TIMESTAMP columns written by a UTC database
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    if header.strip() == "*":
+        return True
+    candidates = (c.strip() for c in header.split(","))
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+class ConditionalGet:
+    """
+    Validators for one request, created per route through Depends(conditional_get(...)).
+
+    check() takes validators computed from version columns before the body is
+    built and raises a 304 when the client already holds that version.
+    respond() covers resources without a usable version column: it encodes
+    the body, hashes it and answers 304 or 200 with the bytes it produced.
+    """
+
+    def __init__(self, request: Request, response: Response, cacheControl: str, vary: Optional[str] = None):
+        self.request = request
+        self.response = response
+        self.headers = {"Cache-Control": cacheControl}
+        if vary:
+            self.headers["Vary"] = vary
+
+    def notModified(self, etag: str, lastModified: Optional[datetime] = None) -> bool:
+        """Whether the request's If-None-Match / If-Modified-Since already cover this version"""
+        ifNoneMatch = self.request.headers.get("if-none-match")
+        if ifNoneMatch is not None:
+            # If-Modified-Since is ignored when If-None-Match is present (RFC 9110 13.1.3)
+            return _etag_matches(ifNoneMatch, etag)
+        ifModifiedSince = self.request.headers.get("if-modified-since")
+        if ifModifiedSince and lastModified is not None:
+            try:
+                since = parsedate_to_datetime(ifModifiedSince)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                return False
+            # HTTP dates have one-second resolution
+            return _as_utc(lastModified).replace(microsecond=0) <= since
+        return False
+
+    def check(self, etag: str, lastModified: Optional[datetime] = None) -> None:
+        """Attach validators to the response, or raise a 304 if the client's copy is current"""
+        self.headers["ETag"] = etag
+        if lastModified is not None:
+            self.headers["Last-Modified"] = format_datetime(_as_utc(lastModified), usegmt=True)
+        if self.notModified(etag, lastModified):
+            raise HTTPException(status_code=304, headers=self.headers)
+        self.response.headers.update(self.headers)
+
+    def respond(self, payload: Any, lastModified: Optional[datetime] = None) -> Response:
+        """Encode payload (unless it is already JSON bytes), then answer 304 or 200 under a content-hash ETag"""
+        body = payload if isinstance(payload, bytes) else encode_json(payload)
+        self.check(content_etag(body), lastModified)
+        return Response(content=body, media_type="application/json", headers=self.headers)
+
+    def skip(self) -> None:
+        """Send Cache-Control only, for responses that have no stable version"""
+        self.response.headers.update(self.headers)
+
+
+def conditional_get(cacheControl: str, vary: Optional[str] = None):
+    """Dependency factory: Depends(conditional_get(PRIVATE_CACHE_CONTROL, vary="Authorization"))"""
+
+    def dependency(request: Request, response: Response) -> ConditionalGet:
+        return ConditionalGet(request, response, cacheControl, vary)
+
+    return dependency
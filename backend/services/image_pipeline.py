@@ -0,0 +1,236 @@
+"""
+Image Pipeline Service
+Watermarks uploaded laptop images and renders responsive variants in a process pool
+"""
+import io
+import os
+import json
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, Optional
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+from db.models import M_Laptop
+from db.session import SessionLocal
+from services.image_store import blob_path, blob_url, path_url, register_blob, update_references, write_blob
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pipeline configurations
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_VARIANT_WIDTHS = tuple(int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1280").split(","))
+IMAGE_THUMBNAIL_SIZE = int(os.getenv("IMAGE_THUMBNAIL_SIZE", "160"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+
+WATERMARK_FONT = "arial.ttf"
+WATERMARK_FONT_SIZE = 150
+
+
+@lru_cache(maxsize=8)
+def watermark_font(size: int = WATERMARK_FONT_SIZE):
+    """Resolve the watermark font once per process (falls back to Pillow's bitmap font)"""
+    try:
+        return ImageFont.truetype(WATERMARK_FONT, size)
+    except Exception:
+        return ImageFont.load_default()
+
+
+def draw_watermark(img: Image.Image, text: str, position: tuple = (30, 30), size: int = WATERMARK_FONT_SIZE,
+                   strokeWidth: int = 3) -> None:
+    """Stamp text in black with a white outline, the way catalog images are marked"""
+    ImageDraw.Draw(img).text(
+        position,
+        text,
+        font=watermark_font(size),
+        fill="black",
+        stroke_fill="white",
+        stroke_width=strokeWidth,
+    )
+
+
+def _save_atomic(img: Image.Image, path: str, format: str, **options) -> None:
+    # Readers of /static never see a half-written file
+    temp = f"{path}.{os.getpid()}.part"
+    img.save(temp, format=format, **options)
+    os.replace(temp, path)
+
+
+def variant_paths(imagePath: str) -> list:
+    """Every file process_image derives from imagePath, for cleanup"""
+    stem = os.path.splitext(imagePath)[0]
+    paths = [f"{stem}_thumb.webp", f"{stem}_thumb.jpg"]
+    for width in IMAGE_VARIANT_WIDTHS:
+        paths.extend([f"{stem}_{width}.webp", f"{stem}_{width}.jpg"])
+    return paths
+
+
+def process_image(sourcePath: str, label: str) -> dict:
+    """
+    Watermark an uploaded image into a new store blob and write its WebP/JPEG variants.
+
+    Runs in a worker process, so it only takes and returns plain values. The
+    watermarked JPEG is named by its own digest and the variants derive their
+    names from it, so every output URL is immutable; files that already exist
+    are not rendered again. Widths larger than the source are skipped rather
+    than upscaled. Returns {"digest", "extension", "byte_size", "variants"},
+    variants holding {"thumbnail": {"webp", "jpeg"}, "webp": {width: path}, "jpeg": {width: path}}.
+    """
+    with Image.open(sourcePath) as source:
+        img = ImageOps.exif_transpose(source).convert("RGB")
+    draw_watermark(img, f"ID: {label}")
+    encoded = io.BytesIO()
+    img.save(encoded, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+    data = encoded.getvalue()
+    digest, _ = write_blob(data, "jpg")
+
+    def render(image: Image.Image, suffix: str, extension: str, format: str, **options) -> str:
+        path = blob_path(digest, extension, suffix)
+        if not os.path.exists(path):
+            _save_atomic(image, path, format, **options)
+        return path
+
+    variants = {"webp": {}, "jpeg": {}}
+    for width in sorted(set(IMAGE_VARIANT_WIDTHS)):
+        if width >= img.width:
+            continue
+        resized = img.resize((width, round(img.height * width / img.width)), Image.Resampling.LANCZOS)
+        variants["webp"][str(width)] = render(resized, f"_{width}", "webp", "WEBP", quality=IMAGE_WEBP_QUALITY, method=4)
+        variants["jpeg"][str(width)] = render(resized, f"_{width}", "jpg", "JPEG", quality=IMAGE_JPEG_QUALITY,
+                                              optimize=True, progressive=True)
+
+    thumbnail = ImageOps.fit(img, (IMAGE_THUMBNAIL_SIZE, IMAGE_THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+    variants["thumbnail"] = {
+        "webp": render(thumbnail, "_thumb", "webp", "WEBP", quality=IMAGE_WEBP_QUALITY),
+        "jpeg": render(thumbnail, "_thumb", "jpg", "JPEG", quality=IMAGE_JPEG_QUALITY),
+    }
+    return {"digest": digest, "extension": "jpg", "byte_size": len(data), "variants": variants}
+
+
+def _as_urls(variants: dict) -> dict:
+    """Turn worker paths (static/...) into the /static/... URLs the API serves"""
+    return {
+        kind: {key: path_url(path) for key, path in entries.items()}
+        for kind, entries in variants.items()
+    }
+
+
+def record_processed(laptopId: int, sourceUrl: str, result: dict) -> bool:
+    """
+    Swap an uploaded image for its watermarked blob and store the variant URLs.
+
+    Nothing changes on the laptop if the upload was removed meanwhile; the new
+    blob is still registered, unreferenced, so garbage collection can reclaim it.
+    """
+    processedUrl = blob_url(result["digest"], result["extension"])
+    with SessionLocal() as db:
+        register_blob(db, result["digest"], result["extension"], result["byte_size"])
+        laptop = db.query(M_Laptop).filter(M_Laptop.laptopId == laptopId).with_for_update().first()
+        images = laptop.toDict(("product_images",))["product_images"] if laptop else []
+        if sourceUrl not in images:
+            db.commit()
+            return False
+        # An identical image already on the laptop collapses into one entry
+        updated = []
+        for url in images:
+            url = processedUrl if url == sourceUrl else url
+            if url not in updated:
+                updated.append(url)
+        variants = laptop.toDict(("image_variants",))["image_variants"]
+        variants.pop(sourceUrl, None)
+        variants[processedUrl] = _as_urls(result["variants"])
+        update_references(db, images, updated)
+        laptop.productImages = json.dumps(updated)
+        laptop.imageVariants = json.dumps(variants)
+        db.commit()
+    return True
+
+
+def remove_variants(imageUrl: str) -> None:
+    """Delete the variant files derived from a legacy /static/laptop_images URL (store blobs are garbage collected)"""
+    for path in variant_paths("." + imageUrl):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class ImagePipeline:
+    """
+    Background image processing for admin uploads.
+
+    Uploads are stored as they arrive and their URLs saved right away; the
+    watermark and variants are produced in a ProcessPoolExecutor (Pillow work
+    is CPU-bound and holds the GIL). When a job finishes the laptop lists the
+    watermarked blob instead of the upload, with its variant URLs under
+    laptops.image_variants; the search outbox then syncs both.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _getExecutor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a server process that holds DB and Elasticsearch connections is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def submit(self, laptopId: int, imageUrl: str, onRecorded: Optional[Callable[[], None]] = None) -> Future:
+        """Queue one uploaded image (already stored and listed at imageUrl) for watermarking and variants"""
+        future = self._getExecutor().submit(process_image, imageUrl.lstrip("/"), str(laptopId))
+        with self._lock:
+            self.pending += 1
+
+        # Runs on the executor's management thread once the worker returns
+        def done(finished: Future) -> None:
+            try:
+                recorded = record_processed(laptopId, imageUrl, finished.result())
+                succeeded = True
+            except Exception as e:
+                recorded = succeeded = False
+                logger.error(f"Image processing failed for {imageUrl}: {str(e)}")
+            with self._lock:
+                self.pending -= 1
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            if recorded and onRecorded is not None:
+                onRecorded()
+
+        future.add_done_callback(done)
+        return future
+
+    def start(self) -> None:
+        """Create the worker pool (called from the FastAPI lifespan); processes spawn on first use"""
+        self._getExecutor()
+
+    def stop(self) -> None:
+        """Finish queued jobs, then stop the workers (blocking)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+# Shared pipeline for the upload endpoints
+image_pipeline = ImagePipeline()
@@ -0,0 +1,276 @@
+"""
+Image Resize Service
+On-demand resized renditions of static images, kept in a size-bounded disk LRU cache
+"""
+import os
+import asyncio
+import hashlib
+import logging
+import threading
+import multiprocessing
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from cachetools import LRUCache
+from PIL import Image, ImageOps, UnidentifiedImageError
+from services.image_store import DIGEST_LENGTH, url_digest
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Resize configurations
+IMAGE_RESIZE_WORKERS = int(os.getenv("IMAGE_RESIZE_WORKERS", "2"))
+IMAGE_RESIZE_CACHE_DIR = os.getenv("IMAGE_RESIZE_CACHE_DIR", "cache/images")
+IMAGE_RESIZE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_RESIZE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Requested widths snap up to one of these, so the cache holds a bounded set of renditions
+IMAGE_RESIZE_WIDTHS = tuple(sorted(int(w) for w in os.getenv("IMAGE_RESIZE_WIDTHS", "160,320,480,640,960,1280,1920").split(",")))
+IMAGE_RESIZE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_RESIZE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+
+STATIC_DIR = "static"
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif")
+RESIZE_FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+RESIZE_FORMAT_PATTERN = "^(auto|webp|jpeg)$"
+
+# Part of every cache key: bump when rendering changes so stale renditions are never served
+RENDITION_VERSION = "1"
+
+
+class UnreadableImage(Exception):
+    """The source file is not an image Pillow can decode (unknown format, truncated or corrupt data)"""
+
+
+def render_rendition(sourcePath: str, targetPath: str, width: int, format: str) -> int:
+    """
+    Resize sourcePath to width (never upscaling) and write it to targetPath.
+
+    Runs in a worker process. Returns the size of the written file.
+    """
+    pillowFormat, _ = RESIZE_FORMATS[format]
+    try:
+        with Image.open(sourcePath) as source:
+            img = ImageOps.exif_transpose(source)
+            img = img.convert("RGBA" if format == "webp" and img.mode in ("RGBA", "LA", "P") else "RGB")
+    except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+        raise UnreadableImage(str(e))
+    except OSError as e:
+        # Pillow reports bad image data as an OSError without an errno; one with an errno
+        # (permissions, missing file, I/O) is a server fault and is raised as is
+        if e.errno is not None:
+            raise
+        raise UnreadableImage(str(e))
+    if width < img.width:
+        img = img.resize((width, round(img.height * width / img.width)), Image.Resampling.LANCZOS)
+
+    options = {"quality": IMAGE_RESIZE_WEBP_QUALITY, "method": 4} if format == "webp" else \
+        {"quality": IMAGE_RESIZE_JPEG_QUALITY, "optimize": True, "progressive": True}
+    os.makedirs(os.path.dirname(targetPath), exist_ok=True)
+    temp = f"{targetPath}.{os.getpid()}.part"
+    img.save(temp, format=pillowFormat, **options)
+    os.replace(temp, targetPath)
+    return os.path.getsize(targetPath)
+
+
+def snap_width(width: int) -> int:
+    """Smallest configured width that covers the request (the largest one for anything bigger)"""
+    position = bisect_left(IMAGE_RESIZE_WIDTHS, width)
+    return IMAGE_RESIZE_WIDTHS[min(position, len(IMAGE_RESIZE_WIDTHS) - 1)]
+
+
+def negotiate_format(requested: str, accept: Optional[str]) -> str:
+    """Explicit fmt wins; otherwise WebP for clients that accept it, JPEG for the rest"""
+    if requested != "auto":
+        return requested
+    return "webp" if "image/webp" in (accept or "") else "jpeg"
+
+
+def resolve_source(path: str) -> Optional[str]:
+    """File under static/ for a request path, None if it escapes static/ or is not an image"""
+    root = os.path.realpath(STATIC_DIR)
+    source = os.path.realpath(os.path.join(root, path))
+    if not source.startswith(root + os.sep) or not source.lower().endswith(SOURCE_EXTENSIONS):
+        return None
+    return source if os.path.isfile(source) else None
+
+
+class DiskLRU:
+    """
+    Byte-bounded LRU over the files in one directory.
+
+    Recency lives in memory, seeded from file mtimes at startup; the files are
+    the cache. Another worker process may evict a file this one still
+    lists, so lookups check that the file exists.
+    """
+
+    def __init__(self, directory: str, maxBytes: int):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load(self) -> None:
+        """Index the files already on disk (otherwise done on first use)"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+    def _load(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".part"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                found.append((stat.st_mtime, os.path.relpath(os.path.join(root, name), self.directory), stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        self._loaded = True
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of a cached file, marked as most recently used"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if key not in self._entries:
+                return None
+            path = self.path(key)
+            if not os.path.exists(path):
+                self._bytes -= self._entries.pop(key)
+                return None
+            self._entries.move_to_end(key)
+        return path
+
+    def add(self, key: str, size: int) -> None:
+        """Account for a file just written at path(key), evicting the least recently used ones"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            while self._bytes > self.maxBytes and len(self._entries) > 1:
+                oldest, oldestSize = self._entries.popitem(last=False)
+                self._bytes -= oldestSize
+                try:
+                    os.remove(self.path(oldest))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        return {"files": len(self._entries), "bytes": self._bytes, "max_bytes": self.maxBytes}
+
+
+class ImageResizer:
+    """
+    Renders and caches resized images for /img.
+
+    Renditions are keyed by the source's content hash and the parameters, so
+    a changed source never serves a stale rendition. The first request for a
+    key renders it in a ProcessPoolExecutor; concurrent requests for the same
+    key await that one render instead of starting their own.
+    """
+
+    def __init__(self, workers: int = IMAGE_RESIZE_WORKERS, cacheDir: str = IMAGE_RESIZE_CACHE_DIR,
+                 maxBytes: int = IMAGE_RESIZE_CACHE_MAX_BYTES):
+        self.workers = workers
+        self.cache = DiskLRU(cacheDir, maxBytes)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: dict = {}
+        # (path, mtime, size) -> content hash, so unchanged legacy files are hashed once
+        self._sourceHashes = LRUCache(maxsize=10000)
+        self._hashLock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _getExecutor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a server process that holds DB and Elasticsearch connections is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def sourceHash(self, requestPath: str, sourcePath: str) -> str:
+        """Content hash of a source: named in the path for store blobs, hashed once otherwise (blocking)"""
+        digest = url_digest(f"/{STATIC_DIR}/{requestPath}")
+        if digest:
+            return digest
+        stat = os.stat(sourcePath)
+        statKey = (sourcePath, stat.st_mtime_ns, stat.st_size)
+        with self._hashLock:
+            cached = self._sourceHashes.get(statKey)
+        if cached is None:
+            hasher = hashlib.sha256()
+            with open(sourcePath, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    hasher.update(chunk)
+            cached = hasher.hexdigest()[:DIGEST_LENGTH]
+            with self._hashLock:
+                self._sourceHashes[statKey] = cached
+        return cached
+
+    @staticmethod
+    def cacheKey(sourceHash: str, width: int, format: str) -> str:
+        extension = "webp" if format == "webp" else "jpg"
+        return os.path.join(sourceHash[:2], f"{sourceHash}_w{width}_v{RENDITION_VERSION}.{extension}")
+
+    async def _render(self, key: str, sourcePath: str, width: int, format: str) -> str:
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(
+            self._getExecutor(), render_rendition, sourcePath, self.cache.path(key), width, format
+        )
+        self.cache.add(key, size)
+        return self.cache.path(key)
+
+    async def rendition(self, sourcePath: str, sourceHash: str, width: int, format: str) -> str:
+        """Path of the cached rendition, rendering it first if needed"""
+        key = self.cacheKey(sourceHash, width, format)
+        path = self.cache.get(key)
+        if path is not None:
+            self.hits += 1
+            return path
+
+        # The render runs as its own task: a client that disconnects doesn't cancel it for the others
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._render(key, sourcePath, width, format))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def start(self) -> None:
+        """Index the disk cache and create the worker pool (called from the FastAPI lifespan)"""
+        self.cache.load()
+        self._getExecutor()
+
+    def stop(self) -> None:
+        """Stop the workers (blocking)"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            **self.cache.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "rendering": len(self._inflight),
+        }
+
+
+# Shared resizer for the /img endpoint
+image_resizer = ImageResizer()
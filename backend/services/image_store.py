@@ -0,0 +1,219 @@
+"""
+Image Store Service
+Content-addressed, deduplicated and reference-counted storage for product images
+"""
+import os
+import re
+import time
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import BinaryIO, Iterable, Optional
+from PIL import Image
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from db.models import M_ImageBlob
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Store configurations
+IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", "31536000"))
+IMAGE_GC_GRACE_HOURS = float(os.getenv("IMAGE_GC_GRACE_HOURS", "24"))
+
+MEDIA_DIR = "static/media"
+MEDIA_URL_PREFIX = "/static/media/"
+# A URL names its content, so browsers and proxies never need to revalidate it
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={IMAGE_CACHE_MAX_AGE}, immutable"
+
+# Hex characters of the SHA-256 kept in file names (128 bits)
+DIGEST_LENGTH = 32
+CHUNK_SIZE = 1024 * 1024
+
+# Pillow format -> stored extension; anything else is rejected
+IMAGE_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+_MEDIA_URL = re.compile(re.escape(MEDIA_URL_PREFIX) + r"[0-9a-f]{2}/([0-9a-f]{%d})\.(\w+)$" % DIGEST_LENGTH)
+_MEDIA_FILE = re.compile(r"([0-9a-f]{%d})(?:_\w+)?\.\w+$" % DIGEST_LENGTH)
+
+
+def blob_path(digest: str, extension: str, suffix: str = "") -> str:
+    """File for a digest; derived files (variants) share it with a suffix, e.g. _640"""
+    return os.path.join(MEDIA_DIR, digest[:2], f"{digest}{suffix}.{extension}")
+
+
+def blob_url(digest: str, extension: str) -> str:
+    return f"{MEDIA_URL_PREFIX}{digest[:2]}/{digest}.{extension}"
+
+
+def path_url(path: str) -> str:
+    """/static/... URL for a file under static/"""
+    return "/" + path.replace(os.sep, "/")
+
+
+def url_digest(url: str) -> Optional[str]:
+    """Digest named by a store URL, None for legacy /static/laptop_images paths"""
+    match = _MEDIA_URL.match(url or "")
+    return match[1] if match else None
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f"{path}.{os.getpid()}.part"
+    with open(temp, "wb") as f:
+        f.write(data)
+    os.replace(temp, path)
+
+
+def write_blob(data: bytes, extension: str) -> tuple[str, str]:
+    """Store bytes under their digest, skipping the write if that content already exists"""
+    digest = hashlib.sha256(data).hexdigest()[:DIGEST_LENGTH]
+    path = blob_path(digest, extension)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    return digest, path
+
+
+def store_stream(source: BinaryIO) -> tuple[str, str, int]:
+    """
+    Copy an upload into the store, hashing it on the way.
+
+    Returns (digest, extension, byte size). Raises ValueError when the
+    content is not an image format the catalog serves.
+    """
+    os.makedirs(MEDIA_DIR, exist_ok=True)
+    temp = os.path.join(MEDIA_DIR, f".upload.{os.getpid()}.{time.monotonic_ns()}.part")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp, "wb") as out:
+            while chunk := source.read(CHUNK_SIZE):
+                hasher.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        try:
+            with Image.open(temp) as img:
+                extension = IMAGE_EXTENSIONS.get(img.format)
+        except Exception:
+            extension = None
+        if extension is None:
+            raise ValueError("Unsupported image format")
+
+        digest = hasher.hexdigest()[:DIGEST_LENGTH]
+        path = blob_path(digest, extension)
+        if os.path.exists(path):
+            # Identical content is already stored
+            os.remove(temp)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp, path)
+        return digest, extension, size
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def store_file(path: str) -> tuple[str, str, int]:
+    """Move a file (e.g. a temp upload) into the store"""
+    with open(path, "rb") as source:
+        stored = store_stream(source)
+    os.remove(path)
+    return stored
+
+
+def register_blob(db: Session, digest: str, extension: str, byteSize: int) -> None:
+    """Make sure a stored file has a row (with no references yet) so it can be counted and collected"""
+    existing = db.get(M_ImageBlob, digest)
+    if existing is not None:
+        # Re-uploaded content restarts the grace period, so garbage collection can't remove it now
+        existing.updatedAt = datetime.utcnow()
+        return
+    try:
+        with db.begin_nested():
+            db.add(M_ImageBlob(digest=digest, extension=extension, byteSize=byteSize, refCount=0,
+                               updatedAt=datetime.utcnow()))
+    except IntegrityError:
+        # Registered concurrently by another upload of the same content
+        pass
+
+
+def _adjust(db: Session, urls: Iterable[str], delta: int) -> None:
+    digests = {d for d in map(url_digest, urls) if d}
+    if digests:
+        db.execute(
+            update(M_ImageBlob)
+            .where(M_ImageBlob.digest.in_(digests))
+            .values(refCount=M_ImageBlob.refCount + delta, updatedAt=datetime.utcnow())
+        )
+
+
+def update_references(db: Session, before: Iterable[str], after: Iterable[str]) -> None:
+    """
+    Count a product_images change, in the same transaction that writes it.
+
+    A blob's count is the number of laptops listing it; legacy URLs are ignored.
+    """
+    before, after = set(before or ()), set(after or ())
+    _adjust(db, after - before, 1)
+    _adjust(db, before - after, -1)
+
+
+def _remove_files(digest: str) -> int:
+    directory = os.path.join(MEDIA_DIR, digest[:2])
+    removed = 0
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.startswith(digest):
+                os.remove(os.path.join(directory, name))
+                removed += 1
+    return removed
+
+
+def collect_garbage(db: Session, graceHours: float = IMAGE_GC_GRACE_HOURS, dryRun: bool = False) -> dict:
+    """
+    Delete blobs (and their variants) that no laptop has referenced for graceHours.
+
+    The grace period covers uploads whose laptop update has not committed yet.
+    Files without a row (a crash between write and register) are removed too.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=graceHours)
+    blobs = (
+        db.query(M_ImageBlob)
+        .filter(M_ImageBlob.refCount <= 0, M_ImageBlob.updatedAt < cutoff)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    stats = {"blobs": 0, "files": 0, "orphans": 0, "bytes": 0}
+    for blob in blobs:
+        stats["blobs"] += 1
+        stats["bytes"] += blob.byteSize or 0
+        if not dryRun:
+            stats["files"] += _remove_files(blob.digest)
+            db.delete(blob)
+    if not dryRun:
+        db.commit()
+
+    known = {digest for (digest,) in db.query(M_ImageBlob.digest)}
+    cutoffTime = time.time() - graceHours * 3600
+    for root, _, names in os.walk(MEDIA_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            match = _MEDIA_FILE.match(name)
+            if (match and match[1] in known) or os.path.getmtime(path) >= cutoffTime:
+                continue
+            stats["orphans"] += 1
+            if not dryRun:
+                os.remove(path)
+    logger.info(f"Image store garbage collection: {stats}")
+    return stats
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed files: every response may be cached forever"""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -0,0 +1,228 @@
+"""
+Placeholder Image Service
+Renders the watermarked sample images on first request instead of at boot
+"""
+import os
+import re
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from PIL import Image
+from fastapi.concurrency import run_in_threadpool
+from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from sqlalchemy import text
+from db.session import engine
+from services.image_pipeline import draw_watermark
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Placeholder configurations
+PLACEHOLDER_MANIFEST = os.getenv("PLACEHOLDER_MANIFEST", "cache/placeholders.json")
+
+# generate_posts() writes this many posts, and their rows are not part of the schema
+SAMPLE_POSTS = 20
+
+STATIC_DIR = "static"
+TEMPLATE_DIR = os.path.join(STATIC_DIR, "templates")
+
+# Bump when the drawing changes so generated files are re-rendered on next request
+PLACEHOLDER_VERSION = 1
+
+
+class PlaceholderSpec(NamedTuple):
+    pattern: re.Pattern
+    template: str  # file in TEMPLATE_DIR, formatted with the match groups
+    label: str  # watermark text, formatted with the match groups
+    fontSize: int
+    position: tuple
+    strokeWidth: int
+    # Rendering is limited to images a row points at (or ids up to maxId when no table
+    # stores them), so requests for arbitrary ids can't fill the disk
+    referenced: Optional[str] = None
+    maxId: Optional[int] = None
+
+
+# Static paths (relative to static/) the sample data points at, matching commands/generate_sample_data.py
+PLACEHOLDER_SPECS = (
+    PlaceholderSpec(re.compile(r"laptop_images/(?P<id>\d+)_img(?P<n>[1-3])\.jpg"),
+                    "laptop{n}.jpg", "ID: {id}", 150, (30, 30), 3,
+                    "SELECT 1 FROM laptops WHERE id = :id AND product_images LIKE '%' || :url || '%'"),
+    PlaceholderSpec(re.compile(r"post_images/post_(?P<id>\d+)\.jpg"),
+                    "posts.jpg", "Post #{id}", 100, (50, 50), 4, maxId=SAMPLE_POSTS),
+)
+
+
+def match_placeholder(path: str) -> Optional[tuple]:
+    """(spec, match) for a static path that can be generated, None otherwise"""
+    for spec in PLACEHOLDER_SPECS:
+        match = spec.pattern.fullmatch(path)
+        if match:
+            return spec, match
+    return None
+
+
+@lru_cache(maxsize=32)
+def _template_digest(templatePath: str, mtimeNs: int) -> str:
+    with open(templatePath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def template_digest(templatePath: str) -> str:
+    """Content hash of a template, recomputed only when its mtime changes"""
+    return _template_digest(templatePath, os.stat(templatePath).st_mtime_ns)
+
+
+def render_placeholder(spec: PlaceholderSpec, match: re.Match, outputPath: str) -> dict:
+    """Draw one placeholder from its template and return its manifest entry"""
+    templatePath = os.path.join(TEMPLATE_DIR, spec.template.format(**match.groupdict()))
+    with Image.open(templatePath) as img:
+        img = img.convert("RGB")
+    draw_watermark(img, spec.label.format(**match.groupdict()), spec.position, spec.fontSize, spec.strokeWidth)
+    os.makedirs(os.path.dirname(outputPath), exist_ok=True)
+    temp = f"{outputPath}.{os.getpid()}.{threading.get_ident()}.part"
+    img.save(temp, format="JPEG")
+    os.replace(temp, outputPath)
+    return {"template": template_digest(templatePath), "version": PLACEHOLDER_VERSION}
+
+
+class PlaceholderImages:
+    """
+    Generated sample images, cached on disk and tracked in a JSON manifest.
+
+    A path matching PLACEHOLDER_SPECS is rendered the first time it is
+    requested and served as a plain file after that. The manifest records the
+    template hash and drawing version each file was made from, so a changed
+    template or drawing re-renders lazily too. Files that are not in the
+    manifest (uploaded or made by an older script) are never replaced.
+    Nothing is read or rendered at boot.
+    """
+
+    def __init__(self, staticDir: str = STATIC_DIR, manifestPath: str = PLACEHOLDER_MANIFEST):
+        self.staticDir = staticDir
+        self.manifestPath = manifestPath
+        self._manifest: Optional[dict] = None
+        self._lock = threading.Lock()
+        self._inflight: dict = {}
+        # Paths already checked or rendered by this process, served without another look
+        self._verified: set = set()
+        self.generated = 0
+
+    def _loadManifest(self) -> dict:
+        try:
+            with open(self.manifestPath) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def manifest(self) -> dict:
+        with self._lock:
+            if self._manifest is None:
+                self._manifest = self._loadManifest()
+            return self._manifest
+
+    def _record(self, entries: dict) -> None:
+        with self._lock:
+            # Merge with what other worker processes wrote since this one loaded the manifest
+            manifest = self._loadManifest()
+            manifest.update(self._manifest or {})
+            manifest.update(entries)
+            self._manifest = manifest
+            os.makedirs(os.path.dirname(self.manifestPath) or ".", exist_ok=True)
+            temp = f"{self.manifestPath}.{os.getpid()}.part"
+            with open(temp, "w") as f:
+                json.dump(manifest, f, separators=(",", ":"))
+            os.replace(temp, self.manifestPath)
+
+    def needsRender(self, path: str) -> bool:
+        """Whether a generatable path is missing or was rendered from an outdated template or drawing"""
+        found = match_placeholder(path)
+        if found is None:
+            return False
+        filePath = os.path.join(self.staticDir, path)
+        if not os.path.exists(filePath):
+            return True
+        entry = self.manifest().get(path)
+        if entry is None:
+            return False
+        spec, match = found
+        templatePath = os.path.join(TEMPLATE_DIR, spec.template.format(**match.groupdict()))
+        return entry.get("version") != PLACEHOLDER_VERSION or entry.get("template") != template_digest(templatePath)
+
+    def isReferenced(self, spec: PlaceholderSpec, match: re.Match, path: str) -> bool:
+        if spec.referenced is None:
+            return int(match["id"]) <= (spec.maxId or 0)
+        with engine.connect() as conn:
+            row = conn.execute(text(spec.referenced), {"id": int(match["id"]), "url": f"/static/{path}"}).first()
+        return row is not None
+
+    def render(self, path: str) -> None:
+        """Render a placeholder and record it (blocking)"""
+        spec, match = match_placeholder(path)
+        if not os.path.exists(os.path.join(self.staticDir, path)) and not self.isReferenced(spec, match, path):
+            raise FileNotFoundError(f"No row references /static/{path}")
+        entry = render_placeholder(spec, match, os.path.join(self.staticDir, path))
+        self._record({path: entry})
+        self.generated += 1
+
+    def renderAll(self, paths: list, progress=None) -> None:
+        """Render many placeholders up front (no reference check) and write the manifest once"""
+        def renderOne(path):
+            spec, match = match_placeholder(path)
+            return path, render_placeholder(spec, match, os.path.join(self.staticDir, path))
+
+        entries = {}
+        with ThreadPoolExecutor() as executor:
+            for path, entry in executor.map(renderOne, paths):
+                entries[path] = entry
+                if progress is not None:
+                    progress.update(1)
+        self._record(entries)
+        self.generated += len(entries)
+
+    async def ensure(self, path: str) -> None:
+        """Render path if needed; concurrent requests for one path share the render"""
+        if path in self._verified:
+            return
+        if not await run_in_threadpool(self.needsRender, path):
+            self._verified.add(path)
+            return
+        task = self._inflight.get(path)
+        if task is None:
+            task = asyncio.ensure_future(run_in_threadpool(self.render, path))
+            self._inflight[path] = task
+            task.add_done_callback(lambda _: self._inflight.pop(path, None))
+        await asyncio.shield(task)
+        self._verified.add(path)
+
+    def stats(self) -> dict:
+        return {"generated": self.generated, "manifest_entries": len(self._manifest or {})}
+
+
+class LazyStaticFiles(StaticFiles):
+    """StaticFiles that renders missing or outdated sample images before serving them"""
+
+    def __init__(self, *args, placeholders: PlaceholderImages, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.placeholders = placeholders
+
+    async def get_response(self, path: str, scope):
+        path = path.replace(os.sep, "/")
+        if match_placeholder(path) is not None:
+            try:
+                await self.placeholders.ensure(path)
+            except FileNotFoundError as e:
+                # Unreferenced id or missing template: answer like any other missing file
+                logger.warning(f"Cannot render placeholder {path}: {str(e)}")
+                raise StarletteHTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+
+# Shared placeholder cache for the /static mount
+placeholder_images = PlaceholderImages()
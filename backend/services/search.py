@@ -0,0 +1,272 @@
+"""
+Elasticsearch Search Service
+Owns the Elasticsearch clients used by the catalog endpoints
+"""
+import os
+import json
+import base64
+import logging
+from typing import AsyncIterator, Optional
+from elastic_transport import JsonSerializer
+from elasticsearch import AsyncElasticsearch, Elasticsearch, NotFoundError
+from db.models import M_Laptop
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Connection configurations
+ELASTICSEARCH_HOST = os.getenv("ELASTICSEARCH_HOST", "elasticsearch")
+ELASTICSEARCH_PORT = int(os.getenv("ELASTICSEARCH_PORT", "9200"))
+ELASTICSEARCH_URL = os.getenv(
+    "ELASTICSEARCH_URL", f"http://{ELASTICSEARCH_HOST}:{ELASTICSEARCH_PORT}"
+)
+
+# Pool, timeout and retry configurations
+ES_CONNECTIONS_PER_NODE = int(os.getenv("ES_CONNECTIONS_PER_NODE", "200"))
+ES_REQUEST_TIMEOUT = float(os.getenv("ES_REQUEST_TIMEOUT", "5"))
+ES_MAX_RETRIES = int(os.getenv("ES_MAX_RETRIES", "2"))
+ES_RETRY_ON_TIMEOUT = os.getenv("ES_RETRY_ON_TIMEOUT", "true").lower() == "true"
+ES_RETRY_ON_STATUS = (429, 502, 503, 504)
+
+LAPTOPS_INDEX = "laptops"
+
+# Pagination configurations
+ES_TOTAL_HITS_CAP = int(os.getenv("ES_TOTAL_HITS_CAP", "1000"))
+ES_PIT_KEEP_ALIVE = os.getenv("ES_PIT_KEEP_ALIVE", "2m")
+DEFAULT_CURSOR_PAGE_SIZE = 20
+ES_SCAN_PAGE_SIZE = int(os.getenv("ES_SCAN_PAGE_SIZE", "1000"))
+START_CURSOR = "*"
+
+# Projection profiles accepted by the catalog endpoints (see M_Laptop.PROJECTION_PROFILES)
+PROJECTION_PATTERN = "^(card|detail|admin)$"
+
+# Filters that get facet counts; each is computed with every other facet filter applied
+FACET_FIELDS = ("brand", "cpu", "ram_amount", "storage_amount", "screen_size", "sale_price")
+# CPU families and screen sizes offered by the catalog sidebar (V_FilterSection)
+CPU_FACET_VALUES = [
+    "ryzen 3", "ryzen 5", "ryzen 7", "ryzen 9",
+    "core i3", "core i5", "core i7", "core i9",
+    "m1", "m2", "m3", "m4",
+]
+SCREEN_SIZE_FACET_VALUES = [13, 14, 15, 16, 17]
+
+_async_client: Optional[AsyncElasticsearch] = None
+_raw_client: Optional[AsyncElasticsearch] = None
+_sync_client: Optional[Elasticsearch] = None
+
+
+class RawJsonSerializer(JsonSerializer):
+    """Encodes request bodies as usual but hands response bodies back undecoded"""
+
+    def loads(self, data: bytes) -> bytes:
+        return data
+
+
+def _client_options() -> dict:
+    """Shared connection options for the async and sync clients"""
+    return {
+        "hosts": [ELASTICSEARCH_URL],
+        "connections_per_node": ES_CONNECTIONS_PER_NODE,
+        "request_timeout": ES_REQUEST_TIMEOUT,
+        "max_retries": ES_MAX_RETRIES,
+        "retry_on_timeout": ES_RETRY_ON_TIMEOUT,
+        "retry_on_status": ES_RETRY_ON_STATUS,
+    }
+
+
+async def startup_search_client() -> AsyncElasticsearch:
+    """Create the shared async client (called from the FastAPI lifespan)"""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncElasticsearch(**_client_options())
+        logger.info(
+            f"Elasticsearch client ready for {ELASTICSEARCH_URL} "
+            f"(pool={ES_CONNECTIONS_PER_NODE}, timeout={ES_REQUEST_TIMEOUT}s, retries={ES_MAX_RETRIES})"
+        )
+    return _async_client
+
+
+async def shutdown_search_client() -> None:
+    """Close the shared clients and release their connection pools"""
+    global _async_client, _raw_client, _sync_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+    if _raw_client is not None:
+        await _raw_client.close()
+        _raw_client = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+def get_search_client() -> AsyncElasticsearch:
+    """Get the shared async client used by the read endpoints"""
+    global _async_client
+    if _async_client is None:
+        # Outside of the app lifespan (scripts, shell) create it on first use
+        _async_client = AsyncElasticsearch(**_client_options())
+    return _async_client
+
+
+def get_raw_search_client() -> AsyncElasticsearch:
+    """Get the async client whose response bodies are the raw JSON bytes (see services.search_raw)"""
+    global _raw_client
+    if _raw_client is None:
+        _raw_client = AsyncElasticsearch(**_client_options(), serializer=RawJsonSerializer())
+    return _raw_client
+
+
+def get_sync_search_client() -> Elasticsearch:
+    """Get the shared sync client used by write paths that run in the threadpool"""
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = Elasticsearch(**_client_options())
+    return _sync_client
+
+
+def source_filter(profile: str) -> dict:
+    """_source filter for a projection profile"""
+    if profile == "admin":
+        # Everything except the Logstash bookkeeping fields
+        return {"excludes": ["@timestamp", "@version", "type"]}
+    return {"includes": list(M_Laptop.projectionFields(profile))}
+
+
+# Cursor utilities
+def encode_cursor(pitId: str, searchAfter: list) -> str:
+    """Pack a point-in-time id and search_after values into an opaque token"""
+    payload = json.dumps({"pit": pitId, "after": searchAfter}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, list]:
+    """Unpack a token from encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return payload["pit"], payload["after"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+async def paged_search(
+    body: dict,
+    limit: Optional[int],
+    page: int = 1,
+    cursor: Optional[str] = None,
+    approximateTotal: bool = False,
+) -> dict:
+    """
+    Run a laptops search with offset or cursor pagination.
+
+    Offset mode pages with from/size. Cursor mode (cursor="*" to start, then
+    the returned next_cursor) pages with search_after over a point-in-time,
+    tie-broken on id, so deep pages cost the same as the first one. With
+    approximateTotal the hit count stops at ES_TOTAL_HITS_CAP. In both modes
+    one extra hit is fetched to report has_more.
+    """
+    es = get_search_client()
+    body = dict(body)
+    body["track_total_hits"] = ES_TOTAL_HITS_CAP if approximateTotal else True
+
+    if cursor is None:
+        if limit is not None:
+            body["size"] = limit + 1
+            body["from"] = (page - 1) * limit
+        results = await es.search(index=LAPTOPS_INDEX, body=body)
+        hits = results["hits"]["hits"]
+        total = results["hits"]["total"]
+        if limit is not None:
+            hasMore = len(hits) > limit
+            hits = hits[:limit]
+        else:
+            hasMore = len(hits) < total["value"] or total["relation"] == "gte"
+        return {
+            "hits": hits,
+            "total_count": total["value"],
+            "total_relation": total["relation"],
+            "has_more": hasMore,
+            "next_cursor": None,
+            "aggregations": results.get("aggregations"),
+        }
+
+    size = limit or DEFAULT_CURSOR_PAGE_SIZE
+    if cursor == START_CURSOR:
+        pit = await es.open_point_in_time(index=LAPTOPS_INDEX, keep_alive=ES_PIT_KEEP_ALIVE)
+        pitId, searchAfter = pit["id"], None
+    else:
+        pitId, searchAfter = decode_cursor(cursor)
+
+    body.pop("from", None)
+    body["size"] = size + 1
+    body["sort"] = list(body.get("sort") or ["_score"]) + [{"id": {"order": "asc"}}]
+    body["pit"] = {"id": pitId, "keep_alive": ES_PIT_KEEP_ALIVE}
+    if searchAfter:
+        body["search_after"] = searchAfter
+
+    try:
+        results = await es.search(body=body)
+    except NotFoundError:
+        raise ValueError("Cursor expired, restart with cursor=*")
+
+    hits = results["hits"]["hits"]
+    total = results["hits"]["total"]
+    pitId = results.get("pit_id", pitId)
+    hasMore = len(hits) > size
+    hits = hits[:size]
+
+    nextCursor = None
+    if hasMore:
+        nextCursor = encode_cursor(pitId, hits[-1]["sort"])
+    else:
+        # Last page: release the point-in-time instead of waiting for keep_alive
+        try:
+            await es.close_point_in_time(id=pitId)
+        except Exception as e:
+            logger.warning(f"Failed to close point-in-time: {str(e)}")
+
+    return {
+        "hits": hits,
+        "total_count": total["value"],
+        "total_relation": total["relation"],
+        "has_more": hasMore,
+        "next_cursor": nextCursor,
+        "aggregations": results.get("aggregations"),
+    }
+
+
+async def scan_hits(body: dict, pageSize: int = ES_SCAN_PAGE_SIZE) -> AsyncIterator[list]:
+    """
+    Yield every hit of a laptops search, one page of hits at a time.
+
+    Pages are read with search_after over a point-in-time (tie-broken on id),
+    so only one page is held in memory whatever the result size, and writes
+    during the scan don't shift rows between pages. The point-in-time is
+    closed when the scan finishes or the consumer stops early.
+    """
+    es = get_search_client()
+    pit = await es.open_point_in_time(index=LAPTOPS_INDEX, keep_alive=ES_PIT_KEEP_ALIVE)
+    pitId = pit["id"]
+
+    body = dict(body)
+    body.pop("from", None)
+    body["size"] = pageSize
+    body["sort"] = list(body.get("sort") or ["_doc"]) + [{"id": {"order": "asc"}}]
+    body["track_total_hits"] = False
+    try:
+        while True:
+            body["pit"] = {"id": pitId, "keep_alive": ES_PIT_KEEP_ALIVE}
+            results = await es.search(body=body)
+            pitId = results.get("pit_id", pitId)
+            hits = results["hits"]["hits"]
+            if hits:
+                yield hits
+            if len(hits) < pageSize:
+                break
+            body["search_after"] = hits[-1]["sort"]
+    finally:
+        try:
+            await es.close_point_in_time(id=pitId)
+        except Exception as e:
+            logger.warning(f"Failed to close point-in-time: {str(e)}")
@@ -0,0 +1,159 @@
+"""
+Search Result Cache
+Bounded in-process cache for catalog search/filter responses
+"""
+import os
+import json
+import logging
+import threading
+from typing import Any, Callable, Hashable, Iterable, Optional
+from cachetools import TTLCache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache configurations
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "30"))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory cost of a cached response by its JSON length"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache that reports evicted and expired entries back to its owner"""
+
+    def __init__(self, maxsize, ttl, getsizeof, on_evict: Callable, on_expire: Callable):
+        super().__init__(maxsize=maxsize, ttl=ttl, getsizeof=getsizeof)
+        self._on_evict = on_evict
+        self._on_expire = on_expire
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for key, _ in expired:
+            self._on_expire(key)
+        return expired
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._on_evict(key)
+        return key, value
+
+
+class SearchResultCache:
+    """
+    LRU + TTL cache bounded by an approximate byte budget.
+
+    Entries are tagged (e.g. "brand:Dell", "laptop:42") so write paths can
+    invalidate only the responses they affect. The cache is per worker
+    process; the TTL bounds staleness for writes made through other workers.
+    """
+
+    def __init__(self, maxBytes: int = SEARCH_CACHE_MAX_BYTES, ttl: float = SEARCH_CACHE_TTL):
+        self.maxBytes = maxBytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._tags: dict[str, set] = {}
+        self._entryTags: dict[Hashable, tuple] = {}
+        self._cache = _CountingTTLCache(
+            maxsize=maxBytes,
+            ttl=ttl,
+            getsizeof=lambda entry: entry[1],
+            on_evict=self._handleEvict,
+            on_expire=self._handleExpire,
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = ()) -> None:
+        """Store value under key, tagged for later invalidation"""
+        size = estimate_size(value)
+        with self._lock:
+            self._forget(key)
+            try:
+                self._cache[key] = (value, size)
+            except ValueError:
+                # Single response larger than the whole budget
+                logger.warning(f"Search cache entry of {size} bytes exceeds budget, not cached")
+                return
+            entryTags = tuple(set(tags))
+            self._entryTags[key] = entryTags
+            for tag in entryTags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of the given tags"""
+        removed = 0
+        with self._lock:
+            for tag in set(tags):
+                for key in list(self._tags.get(tag, ())):
+                    self._cache.pop(key, None)
+                    self._forget(key)
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._cache.clear()
+            self._tags.clear()
+            self._entryTags.clear()
+
+    def stats(self) -> dict:
+        """Counters used to size the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "bytes": self._cache.currsize,
+                "max_bytes": self.maxBytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _forget(self, key: Hashable) -> None:
+        """Remove key from the tag index (caller holds the lock)"""
+        for tag in self._entryTags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _handleEvict(self, key: Hashable) -> None:
+        self.evictions += 1
+        self._forget(key)
+
+    def _handleExpire(self, key: Hashable) -> None:
+        self.expirations += 1
+        self._forget(key)
+
+
+# Shared cache for the catalog endpoints
+search_cache = SearchResultCache()
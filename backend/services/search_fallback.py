@@ -0,0 +1,372 @@
+"""
+Postgres Search Fallback
+Serves /laptops/search and /laptops/filter from Postgres while Elasticsearch is unavailable
+"""
+import os
+import re
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Iterator, Optional
+from fastapi.concurrency import run_in_threadpool
+from elasticsearch import ApiError, TransportError
+from sqlalchemy import Float, case, cast, func, literal_column, or_, select
+from sqlalchemy.orm import load_only
+from db.models import M_Laptop
+from db.session import SessionLocal
+from services.search import (
+    CPU_FACET_VALUES,
+    DEFAULT_CURSOR_PAGE_SIZE,
+    ES_SCAN_PAGE_SIZE,
+    ES_TOTAL_HITS_CAP,
+    SCREEN_SIZE_FACET_VALUES,
+    START_CURSOR,
+    decode_cursor,
+    encode_cursor,
+    get_search_client,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Health check configurations
+SEARCH_HEALTH_INTERVAL = float(os.getenv("SEARCH_HEALTH_INTERVAL", "5"))
+SEARCH_HEALTH_TIMEOUT = float(os.getenv("SEARCH_HEALTH_TIMEOUT", "1"))
+
+# Cursors issued by this engine carry this marker instead of a point-in-time id
+POSTGRES_CURSOR = "pg"
+# Elasticsearch's default page size, used when the caller passes no limit
+DEFAULT_PAGE_SIZE = 10
+# Free-text columns (weight) are only cast to a number when they match this
+NUMERIC_TEXT_PATTERN = r"^[0-9]+(\.[0-9]+)?$"
+
+
+class SearchBackendSelector:
+    """
+    Decides whether catalog reads go to Elasticsearch or to Postgres.
+
+    The cluster is pinged at most every SEARCH_HEALTH_INTERVAL seconds; a
+    request that fails with a connection error marks it down right away, so
+    only the first request after an outage pays for the failure.
+    """
+
+    def __init__(self, interval: float = SEARCH_HEALTH_INTERVAL):
+        self.interval = interval
+        self._healthy = True
+        self._checkedAt = 0.0
+        self._lock = asyncio.Lock()
+        self.fallbackRequests = 0
+
+    async def useElasticsearch(self) -> bool:
+        """Whether Elasticsearch is currently considered healthy"""
+        if time.monotonic() - self._checkedAt < self.interval:
+            return self._healthy
+        async with self._lock:
+            if time.monotonic() - self._checkedAt >= self.interval:
+                try:
+                    healthy = await get_search_client().options(
+                        request_timeout=SEARCH_HEALTH_TIMEOUT, max_retries=0
+                    ).ping()
+                except Exception:
+                    healthy = False
+                self._setHealthy(healthy)
+        return self._healthy
+
+    def markDown(self, error: Exception) -> None:
+        """Record a failed Elasticsearch request and switch to Postgres until the next check"""
+        logger.warning(f"Elasticsearch unavailable, using Postgres search: {str(error)}")
+        self._setHealthy(False)
+
+    def status(self) -> dict:
+        return {
+            "engine": "elasticsearch" if self._healthy else "postgres",
+            "checked_seconds_ago": round(time.monotonic() - self._checkedAt, 1) if self._checkedAt else None,
+            "fallback_requests": self.fallbackRequests,
+        }
+
+    def _setHealthy(self, healthy: bool) -> None:
+        if healthy and not self._healthy:
+            logger.info("Elasticsearch is back, switching catalog search back to it")
+        self._healthy = healthy
+        self._checkedAt = time.monotonic()
+
+
+# Shared selector for the catalog endpoints
+search_backend = SearchBackendSelector()
+
+
+def is_unavailable_error(error: Exception) -> bool:
+    """Connection failures, timeouts and 5xx responses mean the cluster can't serve the request"""
+    if isinstance(error, TransportError):
+        return True
+    return isinstance(error, ApiError) and error.meta.status >= 500
+
+
+def is_postgres_cursor(cursor: Optional[str]) -> bool:
+    """Whether a cursor was issued by this engine (paging stays on the engine it started on)"""
+    if not cursor or cursor == START_CURSOR:
+        return False
+    try:
+        return decode_cursor(cursor)[0] == POSTGRES_CURSOR
+    except ValueError:
+        return False
+
+
+async def run_catalog_search(cursor: Optional[str], elasticsearch: Callable[[], Awaitable[dict]],
+                             postgres: Callable[[], dict]) -> dict:
+    """
+    Run a catalog read on Elasticsearch, or on Postgres when it is unavailable.
+
+    elasticsearch is a coroutine function, postgres a blocking function run in
+    the threadpool; both return a paged_search-shaped dict. ValueErrors
+    (bad or expired cursors) propagate from either engine.
+    """
+    if not is_postgres_cursor(cursor) and await search_backend.useElasticsearch():
+        try:
+            return await elasticsearch()
+        except ValueError:
+            raise
+        except Exception as e:
+            if not is_unavailable_error(e):
+                raise
+            search_backend.markDown(e)
+    search_backend.fallbackRequests += 1
+    return await run_in_threadpool(postgres)
+
+
+def _contains(column, value: str):
+    """Case-insensitive substring match (served by the trigram indexes)"""
+    return column.icontains(value, autoescape=True)
+
+
+def _active():
+    return or_(M_Laptop.isActive, M_Laptop.isActive.is_(None))
+
+
+def _screen_size_range(size: int):
+    """Screen size buckets cover [size, size + 0.6] inches"""
+    return M_Laptop.screenSize.between(size, size + 0.6)
+
+
+def filter_conditions(filters: dict) -> dict:
+    """Named SQL conditions mirroring the Elasticsearch clauses built by /laptops/filter"""
+    conditions = {}
+    brand = filters.get("brand")
+    if brand and "all" not in brand:
+        conditions["brand"] = M_Laptop.brand.in_(brand)
+    if filters.get("sub_brand"):
+        conditions["sub_brand"] = M_Laptop.subBrand.in_(filters["sub_brand"])
+    if filters.get("ram_amount"):
+        conditions["ram_amount"] = M_Laptop.ramAmount.in_(filters["ram_amount"])
+    if filters.get("storage_amount"):
+        conditions["storage_amount"] = M_Laptop.storageAmount.in_(filters["storage_amount"])
+    if filters.get("cpu"):
+        conditions["cpu"] = or_(*[_contains(M_Laptop.cpu, v) for v in filters["cpu"]])
+    if filters.get("vga"):
+        conditions["vga"] = or_(*[_contains(M_Laptop.vga, v) for v in filters["vga"]])
+    if filters.get("usage_type"):
+        conditions["usage_type"] = M_Laptop.usageType.in_(filters["usage_type"])
+    if filters.get("screen_size"):
+        conditions["screen_size"] = or_(*[_screen_size_range(size) for size in filters["screen_size"]])
+
+    # weight is free text: rows that don't hold a plain number are filtered out rather than failing the cast
+    weight = case((M_Laptop.weight.regexp_match(NUMERIC_TEXT_PATTERN), cast(M_Laptop.weight, Float)))
+    if filters.get("weight_min") is not None and filters.get("weight_max") is not None:
+        conditions["weight"] = weight.between(filters["weight_min"], filters["weight_max"])
+    elif filters.get("weight_min") is not None:
+        conditions["weight"] = weight >= filters["weight_min"]
+    elif filters.get("weight_max") is not None:
+        conditions["weight"] = weight <= filters["weight_max"]
+
+    if filters.get("price_min") is not None and filters.get("price_max") is not None:
+        conditions["sale_price"] = M_Laptop.price.between(filters["price_min"], filters["price_max"])
+    elif filters.get("price_min") is not None:
+        conditions["sale_price"] = M_Laptop.price >= filters["price_min"]
+    elif filters.get("price_max") is not None:
+        conditions["sale_price"] = M_Laptop.price <= filters["price_max"]
+    return conditions
+
+
+def _prefix_tsquery(terms: list):
+    """tsquery requiring every term, each as a prefix (operator "and" like the Elasticsearch query)"""
+    lexemes = [lexeme for lexeme in (re.sub(r"[^\w]", "", term) for term in terms) if lexeme]
+    return func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{lexeme}:*" for lexeme in lexemes))
+
+
+def _sort_columns(sort: str, rank=None) -> list:
+    """ORDER BY for a sort option, tie-broken on id like the Elasticsearch cursor"""
+    sort_options = {
+        "latest": [M_Laptop.updatedAt.desc().nullslast()],
+        "price_asc": [M_Laptop.price.asc()],
+        "price_desc": [M_Laptop.price.desc()],
+    }
+    if sort in sort_options:
+        columns = sort_options[sort]
+    elif rank is not None:
+        columns = [rank.desc()]
+    else:
+        columns = sort_options["latest"]
+    return columns + [M_Laptop.laptopId.asc()]
+
+
+def _paged(db, conditions: list, order: list, limit: Optional[int], page: int,
+           cursor: Optional[str], approximateTotal: bool, fields: str) -> dict:
+    """Run a laptops query and shape the result like services.search.paged_search"""
+    if cursor is None:
+        size = limit if limit is not None else DEFAULT_PAGE_SIZE
+        offset = (page - 1) * limit if limit is not None else 0
+    else:
+        size = limit or DEFAULT_CURSOR_PAGE_SIZE
+        offset = 0
+        if cursor != START_CURSOR:
+            marker, after = decode_cursor(cursor)
+            if marker != POSTGRES_CURSOR:
+                # Issued by Elasticsearch before the outage
+                raise ValueError("Cursor expired, restart with cursor=*")
+            offset = int(after[0])
+
+    if approximateTotal:
+        capped = select(M_Laptop.laptopId).where(*conditions).limit(ES_TOTAL_HITS_CAP + 1).subquery()
+        total = db.scalar(select(func.count()).select_from(capped))
+        relation = "gte" if total > ES_TOTAL_HITS_CAP else "eq"
+        total = min(total, ES_TOTAL_HITS_CAP)
+    else:
+        total = db.scalar(select(func.count()).select_from(M_Laptop).where(*conditions))
+        relation = "eq"
+
+    laptops = db.scalars(
+        select(M_Laptop)
+        .options(load_only(*M_Laptop.projectionColumns(fields)))
+        .where(*conditions)
+        .order_by(*order)
+        .offset(offset)
+        .limit(size + 1)
+    ).all()
+    hasMore = len(laptops) > size
+    laptops = laptops[:size]
+    if limit is None and cursor is None:
+        hasMore = len(laptops) < total
+
+    fieldNames = M_Laptop.projectionFields(fields)
+    return {
+        "hits": [{"_id": str(laptop.laptopId), "_source": laptop.toDict(fieldNames)} for laptop in laptops],
+        "total_count": total,
+        "total_relation": relation,
+        "has_more": hasMore,
+        "next_cursor": encode_cursor(POSTGRES_CURSOR, [offset + size]) if cursor is not None and hasMore else None,
+        "aggregations": None,
+    }
+
+
+def search_laptops(query: str, terms: list, limit: int, page: int = 1, sort: str = "relevant",
+                   cursor: Optional[str] = None, approximateTotal: bool = False, fields: str = "card") -> dict:
+    """
+    Full-text laptop search roughly matching the Elasticsearch query.
+
+    A meaningful term must appear in the name; the laptop must then either
+    contain the whole phrase in its name or match every term (as a prefix)
+    in the weighted search_vector. Ranking favours the phrase in the name,
+    then ts_rank over brand > name > cpu/vga, then trigram similarity.
+    """
+    terms = [t for t in terms if t.strip()] or query.split()
+    tsQuery = _prefix_tsquery(terms)
+    phrase = _contains(M_Laptop.modelName, query)
+    conditions = [
+        _active(),
+        or_(*[_contains(M_Laptop.modelName, t) for t in terms]),
+        or_(phrase, M_Laptop.searchVector.op("@@")(tsQuery), *[_contains(M_Laptop.brand, t) for t in terms]),
+    ]
+    rank = (
+        case((phrase, 6.0), else_=0.0)
+        + func.ts_rank(M_Laptop.searchVector, tsQuery) * 4
+        + func.similarity(M_Laptop.modelName, query) * 2
+    )
+    with SessionLocal() as db:
+        return _paged(db, conditions, _sort_columns(sort, rank), limit, page, cursor, approximateTotal, fields)
+
+
+def filter_laptops(filters: dict, limit: Optional[int], page: int = 1, sort: str = "latest",
+                   cursor: Optional[str] = None, approximateTotal: bool = False, fields: str = "card",
+                   facets: bool = False, priceInterval: int = 5_000_000) -> dict:
+    """Filtered laptop listing (and optionally facet counts) matching /laptops/filter"""
+    conditions = filter_conditions(filters)
+    with SessionLocal() as db:
+        results = _paged(
+            db, [_active(), *conditions.values()], _sort_columns(sort), limit, page, cursor, approximateTotal, fields
+        )
+        if facets:
+            results["facets"] = _facet_counts(db, conditions, priceInterval)
+    return results
+
+
+def iter_filter_pages(filters: dict, sort: str = "latest", fields: str = "card",
+                      pageSize: int = ES_SCAN_PAGE_SIZE) -> Iterator[list]:
+    """
+    Every laptop matching /laptops/filter, as pages of API dicts.
+
+    Rows are read through a server-side cursor (yield_per), so like
+    services.search.scan_hits only one page is held in memory.
+    """
+    conditions = filter_conditions(filters)
+    fieldNames = M_Laptop.projectionFields(fields)
+    with SessionLocal() as db:
+        laptops = db.scalars(
+            select(M_Laptop)
+            .options(load_only(*M_Laptop.projectionColumns(fields)))
+            .where(_active(), *conditions.values())
+            .order_by(*_sort_columns(sort))
+            .execution_options(yield_per=pageSize)
+        )
+        for page in laptops.partitions():
+            yield [laptop.toDict(fieldNames) for laptop in page]
+
+
+def facet_counts(filters: dict, priceInterval: int) -> dict:
+    """Facet counts only (the hits were served from the cache)"""
+    with SessionLocal() as db:
+        return {"aggregations": None, "facets": _facet_counts(db, filter_conditions(filters), priceInterval)}
+
+
+def _facet_counts(db, conditions: dict, priceInterval: int) -> dict:
+    """Facets in the shape of parse_facet_aggs, each computed without its own filter"""
+    def where(name):
+        return [_active()] + [c for k, c in conditions.items() if k != name]
+
+    def terms(column, name, size):
+        rows = db.execute(
+            select(column, func.count())
+            .where(*where(name), column.is_not(None))
+            .group_by(column)
+            .order_by(func.count().desc(), column)
+            .limit(size)
+        ).all()
+        return [{"value": value, "count": count} for value, count in rows]
+
+    facets = {
+        "brand": terms(M_Laptop.brand, "brand", 50),
+        "ram_amount": terms(M_Laptop.ramAmount, "ram_amount", 20),
+        "storage_amount": terms(M_Laptop.storageAmount, "storage_amount", 20),
+    }
+
+    cpuCounts = db.execute(
+        select(*[func.count().filter(_contains(M_Laptop.cpu, v)) for v in CPU_FACET_VALUES]).where(*where("cpu"))
+    ).one()
+    facets["cpu"] = [{"value": v, "count": c} for v, c in zip(CPU_FACET_VALUES, cpuCounts)]
+
+    screenCounts = db.execute(
+        select(*[func.count().filter(_screen_size_range(v)) for v in SCREEN_SIZE_FACET_VALUES]).where(*where("screen_size"))
+    ).one()
+    facets["screen_size"] = [{"value": v, "count": c} for v, c in zip(SCREEN_SIZE_FACET_VALUES, screenCounts)]
+
+    priceWhere = where("sale_price")
+    low, high = db.execute(select(func.min(M_Laptop.price), func.max(M_Laptop.price)).where(*priceWhere)).one()
+    bucket = (M_Laptop.price // priceInterval * priceInterval).label("bucket")
+    counts = {int(k): c for k, c in db.execute(select(bucket, func.count()).where(*priceWhere).group_by(bucket)).all()}
+    histogram = []
+    if low is not None:
+        # Like the Elasticsearch histogram, empty buckets between min and max are included
+        start = (low // priceInterval) * priceInterval
+        for key in range(start, high + 1, priceInterval):
+            histogram.append({"from": key, "count": counts.get(key, 0)})
+    facets["sale_price"] = {"min": low, "max": high, "histogram": histogram}
+    return facets
@@ -0,0 +1,258 @@
+"""
+Elasticsearch Index Management
+Owns the laptops index definition (settings, mappings, version) and the alias swap
+"""
+import os
+import time
+import logging
+from typing import Optional
+from elasticsearch import Elasticsearch
+from db.models import M_Laptop
+from services.search import LAPTOPS_INDEX
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bump whenever settings or mappings change; a mismatch with the live index
+# is reported at startup and fixed by commands/rebuild_search_index.py
+LAPTOPS_MAPPING_VERSION = 3
+
+LAPTOPS_SHARDS = int(os.getenv("ES_LAPTOPS_SHARDS", "1"))
+LAPTOPS_REPLICAS = int(os.getenv("ES_LAPTOPS_REPLICAS", "0"))
+
+# Ingest pipeline every write to the index goes through (index.default_pipeline)
+LAPTOPS_PIPELINE = "laptops-normalize"
+
+# Substring sub-fields index every 2..10 character slice of the value
+SUBSTRING_MIN_GRAM = 2
+SUBSTRING_MAX_GRAM = 10
+
+_index_current = False
+
+
+def _text_with_keyword(ngram: bool = False) -> dict:
+    """Text field with the .keyword sub-field the queries filter and aggregate on"""
+    fields = {"keyword": {"type": "keyword", "ignore_above": 256}}
+    if ngram:
+        fields["ngram"] = {
+            "type": "text",
+            "analyzer": "substring_index",
+            "search_analyzer": "substring_search",
+        }
+    return {"type": "text", "fields": fields}
+
+
+LAPTOPS_INDEX_BODY = {
+    "settings": {
+        "index": {
+            "number_of_shards": LAPTOPS_SHARDS,
+            "number_of_replicas": LAPTOPS_REPLICAS,
+            "max_ngram_diff": SUBSTRING_MAX_GRAM - SUBSTRING_MIN_GRAM,
+            # Newest first on disk, so /laptops/latest can stop after `size` docs
+            "sort.field": "inserted_at",
+            "sort.order": "desc",
+            "sort.missing": "_last",
+            "default_pipeline": LAPTOPS_PIPELINE,
+        },
+        "analysis": {
+            "tokenizer": {
+                "substring_ngram": {
+                    "type": "ngram",
+                    "min_gram": SUBSTRING_MIN_GRAM,
+                    "max_gram": SUBSTRING_MAX_GRAM,
+                    "token_chars": [],
+                },
+            },
+            "analyzer": {
+                "substring_index": {
+                    "type": "custom",
+                    "tokenizer": "substring_ngram",
+                    "filter": ["lowercase", "asciifolding"],
+                },
+                "substring_search": {
+                    "type": "custom",
+                    "tokenizer": "keyword",
+                    "filter": ["lowercase", "asciifolding"],
+                },
+            },
+        },
+    },
+    "mappings": {
+        "_meta": {"mapping_version": LAPTOPS_MAPPING_VERSION},
+        # Unknown fields (e.g. Logstash's @timestamp) stay in _source but are not indexed
+        "dynamic": False,
+        "properties": {
+            "id": {"type": "integer"},
+            "brand": _text_with_keyword(),
+            "sub_brand": _text_with_keyword(),
+            "name": _text_with_keyword(),
+            "description": {"type": "text"},
+            "usage_type": _text_with_keyword(),
+            "cpu": _text_with_keyword(ngram=True),
+            "vga": _text_with_keyword(ngram=True),
+            "ram_amount": {"type": "integer"},
+            "ram_type": {"type": "keyword"},
+            "storage_amount": {"type": "integer"},
+            "storage_type": {"type": "keyword"},
+            "webcam_resolution": {"type": "keyword"},
+            "screen_size": {"type": "float"},
+            "screen_resolution": {"type": "keyword"},
+            "screen_refresh_rate": {"type": "integer"},
+            "screen_brightness": {"type": "integer"},
+            "battery_capacity": {"type": "float"},
+            "battery_cells": {"type": "integer"},
+            "weight": {"type": "float"},
+            "default_os": {"type": "keyword"},
+            "warranty": {"type": "integer"},
+            "width": {"type": "float"},
+            "depth": {"type": "float"},
+            "height": {"type": "float"},
+            "number_usb_a_ports": {"type": "integer"},
+            "number_usb_c_ports": {"type": "integer"},
+            "number_hdmi_ports": {"type": "integer"},
+            "number_ethernet_ports": {"type": "integer"},
+            "number_audio_jacks": {"type": "integer"},
+            "product_images": {"type": "keyword", "index": False, "doc_values": False},
+            # Only returned in _source, never searched
+            "image_variants": {"type": "object", "enabled": False},
+            "quantity": {"type": "integer"},
+            "original_price": {"type": "long"},
+            "sale_price": {"type": "long"},
+            "rate": {"type": "float"},
+            "num_rate": {"type": "integer"},
+            "is_active": {"type": "boolean"},
+            "inserted_at": {"type": "date"},
+            "updated_at": {"type": "date"},
+        },
+    },
+}
+
+
+# product_images is stored as a JSON array string in Postgres (image_variants as a
+# JSON object string). Documents indexed through the pipeline (bulk loads, _reindex
+# from a legacy index) keep them in _source as real JSON, so read paths can return
+# _source bytes untouched. Partial updates skip ingest pipelines, but the outbox
+# worker already sends toDict values.
+LAPTOPS_PIPELINE_BODY = {
+    "description": "Normalize laptop documents before indexing",
+    "processors": [
+        {
+            "json": {
+                "field": "product_images",
+                "if": "ctx.product_images instanceof String",
+                "on_failure": [{"set": {"field": "product_images", "value": []}}],
+            }
+        },
+        {
+            "set": {
+                "field": "product_images",
+                "value": [],
+                "if": "ctx.containsKey('product_images') && !(ctx.product_images instanceof List)",
+            }
+        },
+        {
+            "json": {
+                "field": "image_variants",
+                "if": "ctx.image_variants instanceof String",
+                "on_failure": [{"set": {"field": "image_variants", "value": {}}}],
+            }
+        },
+    ],
+}
+
+
+def laptop_document(laptop: M_Laptop) -> dict:
+    """Elasticsearch document for a laptop row (all API fields, product_images as a list)"""
+    return laptop.toDict(M_Laptop.ADMIN_FIELDS)
+
+
+def new_index_name() -> str:
+    """Unique concrete index name for the current mapping version"""
+    return f"{LAPTOPS_INDEX}_v{LAPTOPS_MAPPING_VERSION}_{int(time.time())}"
+
+
+def put_laptops_pipeline(es: Elasticsearch) -> None:
+    """Create or update the ingest pipeline referenced by index.default_pipeline"""
+    es.ingest.put_pipeline(id=LAPTOPS_PIPELINE, **LAPTOPS_PIPELINE_BODY)
+
+
+def create_laptops_index(es: Elasticsearch, name: str) -> None:
+    """Create a concrete laptops index with the managed settings, mappings and ingest pipeline"""
+    put_laptops_pipeline(es)
+    es.indices.create(index=name, settings=LAPTOPS_INDEX_BODY["settings"], mappings=LAPTOPS_INDEX_BODY["mappings"])
+    logger.info(f"Created index {name} (mapping v{LAPTOPS_MAPPING_VERSION})")
+
+
+def get_live_mapping_version(es: Elasticsearch) -> Optional[int]:
+    """Mapping version of whatever the laptops name resolves to (None if unmanaged or missing)"""
+    if not es.indices.exists(index=LAPTOPS_INDEX):
+        return None
+    mappings = es.indices.get_mapping(index=LAPTOPS_INDEX)
+    versions = {m["mappings"].get("_meta", {}).get("mapping_version") for m in mappings.values()}
+    return versions.pop() if len(versions) == 1 else None
+
+
+def swap_laptops_alias(es: Elasticsearch, name: str, delete_old: bool = True) -> None:
+    """Atomically point the laptops alias at the given index"""
+    actions = [{"add": {"index": name, "alias": LAPTOPS_INDEX, "is_write_index": True}}]
+    old_indices = []
+    if es.indices.exists_alias(name=LAPTOPS_INDEX):
+        old_indices = [i for i in es.indices.get_alias(name=LAPTOPS_INDEX) if i != name]
+        actions.extend({"remove": {"index": i, "alias": LAPTOPS_INDEX}} for i in old_indices)
+    elif es.indices.exists(index=LAPTOPS_INDEX):
+        # Legacy concrete index created by Logstash's dynamic mapping
+        actions.append({"remove_index": {"index": LAPTOPS_INDEX}})
+    es.indices.update_aliases(actions=actions)
+    logger.info(f"Alias {LAPTOPS_INDEX} -> {name}")
+
+    if delete_old:
+        for old in old_indices:
+            es.indices.delete(index=old, ignore_unavailable=True)
+            logger.info(f"Deleted old index {old}")
+
+
+def rebuild_laptops_index(es: Elasticsearch, delete_old: bool = True) -> str:
+    """Copy the live laptops documents into a fresh index with the current mapping and swap the alias"""
+    name = new_index_name()
+    create_laptops_index(es, name)
+    if es.indices.exists(index=LAPTOPS_INDEX):
+        result = es.reindex(
+            source={"index": LAPTOPS_INDEX},
+            dest={"index": name},
+            wait_for_completion=True,
+            refresh=True,
+        )
+        logger.info(f"Reindexed {result.get('total', 0)} documents into {name}")
+    swap_laptops_alias(es, name, delete_old=delete_old)
+    return name
+
+
+def ensure_laptops_index(es: Elasticsearch) -> bool:
+    """
+    Make sure the laptops index exists and report whether it has the current mapping.
+
+    A missing index is created and aliased right away. An outdated or legacy
+    (Logstash-created) index is left serving traffic and only logged, so the
+    rebuild happens when an operator runs commands/rebuild_search_index.py.
+    """
+    global _index_current
+    if not es.indices.exists(index=LAPTOPS_INDEX):
+        name = new_index_name()
+        create_laptops_index(es, name)
+        swap_laptops_alias(es, name)
+        _index_current = True
+        return _index_current
+
+    version = get_live_mapping_version(es)
+    _index_current = version == LAPTOPS_MAPPING_VERSION
+    if not _index_current:
+        logger.warning(
+            f"Index {LAPTOPS_INDEX} has mapping version {version}, expected {LAPTOPS_MAPPING_VERSION}; "
+            f"run commands/rebuild_search_index.py"
+        )
+    return _index_current
+
+
+def laptops_index_is_current() -> bool:
+    """Whether the live index has the managed mapping (checked at startup)"""
+    return _index_current
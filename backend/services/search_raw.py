@@ -0,0 +1,121 @@
+"""
+Raw Search Responses
+Serves laptop hits as the _source bytes Elasticsearch returned, without decoding them
+"""
+import re
+import json
+import logging
+from typing import NamedTuple, Optional
+from fastapi import Response
+from services.search import ES_TOTAL_HITS_CAP, LAPTOPS_INDEX, get_raw_search_client
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Only what the read paths need; each hit then serializes as {"_id":"..","_source":{..}}
+RAW_FILTER_PATH = "hits.total,hits.hits._id,hits.hits._source"
+
+# Elasticsearch writes compact JSON with hit keys in a fixed order, so the layout
+# of a filtered response is known. "{"_id":" can't occur inside a _source: quotes
+# in string values are escaped, and documents have no nested _id keys.
+# hits.total is absent when the search sets track_total_hits to false
+_TOTAL = rb'"total":\{"value":(\d+),"relation":"(eq|gte)"\}'
+_HITS_START = re.compile(rb'\{"hits":\{(?:' + _TOTAL + rb',)?"hits":\[')
+_NO_HITS = re.compile(rb'\{(?:"hits":\{' + _TOTAL + rb'\})?\}')
+_HIT_START = re.compile(rb'\{"_id":"([^"\\]*)","_source":')
+
+
+class RawHits(NamedTuple):
+    total: int
+    relation: str
+    ids: list
+    sources: list
+
+
+def _decode_hits(raw: bytes) -> RawHits:
+    """Slow path for a response that doesn't have the expected layout"""
+    data = json.loads(raw)
+    hits = data.get("hits", {})
+    entries = hits.get("hits", [])
+    total = hits.get("total", {"value": len(entries), "relation": "eq"})
+    return RawHits(
+        total["value"],
+        total["relation"],
+        [h["_id"] for h in entries],
+        [json.dumps(h["_source"], ensure_ascii=False, separators=(",", ":")).encode() for h in entries],
+    )
+
+
+def split_hits(raw: bytes) -> RawHits:
+    """Slice each hit's _source out of a search response filtered with RAW_FILTER_PATH"""
+    empty = _NO_HITS.fullmatch(raw)
+    if empty:
+        return RawHits(int(empty[1] or 0), (empty[2] or b"eq").decode(), [], [])
+
+    head = _HITS_START.match(raw)
+    starts = list(_HIT_START.finditer(raw, head.end())) if head else []
+    valid = bool(starts) and starts[0].start() == head.end() and raw.endswith(b"}]}}")
+    sources = []
+    for current, following in zip(starts, starts[1:] + [None]):
+        if not valid:
+            break
+        # Each source ends right before the "}," that closes its hit (or "}]}}" for the last one)
+        end = following.start() - 2 if following else len(raw) - 4
+        valid = raw[end:end + 2] in (b"},", b"}]")
+        sources.append(raw[current.end():end])
+    if not valid:
+        logger.warning("Unexpected Elasticsearch response layout, decoding hits instead")
+        return _decode_hits(raw)
+    total, relation = (int(head[1]), head[2].decode()) if head[1] else (len(sources), "eq")
+    return RawHits(total, relation, [m[1].decode() for m in starts], sources)
+
+
+async def raw_search(body: dict) -> RawHits:
+    """Run a laptops search and slice the hits out of the undecoded response"""
+    response = await get_raw_search_client().search(index=LAPTOPS_INDEX, body=body, filter_path=RAW_FILTER_PATH)
+    return split_hits(response.body)
+
+
+async def raw_paged_search(body: dict, limit: Optional[int], page: int = 1, approximateTotal: bool = False) -> dict:
+    """
+    Offset-paged laptops search returning _source bytes (see services.search.paged_search).
+
+    The result carries "ids" and "sources" instead of "hits"; cursor paging
+    still goes through paged_search since it needs each hit's sort values.
+    """
+    body = dict(body)
+    body["track_total_hits"] = ES_TOTAL_HITS_CAP if approximateTotal else True
+    if limit is not None:
+        body["size"] = limit + 1
+        body["from"] = (page - 1) * limit
+    hits = await raw_search(body)
+
+    ids, sources = hits.ids, hits.sources
+    if limit is not None:
+        hasMore = len(sources) > limit
+        ids, sources = ids[:limit], sources[:limit]
+    else:
+        hasMore = len(sources) < hits.total or hits.relation == "gte"
+    return {
+        "ids": [int(i) for i in ids],
+        "sources": sources,
+        "total_count": hits.total,
+        "total_relation": hits.relation,
+        "has_more": hasMore,
+        "next_cursor": None,
+    }
+
+
+def json_array(items: list) -> bytes:
+    """Join already-encoded JSON values into an array"""
+    return b"[" + b",".join(items) + b"]"
+
+
+def splice_json(envelope: dict, key: str, raw: bytes) -> bytes:
+    """Encode envelope with raw JSON bytes inserted as its last member"""
+    head = json.dumps(envelope, ensure_ascii=False, separators=(",", ":"))[:-1].encode()
+    return head + (b"," if envelope else b"") + json.dumps(key).encode() + b":" + raw + b"}"
+
+
+def raw_json_response(body: bytes, headers: Optional[dict] = None) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
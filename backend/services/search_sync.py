@@ -0,0 +1,211 @@
+"""
+Search Sync Service
+Drains the laptop change outbox into Elasticsearch
+"""
+import os
+import time
+import logging
+from elasticsearch import Elasticsearch, helpers
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from db.models import M_Laptop, M_SearchOutbox, M_SearchDeadLetter
+from services.search import LAPTOPS_INDEX
+from services.search_index import ensure_laptops_index, laptop_document
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Worker configurations
+SEARCH_SYNC_BATCH_SIZE = int(os.getenv("SEARCH_SYNC_BATCH_SIZE", "500"))
+SEARCH_SYNC_POLL_INTERVAL = float(os.getenv("SEARCH_SYNC_POLL_INTERVAL", "1"))
+SEARCH_SYNC_MAX_ATTEMPTS = int(os.getenv("SEARCH_SYNC_MAX_ATTEMPTS", "5"))
+
+# Advisory lock namespace: a laptop is synced by at most one worker at a time
+SYNC_LOCK_NAMESPACE = 4017
+
+
+def claim_batch(db: Session, batchSize: int) -> list:
+    """
+    Lock up to batchSize outbox entries that no other worker holds.
+
+    Rows are taken with FOR UPDATE SKIP LOCKED, then narrowed to laptops this
+    worker wins a transaction-scoped advisory lock on. Two workers therefore
+    never write the same document concurrently, so an older read can't
+    overwrite a newer one in the index. Entries left out stay locked until
+    this transaction ends and are picked up on the next round.
+    """
+    entries = db.scalars(
+        select(M_SearchOutbox)
+        .order_by(M_SearchOutbox.outboxId)
+        .limit(batchSize)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not entries:
+        return []
+
+    owned = set()
+    for laptopId in {e.laptopId for e in entries}:
+        if db.scalar(select(func.pg_try_advisory_xact_lock(SYNC_LOCK_NAMESPACE, laptopId))):
+            owned.add(laptopId)
+    return [e for e in entries if e.laptopId in owned]
+
+
+def coalesce(entries: list) -> dict:
+    """
+    Merge entries per laptop into one pending change.
+
+    Returns laptop id -> set of changed columns, or None when the whole
+    document has to be written (index/delete entries or unknown columns).
+    Whether it ends up indexed or deleted is decided from the current row.
+    """
+    changes = {}
+    for entry in entries:
+        if entry.operation != "update" or not entry.changedFields:
+            changes[entry.laptopId] = None
+        elif entry.laptopId not in changes:
+            changes[entry.laptopId] = set(entry.changedFields)
+        elif changes[entry.laptopId] is not None:
+            changes[entry.laptopId].update(entry.changedFields)
+    return changes
+
+
+def build_actions(db: Session, changes: dict) -> tuple[list, dict]:
+    """
+    Bulk actions reflecting the current state of each changed laptop.
+
+    Missing or inactive laptops are deleted, laptops with a full-document
+    change are indexed, and the rest get a partial update of only the changed
+    fields. Full documents are also returned so a partial update that hits a
+    missing document can fall back to indexing it.
+    """
+    laptops = {
+        laptop.laptopId: laptop
+        for laptop in db.scalars(select(M_Laptop).where(M_Laptop.laptopId.in_(changes)))
+    }
+    actions = []
+    documents = {}
+    for laptopId, fields in changes.items():
+        laptop = laptops.get(laptopId)
+        if laptop is None or laptop.isActive is False:
+            actions.append({"_op_type": "delete", "_index": LAPTOPS_INDEX, "_id": laptopId})
+            continue
+
+        documents[laptopId] = laptop_document(laptop)
+        fields = fields and [f for f in fields if f in M_Laptop.API_FIELDS]
+        if fields is None:
+            actions.append({"_op_type": "index", "_index": LAPTOPS_INDEX, "_id": laptopId, "_source": documents[laptopId]})
+        elif fields:
+            actions.append({"_op_type": "update", "_index": LAPTOPS_INDEX, "_id": laptopId, "doc": laptop.toDict(tuple(fields))})
+    return actions, documents
+
+
+def apply_actions(es: Elasticsearch, actions: list, documents: dict) -> dict:
+    """Send actions through the bulk API and return laptop id -> error for the ones that failed"""
+    errors = {}
+    retries = []
+    for ok, item in helpers.streaming_bulk(
+        es, actions, chunk_size=max(len(actions), 1), raise_on_error=False, raise_on_exception=False
+    ):
+        opType, result = next(iter(item.items()))
+        laptopId = int(result["_id"])
+        if ok or (opType == "delete" and result.get("status") == 404):
+            continue
+        if opType == "update" and result.get("status") == 404:
+            # Never indexed (or index rebuilt without it): write the whole document instead
+            retries.append({"_op_type": "index", "_index": LAPTOPS_INDEX, "_id": laptopId, "_source": documents[laptopId]})
+            continue
+        errors[laptopId] = str(result.get("error", result))
+
+    if retries:
+        errors.update(apply_actions(es, retries, documents))
+    return errors
+
+
+def record_failures(db: Session, entries: list, errors: dict) -> int:
+    """Bump attempts on failed entries and move exhausted ones to the dead-letter table"""
+    deadLettered = 0
+    for entry in entries:
+        if entry.laptopId not in errors:
+            continue
+        entry.attempts += 1
+        entry.lastError = errors[entry.laptopId]
+        if entry.attempts >= SEARCH_SYNC_MAX_ATTEMPTS:
+            db.add(M_SearchDeadLetter.fromOutbox(entry))
+            db.delete(entry)
+            deadLettered += 1
+    return deadLettered
+
+
+def process_batch(db: Session, es: Elasticsearch, batchSize: int = SEARCH_SYNC_BATCH_SIZE) -> int:
+    """
+    Claim, apply and acknowledge one batch of outbox entries.
+
+    Everything happens in one transaction: applied entries are deleted and
+    failed ones updated only after Elasticsearch answered, so a crash simply
+    leaves the entries for the next worker. Returns the number of entries handled.
+    """
+    started = time.monotonic()
+    try:
+        entries = claim_batch(db, batchSize)
+        if not entries:
+            db.commit()
+            return 0
+
+        changes = coalesce(entries)
+        actions, documents = build_actions(db, changes)
+        errors = apply_actions(es, actions, documents) if actions else {}
+
+        deadLettered = record_failures(db, entries, errors)
+        for entry in entries:
+            if entry.laptopId not in errors:
+                db.delete(entry)
+        db.commit()
+    except Exception:
+        # Elasticsearch or database unavailable: release the claim without counting an attempt
+        db.rollback()
+        raise
+
+    logger.info(
+        f"Synced {len(entries)} outbox entries as {len(actions)} bulk actions "
+        f"in {time.monotonic() - started:.3f}s ({len(errors)} failed, {deadLettered} dead-lettered)"
+    )
+    return len(entries)
+
+
+def run_worker(sessionFactory, es: Elasticsearch, batchSize: int = SEARCH_SYNC_BATCH_SIZE,
+               pollInterval: float = SEARCH_SYNC_POLL_INTERVAL, shouldStop=lambda: False) -> None:
+    """Drain the outbox until shouldStop() returns True, sleeping while it is empty"""
+    backoff = pollInterval
+    indexReady = False
+    while not shouldStop():
+        db = sessionFactory()
+        try:
+            if not indexReady:
+                # Bulk writes to a missing index would auto-create it with a dynamic mapping
+                # (no ngram subfields, index sort or pipeline), so create it properly first
+                ensure_laptops_index(es)
+                indexReady = True
+            handled = process_batch(db, es, batchSize)
+            backoff = pollInterval
+        except Exception as e:
+            logger.warning(f"Search sync batch failed, retrying in {backoff:.0f}s: {str(e)}")
+            handled = 0
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+        finally:
+            db.close()
+        if handled == 0:
+            time.sleep(pollInterval)
+
+
+def outbox_stats(db: Session) -> dict:
+    """Backlog size and age, for monitoring the workers"""
+    pending, oldest = db.execute(
+        select(func.count(M_SearchOutbox.outboxId), func.min(M_SearchOutbox.createdAt))
+    ).one()
+    deadLetters = db.scalar(select(func.count(M_SearchDeadLetter.deadLetterId)))
+    return {
+        "pending": pending,
+        "oldest_pending_at": oldest.isoformat() if oldest else None,
+        "dead_letters": deadLetters,
+    }
@@ -0,0 +1,195 @@
+"""
+Suggestion Service
+Prefix index over model names, sub-brands and CPU families for search-box autocomplete
+"""
+import os
+import re
+import asyncio
+import logging
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Optional
+from cachetools import LRUCache
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from db.models import M_Laptop, M_OrderItem
+from db.session import SessionLocal
+from services.search import CPU_FACET_VALUES
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Suggestion configurations
+SUGGEST_REFRESH_INTERVAL = float(os.getenv("SUGGEST_REFRESH_INTERVAL", "300"))
+SUGGEST_CACHE_SIZE = int(os.getenv("SUGGEST_CACHE_SIZE", "10000"))
+SUGGEST_MAX_LIMIT = 20
+# Top suggestions for every prefix up to this length are computed at build time
+PRECOMPUTED_PREFIX_LENGTH = 2
+
+# A review counts as much as this many units sold
+REVIEW_WEIGHT = 0.5
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation/whitespace (used for keys and prefixes)"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^\w.]+", " ", text.lower()).split())
+
+
+def cpu_family_label(family: str) -> str:
+    """Display form of a CPU family value, e.g. "core i7" -> "Core i7", "m2" -> "M2" """
+    return " ".join(w if re.fullmatch(r"i\d", w) else w.capitalize() for w in family.split())
+
+
+class SuggestionIndex:
+    """
+    Immutable prefix index.
+
+    Every suggestion is indexed under the normalized text starting at each of
+    its words ("dell xps 13", "xps 13", "13"), so "xps" finds "Dell XPS 13".
+    Keys live in one sorted list; a prefix lookup is a bisect followed by a
+    scan over the matching run.
+    """
+
+    def __init__(self, suggestions: list):
+        self.suggestions = suggestions
+        keyed = {}
+        for i, suggestion in enumerate(suggestions):
+            words = normalize(suggestion["text"]).split()
+            for start in range(len(words)):
+                keyed.setdefault(" ".join(words[start:]), set()).add(i)
+        self.keys = sorted(keyed)
+        self.entries = [tuple(keyed[k]) for k in self.keys]
+        self.precomputed = {}
+        for key in self.keys:
+            for length in range(1, min(PRECOMPUTED_PREFIX_LENGTH, len(key)) + 1):
+                prefix = key[:length]
+                if prefix not in self.precomputed:
+                    self.precomputed[prefix] = self.match(prefix, SUGGEST_MAX_LIMIT)
+
+    def match(self, prefix: str, limit: int) -> list:
+        """Suggestion indices for a normalized prefix, most popular first"""
+        precomputed = self.precomputed.get(prefix)
+        if precomputed is not None:
+            return precomputed[:limit]
+        found = set()
+        position = bisect_left(self.keys, prefix)
+        while position < len(self.keys) and self.keys[position].startswith(prefix):
+            found.update(self.entries[position])
+            position += 1
+        ranked = sorted(found, key=lambda i: (-self.suggestions[i]["popularity"], self.suggestions[i]["text"]))
+        return ranked[:limit]
+
+
+class SuggestionService:
+    """Builds the suggestion index from the catalog and serves cached prefix lookups"""
+
+    def __init__(self, cacheSize: int = SUGGEST_CACHE_SIZE):
+        self._index: Optional[SuggestionIndex] = None
+        self._cache = LRUCache(maxsize=cacheSize)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def ready(self) -> bool:
+        return self._index is not None
+
+    def build(self) -> None:
+        """Collect suggestions and their popularity (units sold + weighted review count)"""
+        with SessionLocal() as db:
+            sold = dict(
+                db.execute(
+                    select(M_OrderItem.laptopId, func.sum(M_OrderItem.quantity)).group_by(M_OrderItem.laptopId)
+                ).all()
+            )
+            laptops = db.execute(
+                select(M_Laptop.laptopId, M_Laptop.brand, M_Laptop.subBrand, M_Laptop.modelName,
+                       M_Laptop.cpu, M_Laptop.numRate)
+                .where(M_Laptop.isActive | M_Laptop.isActive.is_(None))
+            ).all()
+
+        models, subBrands, families = {}, {}, {}
+        for laptopId, brand, subBrand, name, cpu, numRate in laptops:
+            popularity = float(sold.get(laptopId) or 0) + REVIEW_WEIGHT * (numRate or 0)
+            if name:
+                key = normalize(name)
+                if key not in models or popularity > models[key]["popularity"]:
+                    models[key] = {"text": name, "type": "model", "laptop_id": laptopId, "popularity": popularity}
+            if subBrand:
+                text = f"{brand} {subBrand}" if brand and not normalize(subBrand).startswith(normalize(brand)) else subBrand
+                entry = subBrands.setdefault(normalize(text), {"text": text, "type": "sub_brand", "popularity": 0.0})
+                entry["popularity"] += popularity
+            cpuKey = normalize(cpu or "")
+            for family in CPU_FACET_VALUES:
+                if family in cpuKey:
+                    entry = families.setdefault(family, {"text": cpu_family_label(family), "type": "cpu", "popularity": 0.0})
+                    entry["popularity"] += popularity
+
+        index = SuggestionIndex(list(models.values()) + list(subBrands.values()) + list(families.values()))
+        with self._lock:
+            self._index = index
+            self._cache.clear()
+        logger.info(f"Suggestion index built with {len(index.suggestions)} suggestions and {len(index.keys)} keys")
+
+    def suggest(self, query: str, limit: int = 8) -> list:
+        """Top suggestions for what the user has typed so far"""
+        prefix = normalize(query)
+        index = self._index
+        if not prefix or index is None:
+            return []
+        key = (prefix, limit)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+        results = [
+            {k: v for k, v in index.suggestions[i].items() if k != "popularity"}
+            for i in index.match(prefix, limit)
+        ]
+        with self._lock:
+            if self._index is index:
+                self._cache[key] = results
+        return results
+
+    async def _refreshLoop(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self.build)
+            except Exception as e:
+                logger.warning(f"Suggestion index build failed: {str(e)}")
+            await asyncio.sleep(SUGGEST_REFRESH_INTERVAL)
+
+    async def start(self) -> None:
+        """Build the index in the background and rebuild it periodically (called from the FastAPI lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refreshLoop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        index = self._index
+        lookups = self.hits + self.misses
+        return {
+            "ready": index is not None,
+            "suggestions": len(index.suggestions) if index else 0,
+            "keys": len(index.keys) if index else 0,
+            "cached_prefixes": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Shared service for the catalog endpoints
+suggestion_service = SuggestionService()
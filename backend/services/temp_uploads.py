@@ -0,0 +1,225 @@
+"""
+Temp Upload Service
+Streams multipart uploads to static/temp off the event loop and sweeps abandoned files
+"""
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upload configurations
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(25 * 1024 * 1024)))
+TEMP_UPLOAD_MAX_AGE = float(os.getenv("TEMP_UPLOAD_MAX_AGE", "86400"))
+TEMP_SWEEP_INTERVAL = float(os.getenv("TEMP_SWEEP_INTERVAL", "3600"))
+
+TEMP_DIR = "static/temp"
+# Received bytes are buffered up to this size before each write in the threadpool
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """The request or one of its files exceeds the configured limit"""
+
+
+def safe_name(name: str) -> bool:
+    """A single path component that can't escape the temp directory"""
+    return bool(name) and name == os.path.basename(name) and not name.startswith(".")
+
+
+class _FileSink:
+    """Destination for one file part: buffered writes and hashing happen in the threadpool"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.partPath = f"{path}.{os.getpid()}.part"
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self._buffer = bytearray()
+        self._file = None
+
+    async def open(self) -> None:
+        def _open():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            return open(self.partPath, "wb")
+        self._file = await run_in_threadpool(_open)
+
+    def _write(self, data: bytes) -> None:
+        self.hasher.update(data)
+        self._file.write(data)
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > UPLOAD_MAX_FILE_BYTES:
+            raise UploadTooLarge(f"File exceeds {UPLOAD_MAX_FILE_BYTES} bytes")
+        self._buffer += data
+        if len(self._buffer) >= WRITE_CHUNK_SIZE:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self._buffer:
+            data, self._buffer = bytes(self._buffer), bytearray()
+            await run_in_threadpool(self._write, data)
+
+    async def commit(self) -> None:
+        await self.flush()
+
+        def _finish():
+            self._file.close()
+            os.replace(self.partPath, self.path)
+        await run_in_threadpool(_finish)
+
+    async def discard(self) -> None:
+        def _discard():
+            if self._file is not None:
+                self._file.close()
+            if os.path.exists(self.partPath):
+                os.remove(self.partPath)
+        await run_in_threadpool(_discard)
+
+
+async def receive_upload(request: Request, path: str, fieldName: str = "file") -> dict:
+    """
+    Stream the fieldName file of a multipart request body to path.
+
+    The body is parsed as it arrives, so memory use stays at one write chunk
+    whatever the upload size. Raises UploadTooLarge past UPLOAD_MAX_FILE_BYTES
+    or UPLOAD_MAX_REQUEST_BYTES (leaving nothing behind) and ValueError for a
+    malformed request. Returns the stored size and SHA-256.
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > UPLOAD_MAX_REQUEST_BYTES:
+        raise UploadTooLarge(f"Request exceeds {UPLOAD_MAX_REQUEST_BYTES} bytes")
+
+    contentType, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if contentType != b"multipart/form-data" or not boundary:
+        raise ValueError("Expected a multipart/form-data body")
+
+    # Parser callbacks only record events; the async loop below acts on them
+    events = []
+    header = {"field": b"", "value": b""}
+    partHeaders = {}
+
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        partHeaders[header["field"].lower()] = header["value"]
+        header["field"], header["value"] = b"", b""
+
+    callbacks = {
+        "on_part_begin": lambda: partHeaders.clear(),
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": lambda: events.append(("headers", dict(partHeaders))),
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+        "on_part_end": lambda: events.append(("end", None)),
+    }
+    parser = MultipartParser(boundary, callbacks)
+
+    sink: Optional[_FileSink] = None
+    current: Optional[_FileSink] = None
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > UPLOAD_MAX_REQUEST_BYTES:
+                raise UploadTooLarge(f"Request exceeds {UPLOAD_MAX_REQUEST_BYTES} bytes")
+            parser.write(chunk)
+            for kind, value in events:
+                if kind == "headers":
+                    _, disposition = parse_options_header(value.get(b"content-disposition", b""))
+                    isFile = b"filename" in disposition and disposition.get(b"name") == fieldName.encode()
+                    if isFile and sink is not None:
+                        raise ValueError("Only one file per request")
+                    if isFile:
+                        sink = current = _FileSink(path)
+                        await sink.open()
+                elif kind == "data" and current is not None:
+                    await current.write(value)
+                elif kind == "end":
+                    current = None
+            events.clear()
+        parser.finalize()
+        if sink is None:
+            raise ValueError(f"Missing file field '{fieldName}'")
+        await sink.commit()
+    except BaseException:
+        if sink is not None:
+            await asyncio.shield(sink.discard())
+        raise
+    return {"size": sink.size, "sha256": sink.hasher.hexdigest()}
+
+
+def sweep_temp_files(maxAge: float = TEMP_UPLOAD_MAX_AGE, directory: str = TEMP_DIR) -> int:
+    """Remove temp uploads (and leftover .part files) older than maxAge seconds, then empty folders"""
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - maxAge
+    removed = 0
+    for root, dirs, names in os.walk(directory, topdown=False):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        if root != directory:
+            try:
+                os.rmdir(root)
+            except OSError:
+                # Not empty
+                pass
+    return removed
+
+
+class TempUploadSweeper:
+    """Periodically removes abandoned temp uploads (files never attached to a laptop)"""
+
+    def __init__(self, interval: float = TEMP_SWEEP_INTERVAL, maxAge: float = TEMP_UPLOAD_MAX_AGE):
+        self.interval = interval
+        self.maxAge = maxAge
+        self._task: Optional[asyncio.Task] = None
+
+    async def _sweepLoop(self) -> None:
+        while True:
+            try:
+                removed = await run_in_threadpool(sweep_temp_files, self.maxAge)
+                if removed:
+                    logger.info(f"Removed {removed} abandoned temp uploads")
+            except Exception as e:
+                logger.warning(f"Temp upload sweep failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        """Sweep in the background (called from the FastAPI lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweepLoop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Shared sweeper for static/temp
+temp_upload_sweeper = TempUploadSweeper()
@@ -0,0 +1,13 @@
+"""
+Shared test setup: imports resolve from backend/, and the database is a scratch SQLite file
+"""
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to import db and services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# db.session builds its engine on import, so the URL has to be set before any test imports it
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='laptopshop-tests-'), 'test.db')}"
+os.environ["CATALOG_ENGINE_ENABLED"] = "false"
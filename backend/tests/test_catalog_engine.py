@@ -0,0 +1,139 @@
+"""
+The columnar catalog must answer /laptops/filter like the Postgres fallback does
+"""
+import re
+import random
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import partial
+import pytest
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateTable
+from db.models import M_Laptop
+from db.session import SessionLocal, engine
+from services import search_fallback
+from services.catalog_engine import ColumnarCatalog
+from services.search_fallback import run_catalog_search, search_backend
+
+BRANDS = ["Dell", "HP", "Lenovo", "Asus", "Apple"]
+CPUS = ["Intel Core i5-1235U", "Intel Core i7-12700H", "AMD Ryzen 5 5600H", "AMD Ryzen 7 7840HS", "Apple M2", "Intel Celeron N4500"]
+VGAS = ["NVIDIA RTX 4060", "Intel Iris Xe", "AMD Radeon 780M", None]
+# weight is free text: rows that aren't a plain number must drop out of weight filters on both paths
+WEIGHTS = ["1.2", "1.5", "1.85", "2.1", "2.5", "1.5 kg", "", None]
+
+
+@compiles(TSVECTOR, "sqlite")
+def _tsvector_as_text(element, compiler, **kw):
+    return "TEXT"
+
+
+def seed_laptops(db) -> None:
+    rng = random.Random(7)
+    started = datetime(2026, 1, 1)
+    for laptopId in range(1, 61):
+        brand = rng.choice(BRANDS)
+        db.add(M_Laptop(
+            laptopId=laptopId,
+            brand=brand,
+            subBrand=rng.choice([f"{brand} Pro", f"{brand} Air", None]),
+            modelName=f"{brand} model {laptopId}",
+            specSummary="",
+            usageType=rng.choice(["Gaming", "Office", "Student"]),
+            cpu=rng.choice(CPUS),
+            vga=rng.choice(VGAS),
+            ramAmount=rng.choice([8, 16, 32]),
+            ramType="DDR5",
+            storageAmount=rng.choice([256, 512, 1024]),
+            storageType="SSD",
+            screenSize=rng.choice([Decimal("13.3"), Decimal("14"), Decimal("15.6"), Decimal("16"), None]),
+            weight=rng.choice(WEIGHTS),
+            # Repeated prices and timestamps exercise the id tie-break
+            price=rng.randrange(10, 45) * 1_000_000,
+            originalPrice=50_000_000,
+            stockQty=5,
+            productImages=[],
+            isActive=rng.choice([True, True, True, None, False]),
+            updatedAt=rng.choice([started + timedelta(days=rng.randrange(20)), None]),
+        ))
+    db.commit()
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    with engine.begin() as conn:
+        ddl = str(CreateTable(M_Laptop.__table__).compile(engine))
+        # search_vector is generated by Postgres; SQLite just keeps a plain column
+        conn.exec_driver_sql(re.sub(r"GENERATED ALWAYS AS \(.*?\) STORED", "", ddl, flags=re.S))
+    with SessionLocal() as db:
+        seed_laptops(db)
+    columnar = ColumnarCatalog()
+    columnar.build()
+    yield columnar
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE laptops")
+
+
+@pytest.fixture(autouse=True)
+def elasticsearch_down(monkeypatch):
+    async def unavailable():
+        return False
+    monkeypatch.setattr(search_backend, "useElasticsearch", unavailable)
+
+
+def fallback_filter(filters: dict, limit, page: int, sort: str, facets: bool) -> dict:
+    async def elasticsearch():
+        raise AssertionError("Elasticsearch is down in these tests")
+
+    postgres = partial(
+        search_fallback.filter_laptops, filters, limit, page=page, sort=sort, facets=facets, priceInterval=5_000_000
+    )
+    return asyncio.run(run_catalog_search(None, elasticsearch, postgres))
+
+
+FILTERS = [
+    {},
+    {"brand": ["Dell", "HP"]},
+    {"brand": ["all"]},
+    {"brand": ["Nobody"]},
+    {"sub_brand": ["Dell Pro", "Asus Air"]},
+    {"cpu": ["core i5", "RYZEN 7"]},
+    {"vga": ["rtx"]},
+    {"ram_amount": [16, 32], "storage_amount": [512]},
+    {"screen_size": [15, 13]},
+    {"weight_min": 1.4, "weight_max": 2.0},
+    {"weight_max": 1.9},
+    {"price_min": 20_000_000},
+    {"price_min": 15_000_000, "price_max": 30_000_000},
+    {"usage_type": ["Gaming"], "price_max": 40_000_000, "ram_amount": [16]},
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("sort", ["latest", "price_asc", "price_desc"])
+def test_filter_matches_postgres_fallback(catalog, filters, sort):
+    for limit, page in ((None, 1), (5, 1), (5, 3)):
+        expected = fallback_filter(filters, limit, page, sort, facets=False)
+        actual = catalog.filter(filters, limit, page=page, sort=sort)
+
+        assert [card["id"] for card in actual["results"]] == [int(hit["_id"]) for hit in expected["hits"]]
+        assert actual["total_count"] == expected["total_count"]
+        assert actual["has_more"] == expected["has_more"]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_facets_match_postgres_fallback(catalog, filters):
+    expected = fallback_filter(filters, 10, 1, "latest", facets=True)
+    actual = catalog.filter(filters, 10, facets=True, priceInterval=5_000_000)
+
+    assert actual["facets"] == expected["facets"]
+
+
+def test_inactive_laptops_are_left_out(catalog):
+    with SessionLocal() as db:
+        inactive = {laptop.laptopId for laptop in db.query(M_Laptop).filter(M_Laptop.isActive.is_(False))}
+    results = catalog.filter({}, 100)["results"]
+
+    assert inactive
+    assert not inactive & {card["id"] for card in results}
@@ -0,0 +1,74 @@
+import time
+from services.search_cache import SearchResultCache
+
+
+def test_get_returns_what_set_stored():
+    cache = SearchResultCache(maxBytes=1024, ttl=60)
+    cache.set(("filter", "dell"), {"results": [1, 2]})
+
+    assert cache.get(("filter", "dell")) == {"results": [1, 2]}
+    assert cache.get(("filter", "hp")) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_ttl():
+    cache = SearchResultCache(maxBytes=1024, ttl=0.05)
+    cache.set("a", b"x" * 10, tags=["brand:dell"])
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    # Reading past the TTL runs the expiry, which also drops the entry from the tag index
+    assert cache.stats()["expirations"] == 1
+    assert cache.invalidate(["brand:dell"]) == 0
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = SearchResultCache(maxBytes=100, ttl=60)
+    cache.set("a", b"a" * 40, tags=["brand:a"])
+    cache.set("b", b"b" * 40, tags=["brand:b"])
+    cache.get("a")
+    cache.set("c", b"c" * 40)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"a" * 40
+    assert cache.get("c") == b"c" * 40
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 80
+    assert cache.invalidate(["brand:b"]) == 0
+
+
+def test_entry_larger_than_budget_is_not_cached():
+    cache = SearchResultCache(maxBytes=100, ttl=60)
+    cache.set("small", b"s" * 10)
+    cache.set("huge", b"h" * 101, tags=["brand:h"])
+
+    assert cache.get("huge") is None
+    assert cache.get("small") == b"s" * 10
+    assert cache.invalidate(["brand:h"]) == 0
+
+
+def test_invalidate_drops_only_tagged_entries():
+    cache = SearchResultCache(maxBytes=1024, ttl=60)
+    cache.set("dell", b"1", tags=["brand:dell"])
+    cache.set("dell-42", b"2", tags=["brand:dell", "laptop:42"])
+    cache.set("hp", b"3", tags=["brand:hp"])
+
+    assert cache.invalidate(["laptop:42"]) == 1
+    assert cache.get("dell-42") is None
+    assert cache.get("dell") == b"1"
+
+    assert cache.invalidate(["brand:dell", "brand:hp"]) == 2
+    assert cache.get("dell") is None
+    assert cache.get("hp") is None
+    assert cache.stats()["invalidations"] == 3
+
+
+def test_set_replaces_the_tags_of_an_existing_key():
+    cache = SearchResultCache(maxBytes=1024, ttl=60)
+    cache.set("k", b"old", tags=["brand:dell"])
+    cache.set("k", b"new", tags=["brand:hp"])
+
+    assert cache.invalidate(["brand:dell"]) == 0
+    assert cache.get("k") == b"new"
+    assert cache.invalidate(["brand:hp"]) == 1
@@ -0,0 +1,79 @@
+import json
+import logging
+from services.search_raw import split_hits
+
+
+def es_response(hits: list, total=None) -> bytes:
+    """A search response as Elasticsearch writes it under RAW_FILTER_PATH (compact, fixed key order)"""
+    body = {"hits": {}}
+    if total is not None:
+        body["hits"]["total"] = {"value": total[0], "relation": total[1]}
+    body["hits"]["hits"] = [{"_id": hitId, "_source": source} for hitId, source in hits]
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def test_slices_each_source():
+    hits = [("1", {"id": 1, "name": "XPS 13"}), ("22", {"id": 22, "name": "ThinkPad", "product_images": ["/a.jpg"]})]
+    result = split_hits(es_response(hits, total=(57, "eq")))
+
+    assert (result.total, result.relation) == (57, "eq")
+    assert result.ids == ["1", "22"]
+    assert [json.loads(source) for source in result.sources] == [source for _, source in hits]
+
+
+def test_hit_markup_inside_string_values_is_not_a_hit_boundary(caplog):
+    tricky = {
+        "id": 5,
+        "description": 'ends with "}," then {"_id":"9","_source":{"id":9}} and }]}}',
+        "name": 'Quote \\ "and" backslash',
+    }
+    hits = [("5", tricky), ("6", {"id": 6, "name": "{\"_id\":\"7\"}"})]
+    with caplog.at_level(logging.WARNING, logger="services.search_raw"):
+        result = split_hits(es_response(hits, total=(2, "eq")))
+
+    assert result.ids == ["5", "6"]
+    assert [json.loads(source) for source in result.sources] == [tricky, {"id": 6, "name": "{\"_id\":\"7\"}"}]
+    # Sliced, not decoded
+    assert not caplog.records
+
+
+def test_non_ascii_sources_keep_their_bytes():
+    hits = [("3", {"id": 3, "name": "Laptop Gaming Cấu hình cao"})]
+    raw = es_response(hits, total=(1, "eq"))
+    result = split_hits(raw)
+
+    assert result.sources[0] in raw
+    assert json.loads(result.sources[0]) == hits[0][1]
+
+
+def test_empty_hits():
+    assert split_hits(b"{}") == (0, "eq", [], [])
+    assert split_hits(es_response([], total=(0, "eq"))) == (0, "eq", [], [])
+    # An empty page past the end still reports the total
+    assert split_hits(b'{"hits":{"total":{"value":10000,"relation":"gte"}}}') == (10000, "gte", [], [])
+
+
+def test_missing_total_counts_the_hits():
+    # track_total_hits=false drops hits.total from the response
+    result = split_hits(es_response([("1", {"id": 1}), ("2", {"id": 2})]))
+
+    assert (result.total, result.relation) == (2, "eq")
+    assert result.ids == ["1", "2"]
+
+
+def test_unexpected_layout_falls_back_to_decoding(caplog):
+    hits = [("1", {"id": 1, "name": "XPS"}), ("2", {"id": 2, "name": "Zenbook"})]
+    pretty = json.dumps({"hits": {"total": {"value": 2, "relation": "eq"}, "hits": [
+        {"_id": hitId, "_source": source} for hitId, source in hits
+    ]}}, indent=2).encode()
+    reordered = json.dumps({"hits": {"hits": [
+        {"_source": source, "_id": hitId} for hitId, source in hits
+    ]}}, separators=(",", ":")).encode()
+
+    with caplog.at_level(logging.WARNING, logger="services.search_raw"):
+        for raw in (pretty, reordered):
+            result = split_hits(raw)
+            assert (result.total, result.relation) == (2, "eq")
+            assert result.ids == ["1", "2"]
+            assert [json.loads(source) for source in result.sources] == [source for _, source in hits]
+    assert len([r for r in caplog.records if "decoding hits instead" in r.getMessage()]) == 2
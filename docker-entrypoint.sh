@@ -15,14 +15,18 @@ TABLE_EXISTS=$(PGPASSWORD=$PGPASSWORD psql -h "$PGHOST" -U "$PGUSER" -d "$PGDATA
 if [ "$TABLE_EXISTS" = "f" ]; then
   echo "Tables do not exist - initializing database..."
   
-  # Generate sample data (this includes image generation)
+  # Generate sample data (images are rendered by the API on first request)
   python commands/generate_sample_data.py
   
-  # Create tables
+  # Create tables (the baseline schema), then everything added to it since (migrations/versions)
   PGPASSWORD=$PGPASSWORD psql -h "$PGHOST" -U "$PGUSER" -d "$PGDATABASE" -f commands/create_table.sql
+  alembic upgrade head
   
   # Insert sample data
   PGPASSWORD=$PGPASSWORD psql -h "$PGHOST" -U "$PGUSER" -d "$PGDATABASE" -f commands/insert_sample_data.sql
+
+  # Full-text columns and indexes for the Postgres search fallback
+  PGPASSWORD=$PGPASSWORD psql -h "$PGHOST" -U "$PGUSER" -d "$PGDATABASE" -f commands/search_fallback.sql
   
   # Ensure admin account exists
   python commands/ensure_admin.py
@@ -35,20 +39,22 @@ if [ "$TABLE_EXISTS" = "f" ]; then
 else
   echo "Tables already exist - skipping database initialization"
   
-  # Check if images exist, generate if missing
-  if [ ! -d "./static/laptop_images" ] || [ -z "$(ls -A ./static/laptop_images 2>/dev/null)" ] || [ ! -d "./static/post_images" ] || [ -z "$(ls -A ./static/post_images 2>/dev/null)" ]; then
-    echo "Images not found or incomplete - generating images..."
-    python commands/generate_images.py
-    echo "Images generated successfully"
-  else
-    echo "Images already exist - skipping image generation"
-  fi
+  # Sample images are rendered on first request and cached on disk, so boot does no image work
   
+  # Add the Postgres search fallback columns and indexes if they are missing
+  PGPASSWORD=$PGPASSWORD psql -h "$PGHOST" -U "$PGUSER" -d "$PGDATABASE" -f commands/search_fallback.sql
+
+  # Apply pending migrations (indexes are built concurrently, so a live database keeps serving)
+  alembic upgrade head
+
   # Ensure admin account exists even if database was already initialized
   echo "Checking admin account..."
   python commands/ensure_admin.py
 fi
 
+# Stop here if the models declare tables, columns or indexes no migration created
+python commands/check_schema.py --quiet
+
 echo "Waiting for Elasticsearch to be ready..."
 until curl -sf "http://$ELASTICSEARCH_HOST:9200/_cluster/health" >/dev/null 2>&1; do
   echo "Elasticsearch is unavailable - sleeping"
@@ -1,5 +1,5 @@
 import { useState, useEffect } from "react";
-import { Flex, Typography, Layout, Space, Menu, Dropdown, Avatar, Input, Modal, message } from "antd";
+import { Flex, Typography, Layout, Space, Menu, Dropdown, Avatar, Input, Modal, message, AutoComplete } from "antd";
 import { useNavigate, Link } from "react-router-dom";
 import {
   FacebookFilled,
@@ -208,6 +208,7 @@ const AccountMenu = () => {
 const WebsiteHeader = () => {
   const { user } = useUser();
   const navigate = useNavigate(); 
+  const [suggestions, setSuggestions] = useState([]);
 
   const handleSearch = (value) => {
     const keyword = value.trim();
@@ -218,6 +219,29 @@ const WebsiteHeader = () => {
     );
   };
 
+  const handleSuggest = async (value) => {
+    const keyword = value.trim();
+    if (!keyword) {
+      setSuggestions([]);
+      return;
+    }
+
+    try {
+      const backendUrl = import.meta.env.VITE_BACKEND_URL || 'http://localhost:8000';
+      const response = await axios.get(`${backendUrl}/laptops/suggest`, {
+        params: { q: keyword, limit: 8 },
+      });
+      setSuggestions(
+        response.data.suggestions.map((suggestion) => ({
+          value: suggestion.text,
+          label: suggestion.text,
+        }))
+      );
+    } catch (error) {
+      setSuggestions([]);
+    }
+  };
+
   return (
     <Header style={headerStyle}>
       {/* Top Bar */}
@@ -296,13 +320,19 @@ const WebsiteHeader = () => {
         </Flex>
 
         <Flex align="center" gap="middle">
-          <Search
-            placeholder="Search laptops…"
-            allowClear
-            size="medium"
+          <AutoComplete
+            options={suggestions}
+            onSearch={handleSuggest}
+            onSelect={handleSearch}
             style={{ width: 280 }}
-            onSearch={handleSearch}
-          />
+          >
+            <Search
+              placeholder="Search laptops…"
+              allowClear
+              size="medium"
+              onSearch={handleSearch}
+            />
+          </AutoComplete>
           {user?.role !== "admin" && (
             <ShoppingCartOutlined
               style={{ fontSize: "21px", color: "black", cursor: "pointer" }}
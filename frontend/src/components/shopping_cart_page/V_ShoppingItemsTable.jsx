@@ -5,6 +5,7 @@ import { Modal, Typography, Image, InputNumber, Button } from "antd";
 import { DeleteOutlined, EyeOutlined } from "@ant-design/icons";
 import axios from "axios";
 import { getToken } from "../../utils/authService";
+import { fetchLaptopsByIds } from "../../utils/laptopBatch";
 
 const { Text } = Typography;
 
@@ -156,17 +157,16 @@ const ShoppingItemsTable = ({ setTotalPrice, setCartItems: updateParentCartItems
           return;
         }
 
-        // 2. Fetch product info for each cart item
-        const productFetches = cartData.items.map((item) =>
-          axios.get(`http://localhost:8000/laptops/id/${item.laptop_id}`)
+        // 2. Fetch product info for all cart items in one request
+        const products = await fetchLaptopsByIds(
+          cartData.items.map((item) => item.laptop_id),
+          "detail"
         );
-
-        const productResponses = await Promise.all(productFetches);
+        const availableItems = cartData.items.filter((item) => products.has(item.laptop_id));
 
         // 3. Combine product info with cart item data
-        const productsWithQty = productResponses.map((res, idx) => {
-          const product = res.data;
-          const cartItem = cartData.items[idx];
+        const productsWithQty = availableItems.map((cartItem) => {
+          const product = products.get(cartItem.laptop_id);
           
           // Handle product_images - it might be a string or already parsed array
           let imageUrls = [];
@@ -6,6 +6,7 @@ import WebsiteHeader from "@components/V_WebsiteHeader";
 import WebsiteFooter from "@components/V_WebsiteFooter";
 import ShoppingItemsTable from "@components/shopping_cart_page/V_ShoppingItemsTable";
 import axios from "axios";
+import { fetchLaptopsByIds } from "@utils/laptopBatch";
 
 const { Content } = Layout;
 const { Text, Title } = Typography;
@@ -113,17 +114,18 @@ class V_CartPageView extends V_BaseView {
       
       // Handle the new cart response structure with items array
       if (cartData.items && Array.isArray(cartData.items)) {
-        const productDetails = await Promise.all(
-          cartData.items.map(async (item) => {
-            const res = await axios.get(`${import.meta.env.VITE_BACKEND_URL}/laptops/id/${item.laptop_id}`);
-            return {
-              ...res.data,
-              cartItemId: item.id,
-              quantity: item.quantity,
-              unitPrice: item.unit_price,
-            };
-          })
+        const products = await fetchLaptopsByIds(
+          cartData.items.map((item) => item.laptop_id),
+          "detail"
         );
+        const productDetails = cartData.items
+          .filter((item) => products.has(item.laptop_id))
+          .map((item) => ({
+            ...products.get(item.laptop_id),
+            cartItemId: item.id,
+            quantity: item.quantity,
+            unitPrice: item.unit_price,
+          }));
 
         this.setState({ 
           cartItemsList: productDetails,
@@ -3,6 +3,7 @@ import { Layout, Table, Spin, Typography, Button, Tag, Modal, notification } fro
 import V_BaseView from "@components/V_BaseView";
 import CustomerOrderTable from "@components/customer_page/V_CustomerOrderTable";
 import axios from "axios";
+import { fetchLaptopsByIds } from "@utils/laptopBatch";
 
 const { Text } = Typography;
 
@@ -159,24 +160,27 @@ class V_OrderPageView extends V_BaseView {
         params,
       });
 
-      const ordersWithProductInfo = await Promise.all(
-        response.data.orders.map(async (order) => {
-          const itemsWithDetails = await Promise.all(
-            order.items.map(async (item) => {
-              const productDetails = await this.fetchProductDetails(item.product_id);
-              return {
-                ...item,
-                product_name: productDetails.product_name,
-                image: productDetails.image,
-                subtotal: item.price_at_purchase * item.quantity,
-              };
-            })
-          );
-
-          return { ...order, items: itemsWithDetails };
-        })
+      const productDetails = await this.fetchProductDetails(
+        response.data.orders.flatMap((order) => order.items.map((item) => item.product_id))
       );
 
+      const ordersWithProductInfo = response.data.orders.map((order) => {
+        const itemsWithDetails = order.items.map((item) => {
+          const details = productDetails.get(item.product_id) || {
+            product_name: "Unknown",
+            image: "/default-image.jpg",
+          };
+          return {
+            ...item,
+            product_name: details.product_name,
+            image: details.image,
+            subtotal: item.price_at_purchase * item.quantity,
+          };
+        });
+
+        return { ...order, items: itemsWithDetails };
+      });
+
       this.setState({
         ordersList: ordersWithProductInfo,
         totalOrdersCount: response.data.total_count,
@@ -195,36 +199,26 @@ class V_OrderPageView extends V_BaseView {
 
   /**
    * fetchProductDetails()
-   * Fetch product details for order item
+   * Fetch name and image for every product in the listed orders with one batch request
    */
-  async fetchProductDetails(productId) {
+  async fetchProductDetails(productIds) {
+    const details = new Map();
     try {
-      const response = await axios.get(`${import.meta.env.VITE_BACKEND_URL}/laptops/id/${productId}`);
-      const product = response.data;
-      
-      // Handle product_images - it might be a string or already parsed array
-      let imageUrls = [];
-      if (typeof product.product_images === 'string') {
-        try {
-          imageUrls = JSON.parse(product.product_images || "[]");
-        } catch (e) {
-          imageUrls = [];
-        }
-      } else if (Array.isArray(product.product_images)) {
-        imageUrls = product.product_images;
-      }
-      
-      return {
-        product_name: product.name,
-        image:
-          imageUrls.length > 0
-            ? `${import.meta.env.VITE_BACKEND_URL}${imageUrls[0]}`
-            : "/default-image.jpg",
-      };
+      const products = await fetchLaptopsByIds(productIds);
+      products.forEach((product, productId) => {
+        const imageUrls = Array.isArray(product.product_images) ? product.product_images : [];
+        details.set(productId, {
+          product_name: product.name,
+          image:
+            imageUrls.length > 0
+              ? `${import.meta.env.VITE_BACKEND_URL}${imageUrls[0]}`
+              : "/default-image.jpg",
+        });
+      });
     } catch (err) {
       console.error("Error fetching product details:", err);
-      return { product_name: "Unknown", image: "/default-image.jpg" };
     }
+    return details;
   }
 
   componentDidMount() {
@@ -6,6 +6,7 @@ import WebsiteFooter from "@components/V_WebsiteFooter";
 import QRCode from "react-qr-code";
 import { QRPay, BanksObject } from "vietnam-qr-pay";
 import axios from "axios";
+import { fetchLaptopsByIds } from "@utils/laptopBatch";
 
 const { Content } = Layout;
 const { Text, Title } = Typography;
@@ -292,14 +293,11 @@ class V_PaymentPageView extends V_BaseView {
         return;
       }
 
-      const productFetches = cartData.items.map((item) =>
-        axios.get(`${import.meta.env.VITE_BACKEND_URL}/laptops/id/${item.laptop_id}`)
-      );
-      const productResponses = await Promise.all(productFetches);
+      const products = await fetchLaptopsByIds(cartData.items.map((item) => item.laptop_id));
+      const availableItems = cartData.items.filter((item) => products.has(item.laptop_id));
 
-      const itemsWithDetails = productResponses.map((res, idx) => {
-        const product = res.data;
-        const cartItem = cartData.items[idx];
+      const itemsWithDetails = availableItems.map((cartItem) => {
+        const product = products.get(cartItem.laptop_id);
         
         // Handle product_images - it might be a string or already parsed array
         let imageUrls = [];
@@ -149,30 +149,28 @@ class V_HomepageView extends V_BaseView {
 
   async fetchData() {
     try {
-      // Fetch general latest laptops
-      const newProductRequest = axios
-        .get(`http://localhost:8000/laptops/latest?limit=${this.state.pageSize}`)
-        .then((response) => transformLaptopData(response.data["results"]));
-
-      // Fetch brand-specific laptops
-      const brandRequests = Object.entries(this.brands).flatMap(
+      // Fetch general and brand-specific latest laptops in one batched request
+      const brandSliders = Object.entries(this.brands).flatMap(
         ([brand, subBrands]) =>
-          subBrands.map((subBrand) =>
-            axios
-              .get(`http://localhost:8000/laptops/latest?brand=${brand}&subbrand=${subBrand}`)
-              .then((response) => ({
-                brand,
-                subBrand,
-                data: transformLaptopData(response.data["results"]),
-              })),
-          ),
+          subBrands.map((subBrand) => ({ brand, subbrand: subBrand, limit: 35 })),
       );
-
-      // Await all requests together
-      const [newProductData, ...brandResults] = await Promise.all([
-        newProductRequest,
-        ...brandRequests,
-      ]);
+      const sliders = [
+        { brand: "all", subbrand: "all", limit: this.state.pageSize },
+        ...brandSliders,
+      ];
+      const response = await axios.post(
+        "http://localhost:8000/laptops/latest/batch",
+        { sliders },
+      );
+      const sliderKey = ({ brand, subbrand, limit }) => `${brand}:${subbrand}:${limit}`;
+      const results = response.data["results"];
+
+      const newProductData = transformLaptopData(results[sliderKey(sliders[0])]);
+      const brandResults = brandSliders.map((slider) => ({
+        brand: slider.brand,
+        subBrand: slider.subbrand,
+        data: transformLaptopData(results[sliderKey(slider)]),
+      }));
 
       // Update state
       this.setState({ products: newProductData });
@@ -0,0 +1,32 @@
+import axios from "axios";
+
+const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || "http://localhost:8000";
+
+// Must not exceed BATCH_MAX_IDS in backend/routes/laptops.py
+const MAX_IDS_PER_REQUEST = 300;
+
+/**
+ * Fetch several laptops in as few requests as possible.
+ * Resolves to a Map of laptop id -> laptop; ids the backend doesn't know are absent.
+ */
+export const fetchLaptopsByIds = async (ids, fields = "card") => {
+  const uniqueIds = [...new Set(ids)];
+  const chunks = [];
+  for (let i = 0; i < uniqueIds.length; i += MAX_IDS_PER_REQUEST) {
+    chunks.push(uniqueIds.slice(i, i + MAX_IDS_PER_REQUEST));
+  }
+
+  const responses = await Promise.all(
+    chunks.map((chunk) =>
+      axios.get(`${BACKEND_URL}/laptops/batch`, {
+        params: { ids: chunk.join(","), fields },
+      })
+    )
+  );
+
+  const laptops = new Map();
+  responses.forEach((res) => {
+    res.data.results.forEach((laptop) => laptops.set(laptop.id, laptop));
+  });
+  return laptops;
+};
@@ -1,3 +1,17 @@
+// Width requested from /img for card images that have no pre-rendered variant
+const CARD_IMAGE_WIDTH = 320;
+
+// Cards are small: use the narrowest WebP variant once the upload pipeline has produced it,
+// otherwise let /img resize the original (it picks WebP or JPEG from the Accept header)
+const cardImageUrl = (imageUrl, imageVariants) => {
+  const webp = imageVariants?.[imageUrl]?.webp;
+  const widths = webp ? Object.keys(webp).map(Number).sort((a, b) => a - b) : [];
+  if (widths.length > 0) return webp[widths[0]];
+  return imageUrl.startsWith('/static/')
+    ? `/img/${imageUrl.slice('/static/'.length)}?w=${CARD_IMAGE_WIDTH}`
+    : imageUrl;
+};
+
 const transformLaptopData = (data) => {
   // Handle case where data is undefined, null, or not an array
   if (!data || !Array.isArray(data)) {
@@ -30,7 +44,7 @@ const transformLaptopData = (data) => {
     // Get the image source - use environment variable for backend URL
     const backendUrl = import.meta.env.VITE_BACKEND_URL || 'http://localhost:8000';
     const imgSource = imageUrls.length > 0 
-      ? `${backendUrl}${imageUrls[0]}`
+      ? `${backendUrl}${cardImageUrl(imageUrls[0], item.image_variants)}`
       : '/placeholder.png'; // Use placeholder instead of null
 
     return {